@@ -23,7 +23,9 @@ from typing import Set, List, Dict, Any
 from agentzero.graph import build_agentzero_graph
 from agentzero.scheduler import Scheduler
 from agentzero.session_store import SQLiteSessionStore
+from agentzero.llm_balancer import set_affinity_key
 import asyncio
+import json
 import shutil
 import uuid
 
@@ -126,6 +128,7 @@ agent_app = build_agentzero_graph().compile()
 
 # GLOBAL STATE
 scheduler = None
+model_keepalive = None
 last_active_user_phone = None  # To track who to message on WhatsApp
 whisper_model = None
 _startup_time = time.time()
@@ -139,7 +142,15 @@ _startup_time = time.time()
 async def health_check():
     """Simple health check with model availability."""
     import requests as http_requests
-    from agentzero.llm_service import LLM_PROVIDER, OLLAMA_API_URL, OLLAMA_MODEL, CLOUDFLARE_TEXT_MODEL
+    from agentzero.llm_service import LLM_PROVIDER, OLLAMA_API_URL, OLLAMA_MODEL, CLOUDFLARE_TEXT_MODEL, OPENAI_MODEL
+    from agentzero.llm_pool import get_pool
+    from agentzero.llm_scheduler import get_scheduler
+    from agentzero.embedding_cache import get_embedding_cache
+    from agentzero.llm_warmup import recent_load_events
+    from agentzero.llm_backends import get_router
+    from agentzero.llm_balancer import get_balancer
+    from agentzero import command_parser, fast_router, speculation
+    from agentzero.llm_profiles import all_profiles
 
     uptime_secs = int(time.time() - _startup_time)
     hours, remainder = divmod(uptime_secs, 3600)
@@ -153,6 +164,9 @@ async def health_check():
             model_name = CLOUDFLARE_TEXT_MODEL or "not configured"
             # Just check if we can reach Cloudflare (don't send a real prompt)
             llm_status = "configured"
+        elif LLM_PROVIDER == "openai":
+            model_name = OPENAI_MODEL
+            llm_status = "configured"
         else:
             model_name = OLLAMA_MODEL
             # Ping Ollama's API to check if the model is available
@@ -176,7 +190,18 @@ async def health_check():
             "provider": LLM_PROVIDER,
             "model": model_name,
             "status": llm_status,
+            "model_loads": recent_load_events(),
+            "keepalive": model_keepalive.stats() if model_keepalive else None,
+            "profiles": {node: p.to_dict() for node, p in all_profiles().items()},
         },
+        "llm_backends": get_router().stats(),
+        "llm_balancer": get_balancer().stats(),
+        "command_parser": command_parser.stats(),
+        "fast_router": fast_router.stats(),
+        "speculation": speculation.stats(),
+        "llm_pool": get_pool().stats(),
+        "llm_scheduler": get_scheduler().stats(),
+        "embedding_cache": get_embedding_cache().stats() if get_embedding_cache() else "disabled",
         "whisper": "loaded" if whisper_model else "not loaded",
         "websocket_clients": len(connected_clients),
     }
@@ -184,7 +209,7 @@ async def health_check():
 # ==========================================
 # OBSERVABILITY DASHBOARD (auth-protected)
 # ==========================================
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from agentzero.metrics import MetricsCollector
 
 @app.get("/admin/dashboard")
@@ -232,7 +257,16 @@ async def startup_event():
     Start the background scheduler on API startup.
     Initialize Whisper model.
     """
-    global scheduler, whisper_model
+    global scheduler, whisper_model, model_keepalive
+    # Open the pooled LLM HTTP clients so the first /chat doesn't pay the handshake
+    from agentzero import llm_service, llm_warmup
+    await llm_service.startup()
+
+    # Preload models in the background and keep them resident while in use
+    asyncio.create_task(llm_warmup.warm_up_models())
+    model_keepalive = llm_warmup.ModelKeepAlive()
+    asyncio.create_task(model_keepalive.start())
+
     scheduler = Scheduler(broadcast_func=broadcast_notification)
     # Give 30 seconds for WebSocket clients to connect before checking reminders
     asyncio.create_task(scheduler.start(initial_delay=30))
@@ -260,6 +294,8 @@ async def shutdown_event():
     if scheduler:
         scheduler.stop()
         logger.info("Scheduler stopped.")
+    if model_keepalive:
+        model_keepalive.stop()
         
     # 2. Close all active WebSocket connections
     if connected_clients:
@@ -270,8 +306,12 @@ async def shutdown_event():
             except Exception:
                 pass
         connected_clients.clear()
+
+    # 3. Close pooled LLM HTTP clients
+    from agentzero import llm_service
+    await llm_service.shutdown()
         
-    # 3. Flush logs
+    # 4. Flush logs
     for handler in logger.handlers:
         handler.flush()
         if hasattr(handler, 'close'):
@@ -414,6 +454,37 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(None)):
             connected_clients.remove(websocket)
         logger.info("Client removed.")
 
+def _extract_final(final_state):
+    """Helper to extract (response, domain, had_error) from a Pydantic object or dict state."""
+    if isinstance(final_state, dict):
+        agent_response = final_state.get("response", "[No response generated]")
+        domain = final_state.get("intent", "unknown")
+        had_error = bool(final_state.get("error"))
+    else:
+        agent_response = getattr(final_state, "response", "[No response generated]")
+        domain = getattr(final_state, "intent", "unknown")
+        had_error = bool(getattr(final_state, "error", None))
+    return agent_response, domain, had_error
+
+
+def _pending_of(final_state):
+    """The slot-filling action the final state is waiting on (None if nothing is pending)."""
+    if isinstance(final_state, dict):
+        return final_state.get("pending")
+    return getattr(final_state, "pending", None)
+
+
+def _save_turn(session_id: str, history: list, user_input: str, agent_response: str, pending: dict = None):
+    """Update session memory (keep last 5 interactions = 10 messages) and any pending slot-filling action."""
+    history.append({"role": "user", "content": user_input})
+    history.append({"role": "assistant", "content": agent_response})
+
+    if len(history) > 10:
+        history = history[-10:]
+
+    session_store.set(session_id, history, pending)
+
+
 async def run_agent_pipeline(user_input: str, session_id: str = "default") -> str:
     """
     Invokes the AgentZero LangGraph with the user's input (async).
@@ -423,6 +494,7 @@ async def run_agent_pipeline(user_input: str, session_id: str = "default") -> st
     request_id = str(uuid.uuid4())
     collector = MetricsCollector()
     collector.start_request(request_id, user_input)
+    set_affinity_key(session_id)  # keep a conversation on the same Ollama server
     
     try:
         # Cleanup old sessions before accessing (default 1 hour)
@@ -432,36 +504,58 @@ async def run_agent_pipeline(user_input: str, session_id: str = "default") -> st
         session_data = session_store.get(session_id)
         history = session_data["history"]
         
-        initial_state = {"user_input": user_input, "chat_history": history}
+        initial_state = {"user_input": user_input, "chat_history": history,
+                         "pending": session_data.get("pending")}
         # ainvoke() runs the async graph until END and returns the final state
         final_state = await agent_app.ainvoke(initial_state)
         
-        # Helper to extract response (handles both Pydantic object and dict)
-        if isinstance(final_state, dict):
-            agent_response = final_state.get("response", "[No response generated]")
-            domain = final_state.get("intent", "unknown")
-            had_error = bool(final_state.get("error"))
-        else:
-            agent_response = getattr(final_state, "response", "[No response generated]")
-            domain = getattr(final_state, "intent", "unknown")
-            had_error = bool(getattr(final_state, "error", None))
-            
+        agent_response, domain, had_error = _extract_final(final_state)
         collector.end_request(request_id, had_error=had_error, domain=domain or "unknown")
-            
-        # Update session memory (keep last 5 interactions = 10 messages)
-        history.append({"role": "user", "content": user_input})
-        history.append({"role": "assistant", "content": agent_response})
-        
-        if len(history) > 10:
-            history = history[-10:]
-            
-        session_store.set(session_id, history)
+        _save_turn(session_id, history, user_input, agent_response, _pending_of(final_state))
         
         return agent_response
     except Exception as e:
         collector.end_request(request_id, had_error=True)
         return f"[Agent Execution Error: {str(e)}]"
 
+
+async def run_agent_pipeline_stream(user_input: str, session_id: str = "default"):
+    """
+    Streaming variant of run_agent_pipeline.
+    Yields {"type": "token", "node", "content"} events as the LLM produces them,
+    then a single {"type": "done", "response", "domain"} event with the final response.
+    """
+    request_id = str(uuid.uuid4())
+    collector = MetricsCollector()
+    collector.start_request(request_id, user_input)
+    set_affinity_key(session_id)  # keep a conversation on the same Ollama server
+
+    try:
+        session_store.cleanup()
+        session_data = session_store.get(session_id)
+        history = session_data["history"]
+
+        initial_state = {"user_input": user_input, "chat_history": history,
+                         "pending": session_data.get("pending")}
+        config = {"configurable": {"stream_tokens": True}}
+        final_state = None
+        async for mode, chunk in agent_app.astream(
+            initial_state, config=config, stream_mode=["custom", "values"]
+        ):
+            if mode == "custom":
+                yield chunk
+            else:
+                final_state = chunk
+
+        agent_response, domain, had_error = _extract_final(final_state or {})
+        collector.end_request(request_id, had_error=had_error, domain=domain or "unknown")
+        _save_turn(session_id, history, user_input, agent_response, _pending_of(final_state))
+
+        yield {"type": "done", "response": agent_response, "domain": domain}
+    except Exception as e:
+        collector.end_request(request_id, had_error=True)
+        yield {"type": "done", "response": f"[Agent Execution Error: {str(e)}]", "domain": "unknown"}
+
 class ChatRequest(BaseModel):
     message: str
     session_id: str = None
@@ -489,6 +583,24 @@ async def chat_endpoint(req: ChatRequest, request: Request, _user: str = Depends
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest, request: Request, _user: str = Depends(require_auth)):
+    """
+    Server-Sent Events variant of /chat. Emits one `data: {json}` event per token,
+    then a final event with type "done" carrying the complete response.
+    """
+    check_rate_limit(request.client.host)
+
+    async def event_stream():
+        async for event in run_agent_pipeline_stream(req.message, req.session_id or "default"):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/webhook")
 async def verify_webhook(request: Request):
     """
@@ -0,0 +1,113 @@
+"""
+Two-call (supervisor -> domain agent) vs. fused (fused_planner) routing + planning.
+
+Runs a labelled prompt set through both paths, node functions only (no tools are
+executed), and reports latency percentiles, LLM calls per request, and domain /
+plan accuracy (the set of planned tool names must match the expected one).
+
+Against the stand-in (default) the replies are scripted, so only the latency
+numbers are meaningful; point --ollama-url at a real server (OLLAMA_MODEL picks
+the model) to compare plan accuracy.
+
+    python benchmarks/bench_fused.py --repeat 5 --ttft-ms 300 --tps 20
+    OLLAMA_MODEL=qwen2.5:3b python benchmarks/bench_fused.py --ollama-url http://localhost:11434
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_pipeline import _percentile, _point_at, _start_standin  # noqa: E402  (also sets sys.path)
+
+# (user input, expected domain, expected tool names)
+CASES = [
+    ("Schedule a meeting with Sam tomorrow at 15:00", "calendar", {"add_event"}),
+    ("What's on my calendar tomorrow?", "calendar", {"list_events"}),
+    ("Plan my day for tomorrow", "calendar", {"plan_day"}),
+    ("Remind me to call mom tomorrow at 18:00", "task", {"add_task"}),
+    ("List my tasks", "task", {"list_tasks"}),
+    ("Mark the groceries task as done", "task", {"complete_task"}),
+    ("Remember that my passport expires in May", "knowledge", {"remember_fact"}),
+    ("Hello there!", "chat", set()),
+]
+
+
+async def _two_call(text: str):
+    from agentzero.agent_state import AgentState
+    from agentzero.agents import calendar_agent_node, knowledge_agent_node, task_agent_node
+    from agentzero.supervisor import supervisor_node
+    agents = {"calendar": calendar_agent_node, "task": task_agent_node, "knowledge": knowledge_agent_node}
+    state = await supervisor_node(AgentState(user_input=text))
+    calls = 1
+    if state.intent in agents:
+        state = await agents[state.intent](state)
+        calls += 1
+    return state, calls
+
+
+async def _fused(text: str):
+    from agentzero.agent_state import AgentState
+    from agentzero.agents import calendar_agent_node, knowledge_agent_node, task_agent_node
+    from agentzero.fused_planner import fused_planner_node
+    agents = {"calendar": calendar_agent_node, "task": task_agent_node, "knowledge": knowledge_agent_node}
+    state = await fused_planner_node(AgentState(user_input=text))
+    calls = 1
+    if state.intent in agents and not state.plan:
+        # Same fallback the fused graph takes
+        state = await agents[state.intent](state)
+        calls += 1
+    return state, calls
+
+
+async def _measure(path, repeat: int) -> dict:
+    latencies, calls, domain_ok, plan_ok = [], 0, 0, 0
+    for _ in range(repeat):
+        for text, domain, tools in CASES:
+            start = time.perf_counter()
+            state, n = await path(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            calls += n
+            domain_ok += state.intent == domain
+            plan_ok += state.intent == domain and {s.get("type") for s in state.plan or []} == tools
+    total = len(latencies)
+    return {
+        "requests": total,
+        "llm_calls_per_request": round(calls / total, 2),
+        "latency_ms": {p: round(_percentile(latencies, int(p[1:])), 1) for p in ("p50", "p95", "p99")},
+        "domain_accuracy": round(domain_ok / total, 3),
+        "plan_accuracy": round(plan_ok / total, 3),
+    }
+
+
+async def _run(args) -> dict:
+    os.makedirs("data", exist_ok=True)
+    from agentzero import llm_service
+    await llm_service.startup()
+    try:
+        return {"two_call": await _measure(_two_call, args.repeat), "fused": await _measure(_fused, args.repeat)}
+    finally:
+        await llm_service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ollama-url", default="", help="real Ollama server (default: start the stand-in)")
+    parser.add_argument("--ttft-ms", type=float, default=250)
+    parser.add_argument("--tps", type=float, default=25)
+    parser.add_argument("--prefill-tps", type=float, default=400)
+    parser.add_argument("--slots", type=int, default=1)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--script", default="", help="JSON file of scripted replies per node")
+    args = parser.parse_args()
+
+    url = args.ollama_url.rstrip("/") or _start_standin(args)
+    _point_at([url])
+    print(json.dumps(asyncio.run(_run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
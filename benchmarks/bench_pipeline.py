@@ -0,0 +1,136 @@
+"""
+End-to-end load benchmark of run_agent_pipeline against the local LLM stand-in.
+
+Starts agentzero.llm_standin on a free port (or uses --standin-url), points the
+Ollama settings at it and replays a fixed prompt mix from N concurrent users, so
+scheduling, pooling, caching and routing changes can be compared on a CPU-only box
+with no real model. Reports request latency percentiles, throughput and the
+stand-in's slot usage. --servers N starts N stand-ins behind the Ollama balancer.
+
+    python benchmarks/bench_pipeline.py --users 8 --turns 5 --ttft-ms 300 --tps 20 --slots 1
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+PROMPTS = [
+    "Schedule a meeting with Sam tomorrow",
+    "What tasks do I have today?",
+    "Remember that my passport expires in May",
+    "Tell me a fun fact about octopuses",
+    "Remind me to call mom",
+    "How are you doing today?",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_standin(args) -> str:
+    import uvicorn
+    from agentzero.llm_standin import LatencyModel, StandInLLM, create_app, load_script
+
+    latency = LatencyModel(args.ttft_ms, args.tps, args.prefill_tps, args.jitter)
+    app = create_app(StandInLLM(latency, slots=args.slots, script=load_script(args.script)))
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _point_at(urls: list, cache: bool = False):
+    """Point the Ollama settings at the given servers (before agentzero modules are imported)."""
+    base_url = urls[0]
+    os.environ.update({
+        "OLLAMA_API_URLS": ",".join(urls),
+        "LLM_MAX_CONCURRENCY": os.getenv("LLM_MAX_CONCURRENCY", str(4 * len(urls))),
+        "LLM_PROVIDER": "ollama",
+        "LLM_BACKENDS": "ollama",
+        "OLLAMA_API_URL": f"{base_url}/api/generate",
+        "OLLAMA_EMBEDDINGS_API_URL": f"{base_url}/api/embeddings",
+        "OLLAMA_BASE_URL": base_url,
+        "OLLAMA_EMBED_BATCH_URL": f"{base_url}/api/embed",
+        "LLM_WARMUP_ENABLED": "false",
+        "LLM_CACHE_ENABLED": "true" if cache else "false",
+    })
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+async def _user(run_agent_pipeline, user: int, turns: int, latencies: list):
+    for turn in range(turns):
+        prompt = PROMPTS[(user + turn) % len(PROMPTS)]
+        start = time.perf_counter()
+        await run_agent_pipeline(prompt, session_id=f"bench-{user}")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def _run(args, urls: list) -> dict:
+    import httpx
+    os.makedirs("data", exist_ok=True)  # local tools create their files on import
+    from agentzero import llm_service, speculation
+    from agentzero_api import run_agent_pipeline
+
+    await llm_service.startup()
+    latencies: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_user(run_agent_pipeline, u, args.turns, latencies) for u in range(args.users)))
+    elapsed = time.perf_counter() - start
+    await llm_service.shutdown()
+
+    async with httpx.AsyncClient() as client:
+        standin = [(await client.get(f"{url}/stats")).json() for url in urls]
+    return {
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 1),
+            "p95": round(_percentile(latencies, 95), 1),
+            "p99": round(_percentile(latencies, 99), 1),
+            "max": round(max(latencies, default=0.0), 1),
+        },
+        "standin": standin,
+        "speculation": speculation.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--standin-url", default="", help="use an already running stand-in")
+    parser.add_argument("--ttft-ms", type=float, default=250)
+    parser.add_argument("--tps", type=float, default=25)
+    parser.add_argument("--prefill-tps", type=float, default=400)
+    parser.add_argument("--slots", type=int, default=1)
+    parser.add_argument("--servers", type=int, default=1, help="stand-in servers to balance across")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--script", default="", help="JSON file of scripted replies per node")
+    parser.add_argument("--cache", action="store_true", help="keep the LLM response cache enabled")
+    args = parser.parse_args()
+
+    urls = [args.standin_url.rstrip("/")] if args.standin_url else [_start_standin(args) for _ in range(args.servers)]
+    # Must be set before agentzero modules read their configuration
+    _point_at(urls, args.cache)
+    print(json.dumps(asyncio.run(_run(args, urls)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from . import Action
 from agentzero.tools.calendar import LocalCalendarTool
 from agentzero.memory import StructuredMemory
 from agentzero.llm_service import chat_completion
+from agentzero.prompt_builder import HABITS, PRIMARY_DATA, SECONDARY_DATA, PromptBuilder
 
 HABIT_MEMORY_PATH = "data/habits.json"
 
@@ -89,33 +90,26 @@ async def plan_day(date=None, **kwargs):
     tasks_text = _format_tasks(tasks)
 
     # 4. Ask LLM to compose the plan with real data
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are Ein, a realistic and helpful daily scheduler. "
-                "Create a structured day plan using ONLY the events, habits, and tasks provided below. "
-                "IMPORTANT RULES: "
-                "1. Prioritize scheduling Calendar Events at their exact fixed times. "
-                "2. Fit Habits into their designated time of day. "
-                "3. Assign pending Tasks to empty blocks in the schedule. "
-                "4. Do NOT invent or fabricate any events, habits, or tasks. If there is free time, explicitly label it as 'Free Time'. "
-                "Be concise and friendly."
-            ),
-        },
-        {
-            "role": "user",
-            "content": (
-                f"Plan my day for {day_label}.\n\n"
-                f"Calendar Events:\n{events_text}\n\n"
-                f"Habits to include:\n{habits_text}\n\n"
-                f"Pending Tasks:\n{tasks_text}\n\n"
-                f"Current time: {now.strftime('%H:%M')}"
-            ),
-        },
-    ]
-
-    return await chat_completion(messages=messages, stream=False, timeout=30)
+    system_prompt = (
+        "You are Ein, a realistic and helpful daily scheduler. "
+        "Create a structured day plan using ONLY the events, habits, and tasks provided below. "
+        "IMPORTANT RULES: "
+        "1. Prioritize scheduling Calendar Events at their exact fixed times. "
+        "2. Fit Habits into their designated time of day. "
+        "3. Assign pending Tasks to empty blocks in the schedule. "
+        "4. Do NOT invent or fabricate any events, habits, or tasks. If there is free time, explicitly label it as 'Free Time'. "
+        "Be concise and friendly."
+    )
+
+    # Events are the plan's backbone; habits and tasks are trimmed first if over budget
+    prompt = PromptBuilder("plan_day").system(system_prompt)
+    prompt.user(f"Plan my day for {day_label}.")
+    prompt.user(f"Calendar Events:\n{events_text}", priority=PRIMARY_DATA, truncatable=True)
+    prompt.user(f"Habits to include:\n{habits_text}", priority=HABITS, truncatable=True)
+    prompt.user(f"Pending Tasks:\n{tasks_text}", priority=SECONDARY_DATA, truncatable=True)
+    prompt.user(f"Current time: {now.strftime('%H:%M')}")
+
+    return await chat_completion(messages=prompt.build(), stream=False, timeout=30, node="plan_day")
 
 
 async def plan_week(start_date=None, **kwargs):
@@ -146,33 +140,26 @@ async def plan_week(start_date=None, **kwargs):
     tasks_text = _format_tasks(tasks)
 
     # 4. Ask LLM to compose the plan with real data
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are Ein, a realistic and helpful weekly scheduler. "
-                "Create a structured week plan using ONLY the events, habits, and tasks provided below. "
-                "IMPORTANT RULES: "
-                "1. Prioritize scheduling Calendar Events at their exact fixed times. "
-                "2. Fit Habits into their designated time of day. "
-                "3. Spread pending Tasks across the week into empty blocks. "
-                "4. Do NOT invent or fabricate any events, habits, or tasks. If there is open space, leave it as 'Free Time'. "
-                "Organize by day. Be concise and friendly."
-            ),
-        },
-        {
-            "role": "user",
-            "content": (
-                f"Plan my week: {week_label}.\n\n"
-                f"Calendar Events:\n{events_text}\n\n"
-                f"Habits to include:\n{habits_text}\n\n"
-                f"Pending Tasks:\n{tasks_text}\n\n"
-                f"Current time: {now.strftime('%H:%M')}"
-            ),
-        },
-    ]
-
-    return await chat_completion(messages=messages, stream=False, timeout=30)
+    system_prompt = (
+        "You are Ein, a realistic and helpful weekly scheduler. "
+        "Create a structured week plan using ONLY the events, habits, and tasks provided below. "
+        "IMPORTANT RULES: "
+        "1. Prioritize scheduling Calendar Events at their exact fixed times. "
+        "2. Fit Habits into their designated time of day. "
+        "3. Spread pending Tasks across the week into empty blocks. "
+        "4. Do NOT invent or fabricate any events, habits, or tasks. If there is open space, leave it as 'Free Time'. "
+        "Organize by day. Be concise and friendly."
+    )
+
+    # Events are the plan's backbone; habits and tasks are trimmed first if over budget
+    prompt = PromptBuilder("plan_week").system(system_prompt)
+    prompt.user(f"Plan my week: {week_label}.")
+    prompt.user(f"Calendar Events:\n{events_text}", priority=PRIMARY_DATA, truncatable=True)
+    prompt.user(f"Habits to include:\n{habits_text}", priority=HABITS, truncatable=True)
+    prompt.user(f"Pending Tasks:\n{tasks_text}", priority=SECONDARY_DATA, truncatable=True)
+    prompt.user(f"Current time: {now.strftime('%H:%M')}")
+
+    return await chat_completion(messages=prompt.build(), stream=False, timeout=30, node="plan_week")
 
 
 def register() -> dict:
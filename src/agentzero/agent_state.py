@@ -7,6 +7,8 @@ from pydantic import BaseModel, Field
 class AgentState(BaseModel):
     user_input: str
     intent: Optional[str] = None
+    domains: Optional[List[str]] = None  # every action domain of a multi-domain request
+    routed_by: Optional[str] = None  # "llm", "fast_router", "command_parser", "slot_filling" or "fallback"
     chat_history: Optional[List[Dict[str, str]]] = Field(default_factory=list)
     plan: Optional[List[Dict[str, Any]]] = None
     context: Optional[Dict[str, Any]] = None
@@ -18,6 +20,7 @@ class AgentState(BaseModel):
     response: Optional[str] = None
     step: Optional[str] = None  # Current node/state
     retries: int = Field(default=0)  # Self-correction loop counter
+    pending: Optional[Dict[str, Any]] = None  # action waiting on the user's answer (slot filling)
 
     class Config:
         arbitrary_types_allowed = True
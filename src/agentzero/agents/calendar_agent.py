@@ -1,9 +1,11 @@
 import json
-import re
 from datetime import datetime, timedelta
 from dateutil import tz
 from agentzero.agent_state import AgentState
 from agentzero.llm_service import chat_completion
+from agentzero.llm_scheduler import Priority
+from agentzero.prompt_builder import HABITS, REFLECTION, PromptBuilder
+from agentzero.llm_schemas import ASK_USER, DATE, TEXT, TIME, action, parse_json_reply, plan_schema
 from agentzero.memory import StructuredMemory
 
 HABIT_MEMORY_PATH = 'data/habits.json'
@@ -25,78 +27,96 @@ Available Tools:
 CRITICAL RULE FOR MISSING PARAMETERS (Conversational Slot Filling):
 If the user wants you to use a tool (like 'add_event') but they have NOT provided all required parameters (e.g. they didn't specify a time or date), DO NOT guess, fabricate, or pick a default!
 Instead, use the 'ask_user' tool to ask them for the missing detail.
-Example: {{"plan": [{{"type": "ask_user", "params": {{"question": "What time would you like to schedule the team meeting?"}}}}]}}
+Example: {"plan": [{"type": "ask_user", "params": {"question": "What time would you like to schedule the team meeting?"}}]}
 
 JSON FORMAT REQUIREMENT:
 You must respond with ONLY a valid JSON object containing a "plan" array.
-Example: {{"plan": [{{"type": "add_event", "params": {{"name": "Lunch", "date": "2026-02-15", "time": "12:00"}}}}]}}
+Example: {"plan": [{"type": "add_event", "params": {"name": "Lunch", "date": "2026-02-15", "time": "12:00"}}]}
 
 DO NOT wrap the JSON in markdown blocks (e.g. ```json). DO NOT output any conversational text. ONLY raw JSON is allowed. 
 If you need to ask a question, put it inside the JSON using the 'ask_user' tool type instead of talking directly.
-
-Current Temporal Context:
-{date_context}
 """
 
-async def calendar_agent_node(state: AgentState) -> AgentState:
-    from agentzero.memory import log_node
-    log_node('calendar_agent:entry', state)
+CALENDAR_ACTIONS = (
+    action("add_event", {"name": TEXT, "date": DATE, "time": TIME}),
+    action("list_events", {"start": DATE, "end": DATE}),
+    action("plan_day", {"date": DATE}),
+    action("plan_week", {"start_date": DATE}),
+)
+CALENDAR_PLAN_SCHEMA = plan_schema(*CALENDAR_ACTIONS, ASK_USER)
 
-    now = datetime.now(tz.tzlocal())
+
+def calendar_date_context(now: datetime) -> str:
     tomorrow = now + timedelta(days=1)
     day_after = now + timedelta(days=2)
     next_week = now + timedelta(days=7)
-    
-    date_context = (
+    return (
         f"Temporal Context:\n"
         f"- Currently: {now.strftime('%A, %Y-%m-%d %H:%M')}\n"
         f"- Tomorrow: {tomorrow.strftime('%A, %Y-%m-%d')}\n"
         f"- Day after tomorrow: {day_after.strftime('%A, %Y-%m-%d')}\n"
         f"- Next week (same day): {next_week.strftime('%A, %Y-%m-%d')}"
     )
+
+
+def normalize_calendar_plan(plan: list) -> list:
+    """Turn add_event's separate date/time params into the ISO 'begin' the calendar tool expects."""
+    for action in plan:
+        if action.get("type") == "add_event":
+            params = action.get("params", {})
+            date = params.pop("date", None)
+            time = params.pop("time", None)
+            if date and time:
+                try:
+                    dt = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
+                    params["begin"] = dt.isoformat()
+                except Exception:
+                    params["begin"] = f"{date}T{time}"
+            elif date:
+                params["begin"] = date
+            action["params"] = params
+    return plan
+
+async def calendar_agent_node(state: AgentState) -> AgentState:
+    from agentzero.memory import log_node
+    from agentzero.multi_agent import scope_note
+    from agentzero.slot_filling import ask_user_note
+    log_node('calendar_agent:entry', state)
+
+    date_context = calendar_date_context(datetime.now(tz.tzlocal()))
     
-    system_prompt = CALENDAR_AGENT_PROMPT.format(date_context=date_context)
+    prompt = PromptBuilder("calendar_agent").system(CALENDAR_AGENT_PROMPT)
     
     # We provide the entire habit list if planning is involved
     if "plan" in state.user_input.lower():
-        system_prompt += f"\n\nUser Habits (for planning reference):\n{json.dumps(load_habits())}"
+        prompt.context(f"User Habits (for planning reference):\n{json.dumps(load_habits())}",
+                       priority=HABITS, truncatable=True)
 
     # Self-correction reflection injection
     if state.tool_results:
         last_result = state.tool_results[-1]
         for v in last_result.values():
             if isinstance(v, str) and v.startswith("Error:"):
-                system_prompt += f"\n\nReflection on previous attempt: You tried to execute the user's request previously, but the tool failed with this error: '{v}'. Please analyze the error and output a new, corrected plan (e.g. fixing typos in dates or ranges)."
+                prompt.context(f"Reflection on previous attempt: You tried to execute the user's request previously, but the tool failed with this error: '{v}'. Please analyze the error and output a new, corrected plan (e.g. fixing typos in dates or ranges).", priority=REFLECTION)
+
+    scope = scope_note(state, "calendar")
+    if scope:
+        prompt.context(scope)
+    if ask_user_note():
+        prompt.context(ask_user_note())
 
-    messages = [{"role": "system", "content": system_prompt}]
-    if state.chat_history:
-        messages.extend(state.chat_history[-6:])
-    messages.append({"role": "user", "content": state.user_input})
+    prompt.history(state.chat_history, max_turns=6).context(date_context).user(state.user_input)
+    messages = prompt.build()
 
     try:
-        output = await chat_completion(messages=messages, stream=False, timeout=30)
-        match = re.search(r'\{.*\}', output, re.DOTALL)
-        json_str = match.group(0) if match else '{}'
-        plan_data = json.loads(json_str)
-        plan = plan_data.get("plan", [])
-        
+        output = await chat_completion(
+            messages=messages, stream=False, timeout=30,
+            priority=Priority.ROUTING, node="calendar_agent", json_early_stop=True,
+            schema=CALENDAR_PLAN_SCHEMA,
+        )
+        plan_data = parse_json_reply(output, "calendar_agent")
         # Format datetimes specifically for calendar events
-        for action in plan:
-            if action.get("type") == "add_event":
-                params = action.get("params", {})
-                date = params.pop("date", None)
-                time = params.pop("time", None)
-                if date and time:
-                    try:
-                        dt = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
-                        params["begin"] = dt.isoformat()
-                    except Exception:
-                        params["begin"] = f"{date}T{time}"
-                elif date:
-                    params["begin"] = date
-                action["params"] = params
-                
-        state.plan = plan
+        state.plan = normalize_calendar_plan(plan_data.get("plan", []))
     except Exception as e:
         state.plan = []
         state.error = f"Calendar planner error: {str(e)}"
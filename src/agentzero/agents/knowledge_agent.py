@@ -1,9 +1,10 @@
-import json
-import re
 from datetime import datetime
 from dateutil import tz
 from agentzero.agent_state import AgentState
 from agentzero.llm_service import chat_completion
+from agentzero.llm_scheduler import Priority
+from agentzero.prompt_builder import REFLECTION, PromptBuilder
+from agentzero.llm_schemas import ASK_USER, TEXT, action, parse_json_reply, plan_schema
 
 KNOWLEDGE_AGENT_PROMPT = """You are the Knowledge & Memory Specialist Agent.
 Your job is to parse the user's request and generate a JSON execution plan for retrieving or storing facts and notes.
@@ -15,21 +16,27 @@ Available Tools:
 
 CRITICAL RULE FOR MISSING PARAMETERS:
 If you need to use a tool (like 'remember_fact') but the user's request is too vague, use the 'ask_user' tool to clarify.
-Example: {{"plan": [{{"type": "ask_user", "params": {{"question": "What specific fact would you like me to remember about this topic?"}}}}]}}
+Example: {"plan": [{"type": "ask_user", "params": {"question": "What specific fact would you like me to remember about this topic?"}}]}
 
 JSON FORMAT REQUIREMENT:
 You must respond with ONLY a valid JSON object containing a "plan" array.
-Example: {{"plan": [{{"type": "remember_fact", "params": {{"fact": "User prefers dark mode"}}}}]}}
+Example: {"plan": [{"type": "remember_fact", "params": {"fact": "User prefers dark mode"}}]}
 
 DO NOT wrap the JSON in markdown blocks (e.g. ```json). DO NOT output any conversational text. ONLY raw JSON is allowed.
 If you need to ask a question, put it inside the JSON using the 'ask_user' tool type instead of talking directly.
-
-Current Temporal Context:
-{date_context}
 """
 
+KNOWLEDGE_ACTIONS = (
+    action("remember_fact", {"fact": TEXT}),
+    action("query_note", {"query": TEXT}),
+    action("get_file", {"path": TEXT}),
+)
+KNOWLEDGE_PLAN_SCHEMA = plan_schema(*KNOWLEDGE_ACTIONS, ASK_USER)
+
 async def knowledge_agent_node(state: AgentState) -> AgentState:
     from agentzero.memory import log_node
+    from agentzero.multi_agent import scope_note
+    from agentzero.slot_filling import ask_user_note
     log_node('knowledge_agent:entry', state)
 
     now = datetime.now(tz.tzlocal())
@@ -39,25 +46,31 @@ async def knowledge_agent_node(state: AgentState) -> AgentState:
         f"- Currently: {now.strftime('%A, %Y-%m-%d %H:%M')}"
     )
     
-    system_prompt = KNOWLEDGE_AGENT_PROMPT.format(date_context=date_context)
+    prompt = PromptBuilder("knowledge_agent").system(KNOWLEDGE_AGENT_PROMPT)
 
     # Self-correction reflection injection
     if state.tool_results:
         last_result = state.tool_results[-1]
         for v in last_result.values():
             if isinstance(v, str) and v.startswith("Error:"):
-                system_prompt += f"\n\nReflection on previous attempt: You tried to execute the user's request previously, but the tool failed with this error: '{v}'. Please analyze the error and output a new, corrected plan."
+                prompt.context(f"Reflection on previous attempt: You tried to execute the user's request previously, but the tool failed with this error: '{v}'. Please analyze the error and output a new, corrected plan.", priority=REFLECTION)
+
+    scope = scope_note(state, "knowledge")
+    if scope:
+        prompt.context(scope)
+    if ask_user_note():
+        prompt.context(ask_user_note())
 
-    messages = [{"role": "system", "content": system_prompt}]
-    if state.chat_history:
-        messages.extend(state.chat_history[-6:])
-    messages.append({"role": "user", "content": state.user_input})
+    prompt.history(state.chat_history, max_turns=6).context(date_context).user(state.user_input)
+    messages = prompt.build()
 
     try:
-        output = await chat_completion(messages=messages, stream=False, timeout=30)
-        match = re.search(r'\{.*\}', output, re.DOTALL)
-        json_str = match.group(0) if match else '{}'
-        plan_data = json.loads(json_str)
+        output = await chat_completion(
+            messages=messages, stream=False, timeout=30,
+            priority=Priority.ROUTING, node="knowledge_agent", json_early_stop=True,
+            schema=KNOWLEDGE_PLAN_SCHEMA,
+        )
+        plan_data = parse_json_reply(output, "knowledge_agent")
         plan = plan_data.get("plan", [])
         state.plan = plan
     except Exception as e:
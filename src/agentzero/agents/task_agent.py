@@ -1,9 +1,11 @@
-import json
-import re
 from datetime import datetime, timedelta
 from dateutil import tz
 from agentzero.agent_state import AgentState
 from agentzero.llm_service import chat_completion
+from agentzero.llm_scheduler import Priority
+from agentzero.prompt_builder import REFLECTION, PromptBuilder
+from agentzero.llm_schemas import ASK_USER, DATE, DATETIME, TEXT_LIST, parse_json_reply, plan_schema, signature_action
+from agentzero.actions import habit_actions, task_actions
 
 TASK_AGENT_PROMPT = """You are the Task & Habit Specialist Agent.
 Your job is to parse the user's request and generate a JSON execution plan for tasks or habits.
@@ -13,27 +15,57 @@ Available Tools:
 2. 'list_tasks': No params.
 3. 'edit_task': Requires 'old_name', optional 'new_name', optional 'new_deadline' (YYYY-MM-DD HH:MM).
 4. 'complete_task': Requires 'task_name'.
-5. 'add_habit': Requires 'name', 'frequency'.
+5. 'add_habit': Requires 'name', optional 'time_of_day', 'days_of_week' (list of day names), 'description'.
 6. 'list_habits': No params.
-7. 'track_habit': Requires 'habit_name'.
+7. 'track_habit': Requires 'name', optional 'date' (YYYY-MM-DD, default today).
 
 CRITICAL RULE FOR MISSING PARAMETERS:
 If you need to use a tool (like 'add_task' or 'edit_task') but are missing critical context (like they said "remind me to..." but didn't say when, OR if they said "change the deadline" but didn't state the new date), use the 'ask_user' tool to clarify.
-Example: {{"plan": [{{"type": "ask_user", "params": {{"question": "What is the new deadline for the milk task?"}}}}]}}
+Example: {"plan": [{"type": "ask_user", "params": {"question": "What is the new deadline for the milk task?"}}]}
 
 JSON FORMAT REQUIREMENT:
 You must respond with ONLY a valid JSON object containing a "plan" array.
-Example: {{"plan": [{{"type": "add_task", "params": {{"task": "Buy milk"}}}}]}}
+Example: {"plan": [{"type": "add_task", "params": {"task": "Buy milk"}}]}
 
 DO NOT wrap the JSON in markdown blocks (e.g. ```json). DO NOT output any conversational text. ONLY raw JSON is allowed.
 If you need to ask a question, put it inside the JSON using the 'ask_user' tool type instead of talking directly.
-
-Current Temporal Context:
-{date_context}
 """
 
+# Params are exactly what the executor passes to the action functions
+TASK_ACTIONS = (
+    signature_action("add_task", task_actions.add_task, deadline=DATETIME),
+    signature_action("list_tasks", task_actions.list_tasks),
+    signature_action("edit_task", task_actions.edit_task, new_deadline=DATETIME),
+    signature_action("complete_task", task_actions.complete_task),
+    signature_action("add_habit", habit_actions.add_habit, days_of_week=TEXT_LIST),
+    signature_action("list_habits", habit_actions.list_habits),
+    signature_action("track_habit", habit_actions.mark_habit_completed, date=DATE),
+)
+TASK_PLAN_SCHEMA = plan_schema(*TASK_ACTIONS, ASK_USER)
+
+
+def normalize_task_plan(plan: list) -> list:
+    """Convert "YYYY-MM-DD HH:MM" task deadlines to ISO 8601 (unparseable values are kept)."""
+    for action in plan:
+        if action.get("type") in ["add_task", "edit_task"]:
+            params = action.get("params", {})
+            deadline = params.get("deadline") or params.get("new_deadline")
+            if deadline:
+                try:
+                    dt = datetime.strptime(deadline, "%Y-%m-%d %H:%M")
+                    if action.get("type") == "add_task":
+                        params["deadline"] = dt.isoformat()
+                    else:
+                        params["new_deadline"] = dt.isoformat()
+                except Exception:
+                    pass # keep arbitrary string if parse fails
+            action["params"] = params
+    return plan
+
 async def task_agent_node(state: AgentState) -> AgentState:
     from agentzero.memory import log_node
+    from agentzero.multi_agent import scope_note
+    from agentzero.slot_filling import ask_user_note
     log_node('task_agent:entry', state)
 
     now = datetime.now(tz.tzlocal())
@@ -45,44 +77,33 @@ async def task_agent_node(state: AgentState) -> AgentState:
         f"- Tomorrow: {tomorrow.strftime('%A, %Y-%m-%d')}"
     )
     
-    system_prompt = TASK_AGENT_PROMPT.format(date_context=date_context)
+    prompt = PromptBuilder("task_agent").system(TASK_AGENT_PROMPT)
 
     # Self-correction reflection injection
     if state.tool_results:
         last_result = state.tool_results[-1]
         for v in last_result.values():
             if isinstance(v, str) and v.startswith("Error:"):
-                system_prompt += f"\n\nReflection on previous attempt: You tried to execute the user's request previously, but the tool failed with this error: '{v}'. Please analyze the error and output a new, corrected plan (e.g. fixing typos in the task name)."
+                prompt.context(f"Reflection on previous attempt: You tried to execute the user's request previously, but the tool failed with this error: '{v}'. Please analyze the error and output a new, corrected plan (e.g. fixing typos in the task name).", priority=REFLECTION)
+
+    scope = scope_note(state, "task")
+    if scope:
+        prompt.context(scope)
+    if ask_user_note():
+        prompt.context(ask_user_note())
 
-    messages = [{"role": "system", "content": system_prompt}]
-    if state.chat_history:
-        messages.extend(state.chat_history[-6:])
-    messages.append({"role": "user", "content": state.user_input})
+    prompt.history(state.chat_history, max_turns=6).context(date_context).user(state.user_input)
+    messages = prompt.build()
 
     try:
-        output = await chat_completion(messages=messages, stream=False, timeout=30)
-        match = re.search(r'\{.*\}', output, re.DOTALL)
-        json_str = match.group(0) if match else '{}'
-        plan_data = json.loads(json_str)
-        plan = plan_data.get("plan", [])
-        
+        output = await chat_completion(
+            messages=messages, stream=False, timeout=30,
+            priority=Priority.ROUTING, node="task_agent", json_early_stop=True,
+            schema=TASK_PLAN_SCHEMA,
+        )
+        plan_data = parse_json_reply(output, "task_agent")
         # Format task deadlines explicitly into ISO 8601
-        for action in plan:
-            if action.get("type") in ["add_task", "edit_task"]:
-                params = action.get("params", {})
-                deadline = params.get("deadline") or params.get("new_deadline")
-                if deadline:
-                    try:
-                        dt = datetime.strptime(deadline, "%Y-%m-%d %H:%M")
-                        if action.get("type") == "add_task":
-                            params["deadline"] = dt.isoformat()
-                        else:
-                            params["new_deadline"] = dt.isoformat()
-                    except Exception:
-                        pass # keep arbitrary string if parse fails
-                action["params"] = params
-
-        state.plan = plan
+        state.plan = normalize_task_plan(plan_data.get("plan", []))
     except Exception as e:
         state.plan = []
         state.error = f"Task planner error: {str(e)}"
@@ -0,0 +1,415 @@
+"""
+Deterministic parser for common task and calendar commands.
+"remind me to call mom tomorrow at 5pm", "add lunch with Sam on 2026-11-02 12:00",
+"list my tasks", "what's on my calendar friday" are matched by a small grammar and
+a relative-date resolver (dateutil) and turned into the same plan the task and
+calendar agents produce after normalization, so supervisor_node can skip both the
+routing and the planning LLM call. Dates come out as naive local ISO strings,
+which LocalCalendarTool.add_event and the task store read as local time.
+
+Only parses at or above COMMAND_PARSER_MIN_CONFIDENCE are used; ambiguous input
+(a bare "at 3", a date without a time for a reminder, date/recurrence/duration
+words the resolver doesn't handle - "next week", "the 1st", "every day", "until
+4pm", "for 15 minutes" - and answers to a question the assistant just asked) goes
+to the LLM as before. Enable with COMMAND_PARSER_ENABLED.
+
+    python -m agentzero.command_parser parse "remind me to call mom tomorrow at 5pm"
+    python -m agentzero.command_parser report   # coverage over the audit log
+"""
+import os
+import re
+import json
+import logging
+import argparse
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+from dateutil import tz
+from dateutil.parser import parse as parse_date
+from dateutil.relativedelta import relativedelta, weekday as rd_weekday
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.command_parser")
+
+load_dotenv()
+
+COMMAND_PARSER_ENABLED = os.getenv("COMMAND_PARSER_ENABLED", "false").lower() in ("1", "true", "yes")
+COMMAND_PARSER_MIN_CONFIDENCE = float(os.getenv("COMMAND_PARSER_MIN_CONFIDENCE", "0.9"))
+
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "ten": 10}
+
+# --- relative-date resolver ---
+
+_DATE_PATTERNS = [
+    ("iso", re.compile(r"\b(?:on\s+)?(\d{4}-\d{2}-\d{2})\b", re.I)),
+    ("day_after", re.compile(r"\b(?:on\s+)?(?:the\s+)?day after tomorrow\b", re.I)),
+    ("today", re.compile(r"\b(today|tonight|this (?:morning|afternoon|evening))\b", re.I)),
+    ("tomorrow", re.compile(r"\b(tomorrow|tmrw)(?: (?:morning|afternoon|evening|night))?\b", re.I)),
+    ("weekday", re.compile(r"\b(?:on\s+)?(?:(this|next)\s+)?(" + "|".join(_WEEKDAYS) + r")\b", re.I)),
+    ("in", re.compile(r"\bin\s+(\d+|a|an|one|two|three|four|five|ten)\s+(minute|hour|day|week)s?\b", re.I)),
+    ("month_day", re.compile(r"\b(?:on\s+)?(" + _MONTHS + r"\s+\d{1,2}(?:st|nd|rd|th)?)\b", re.I)),
+    ("day_month", re.compile(r"\b(?:on\s+)?(?:the\s+)?(\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTHS + r")\b", re.I)),
+]
+
+_TIME_PATTERNS = [
+    ("clock", re.compile(r"\b(?:at\s+)?(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)?(?![\w:])", re.I)),
+    ("ampm", re.compile(r"\b(?:at\s+)?(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)(?!\w)", re.I)),
+    ("named", re.compile(r"\b(?:at\s+)?(noon|midday|midnight)\b", re.I)),
+    ("bare", re.compile(r"\bat\s+(\d{1,2})\b(?![:\w])", re.I)),
+]
+
+
+@dataclass
+class When:
+    """Date and/or time found in a command, and the character spans it came from."""
+    day: Optional[date] = None
+    at: Optional[time] = None
+    spans: List[Tuple[int, int]] = field(default_factory=list)
+    ambiguous: bool = False
+
+    def resolve(self, now: datetime) -> Optional[datetime]:
+        """Naive local datetime; a time alone means its next occurrence."""
+        if self.at is None:
+            return None
+        if self.day is not None:
+            return datetime.combine(self.day, self.at)
+        candidate = datetime.combine(now.date(), self.at)
+        return candidate if candidate > now.replace(tzinfo=None) else candidate + timedelta(days=1)
+
+
+def _hour(hour: int, meridiem: Optional[str]) -> Optional[int]:
+    meridiem = (meridiem or "").replace(".", "").lower()
+    if meridiem and not 1 <= hour <= 12:
+        return None
+    if meridiem == "pm" and hour != 12:
+        return hour + 12
+    if meridiem == "am" and hour == 12:
+        return 0
+    return hour if hour < 24 else None
+
+
+def _find_time(text: str) -> Tuple[Optional[time], Optional[Tuple[int, int]], bool]:
+    for kind, pattern in _TIME_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        if kind == "named":
+            name = match.group(1).lower()
+            return (time(0, 0) if name == "midnight" else time(12, 0)), match.span(), False
+        if kind == "bare":
+            # "at 3": most people mean the afternoon, but it's a guess
+            hour = int(match.group(1))
+            hour = hour + 12 if 1 <= hour <= 7 else hour
+            return (time(hour, 0), match.span(), True) if hour < 24 else (None, None, False)
+        hour = _hour(int(match.group(1)), match.group(3) if kind == "clock" else match.group(2))
+        minute = int(match.group(2)) if kind == "clock" else 0
+        if hour is None or minute > 59:
+            continue
+        return time(hour, minute), match.span(), False
+    return None, None, False
+
+
+def _find_date(text: str, now: datetime):
+    """(date, span, ambiguous, time implied by an "in N hours/minutes" phrase)."""
+    today = now.date()
+    for kind, pattern in _DATE_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        if kind == "iso":
+            try:
+                return datetime.strptime(match.group(1), "%Y-%m-%d").date(), match.span(), False, None
+            except ValueError:
+                continue
+        if kind == "day_after":
+            return today + timedelta(days=2), match.span(), False, None
+        if kind == "today":
+            return today, match.span(), False, None
+        if kind == "tomorrow":
+            return today + timedelta(days=1), match.span(), False, None
+        if kind == "weekday":
+            qualifier, index = (match.group(1) or "").lower(), _WEEKDAYS.index(match.group(2).lower())
+            # Next occurrence after today; "next friday" and today's own weekday are ambiguous
+            day = today + relativedelta(days=1, weekday=rd_weekday(index))
+            ambiguous = qualifier == "next" or (index == today.weekday() and qualifier != "next")
+            return day, match.span(), ambiguous, None
+        if kind == "in":
+            count = int(match.group(1)) if match.group(1).isdigit() else _NUMBERS[match.group(1).lower()]
+            unit = match.group(2).lower()
+            try:
+                if unit in ("minute", "hour"):
+                    moment = now.replace(tzinfo=None, second=0, microsecond=0) + timedelta(**{unit + "s": count})
+                    return moment.date(), match.span(), False, moment.time()
+                return today + timedelta(**{unit + "s": count}), match.span(), False, None
+            except (OverflowError, ValueError):
+                continue  # "in 99999999999 days": out of range, leave it unparsed
+        try:
+            day = parse_date(match.group(1), default=datetime(today.year, today.month, today.day)).date()
+        except (ValueError, OverflowError):
+            continue
+        if day < today:
+            try:
+                day = day.replace(year=day.year + 1)
+            except ValueError:
+                continue  # Feb 29 with no leap day next year
+        return day, match.span(), False, None
+    return None, None, False, None
+
+
+def resolve_when(text: str, now: Optional[datetime] = None) -> When:
+    """Find the date and time a command refers to, relative to `now` (local time)."""
+    now = now or datetime.now(tz.tzlocal())
+    when = When()
+    day, span, ambiguous, implied = _find_date(text, now)
+    if day is not None:
+        when.day, when.ambiguous = day, ambiguous
+        when.spans.append(span)
+        when.at = implied
+    if when.at is None:
+        # Don't read a time out of the date phrase itself (e.g. the "12" of "Nov 12")
+        masked = text[:span[0]] + " " * (span[1] - span[0]) + text[span[1]:] if span else text
+        at, time_span, guessed = _find_time(masked)
+        if at is not None:
+            when.at = at
+            when.spans.append(time_span)
+            when.ambiguous = when.ambiguous or guessed
+    return when
+
+
+# Time words left in a name after resolve_when: the date would come out wrong
+_UNRESOLVED = re.compile(
+    r"\b(?:next|last|this|coming|following)\s+(?:week|weekend|month|year|quarter)\b"
+    r"|\b(?:end|start|beginning|middle|mid) of\b|\beo[dwm]\b"
+    r"|\b(?:every|each|daily|weekly|monthly|yearly|annually|fortnightly|weekdays|weekends)\b"
+    r"|\b(?:until|till|til|through|thru)\b|\bfrom\s+\d"
+    r"|\bfor\s+(?:\d+|a|an|one|two|three|four|five|ten|half an?)\s*(?:min(?:ute)?s?|hours?|hrs?|days?|weeks?)\b"
+    r"|\bin\s+(?:\d+|a|an|one|two|three|four|five|ten)\s+(?:minute|hour|day|week)s?\b"
+    r"|\b\d{1,2}(?:st|nd|rd|th)\b"
+    r"|\b(?:january|february|march|april|june|july|august|september|october|november|december)\b"
+    r"|\b(?:morning|afternoon|evening|tonight|noon|midnight|weekend)\b"
+    r"|\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b",
+    re.I,
+)
+
+
+def unresolved_time_words(text: str) -> bool:
+    """True if text still contains date, recurrence or duration words resolve_when didn't consume."""
+    return _UNRESOLVED.search(text or "") is not None
+
+
+_FILLER = re.compile(r"^(?:on|at|by|for|due|the|to|,|-)\s+|\s+(?:on|at|by|for|due|from|,|-)$", re.I)
+
+
+def strip_spans(text: str, spans: List[Tuple[int, int]]) -> str:
+    for start, end in sorted(spans, reverse=True):
+        text = text[:start] + " " + text[end:]
+    text = re.sub(r"\s+", " ", text).strip(" ,.;:!?")
+    while True:
+        stripped = _FILLER.sub("", text).strip(" ,.;:!?")
+        if stripped == text:
+            return text
+        text = stripped
+
+
+# --- command grammar ---
+
+@dataclass
+class Parse:
+    domain: str
+    plan: List[dict]
+    confidence: float
+    rule: str
+
+
+def _reminder(body: str, now: datetime, explicit_task: bool) -> Optional[Parse]:
+    when = resolve_when(body, now)
+    name = strip_spans(body, when.spans)
+    if not name:
+        return None
+    params = {"task": name}
+    confidence = 0.95
+    if when.at is not None:
+        params["deadline"] = when.resolve(now).isoformat()
+    elif when.day is not None or not explicit_task:
+        # "remind me to ..." with no time (or a day without a time): the agent asks when
+        confidence = 0.7
+    if when.ambiguous:
+        confidence = min(confidence, 0.85)
+    if unresolved_time_words(name):
+        confidence = min(confidence, 0.6)
+    return Parse("task", [{"type": "add_task", "params": params}], confidence,
+                 "add_task" if explicit_task else "remind_me")
+
+
+# Names that read as something you attend (when the verb alone doesn't say "event")
+_EVENTISH = re.compile(r"\b(?:with|lunch|dinner|breakfast|brunch|coffee|drinks|meeting|call|appointment|interview|"
+                       r"party|class|lesson|session|visit|dentist|doctor|flight|concert|game|date|standup|sync)\b", re.I)
+
+
+def _event(body: str, now: datetime, explicit: bool = True) -> Optional[Parse]:
+    when = resolve_when(body, now)
+    name = strip_spans(body, when.spans)
+    if not name or when.at is None or when.day is None:
+        return None  # events need an explicit day and time
+    confidence = 0.85 if when.ambiguous else 0.93
+    if not explicit and not _EVENTISH.search(name):
+        confidence = min(confidence, 0.8)  # "create a report for my boss friday at 5pm" is likely a task
+    if unresolved_time_words(name):
+        confidence = min(confidence, 0.6)  # "until 4pm", "for 15 minutes", "every week"
+    plan = [{"type": "add_event", "params": {"name": name, "begin": when.resolve(now).isoformat()}}]
+    return Parse("calendar", plan, confidence, "add_event")
+
+
+def _list_events(rest: str, now: datetime) -> Optional[Parse]:
+    when = resolve_when(rest or "", now)
+    if strip_spans(rest or "", when.spans):
+        return None  # something besides a date we don't understand
+    day = (when.day or now.date()).strftime("%Y-%m-%d")
+    confidence = 0.85 if when.ambiguous else 0.95
+    return Parse("calendar", [{"type": "list_events", "params": {"start": day, "end": day}}], confidence, "list_events")
+
+
+_COMMANDS = [
+    (re.compile(r"^(?:please\s+)?(?:list|show)(?: me)?(?: all)?(?: of)? (?:my )?(?:pending |open )?(?:tasks|to-?dos|todo list)$"
+                r"|^what are my tasks$|^what(?:'s| is) on my (?:todo|to-do) list$", re.I),
+     lambda m, now: Parse("task", [{"type": "list_tasks", "params": {}}], 0.97, "list_tasks")),
+    (re.compile(r"^(?:please\s+)?(?:list|show)(?: me)? (?:my )?habits$|^what are my habits$", re.I),
+     lambda m, now: Parse("task", [{"type": "list_habits", "params": {}}], 0.97, "list_habits")),
+    (re.compile(r"^(?:what(?:'s| is) on my (?:calendar|schedule)|(?:list|show)(?: me)? my (?:events|calendar|schedule))"
+                r"(?P<rest>\s.+)?$", re.I),
+     lambda m, now: _list_events(m.group("rest"), now)),
+    (re.compile(r"^(?:mark|tick off) (?:the )?(?P<name>.+?)(?: task)?(?: as)? (?:done|complete|completed|finished)$"
+                r"|^(?:complete|finish) (?:the )?task:? (?P<name2>.+)$", re.I),
+     lambda m, now: Parse("task", [{"type": "complete_task",
+                                    "params": {"task_name": (m.group("name") or m.group("name2")).strip()}}],
+                          0.93, "complete_task")),
+    (re.compile(r"^(?:please\s+)?(?:add|create|new)(?: a| an)? (?:task|todo|to-do)(?: to)?:? (?P<body>.+)$"
+                r"|^add (?P<body2>.+?) to my (?:tasks|todo list|to-do list)$", re.I),
+     lambda m, now: _reminder(m.group("body") or m.group("body2"), now, explicit_task=True)),
+    (re.compile(r"^(?:please\s+)?remind me to (?P<body>.+)$", re.I),
+     lambda m, now: _reminder(m.group("body"), now, explicit_task=False)),
+    (re.compile(r"^(?:please\s+)?(?P<verb>add|schedule|book|put|create)(?: an?)?(?P<kind> (?:event|appointment))?:? "
+                r"(?P<body>.+?)(?P<calendar> (?:to|on|in) my (?:calendar|schedule))?$", re.I),
+     lambda m, now: _event(m.group("body"), now, explicit=bool(
+         m.group("verb").lower() in ("schedule", "book") or m.group("kind") or m.group("calendar")))),
+]
+
+
+def parse(text: str, now: Optional[datetime] = None) -> Optional[Parse]:
+    """The plan for a recognised command (with a confidence), or None."""
+    now = now or datetime.now(tz.tzlocal())
+    command = re.sub(r"\s+", " ", text or "").strip().rstrip(".!?")
+    for pattern, build in _COMMANDS:
+        match = pattern.match(command)
+        if match:
+            result = build(match, now)
+            if result is not None:
+                return result
+    return None
+
+
+def apply(state) -> bool:
+    """Set intent and plan from a confident local parse; False to fall back to the LLMs."""
+    from agentzero import fast_router
+    from agentzero.metrics import MetricsCollector
+    collector = MetricsCollector()
+    if state.pending or fast_router.awaiting_answer(state.chat_history):
+        collector.incr("command_parser.deferred_followups")
+        return False
+    try:
+        result = parse(state.user_input)
+    except (OverflowError, ValueError) as e:
+        # Input the resolver can't represent is the LLM's to handle, not a failed request
+        logger.warning(f"Command parser gave up on {state.user_input!r}: {e}")
+        result = None
+    if result is None or result.confidence < COMMAND_PARSER_MIN_CONFIDENCE:
+        collector.incr("command_parser.misses")
+        return False
+    state.intent = result.domain
+    state.plan = result.plan
+    collector.incr("command_parser.hits")
+    collector.incr(f"command_parser.hits.{result.rule}")
+    return True
+
+
+def stats() -> dict:
+    from agentzero.metrics import MetricsCollector
+    counters = MetricsCollector().get_counters()
+    hits, misses = counters.get("command_parser.hits", 0), counters.get("command_parser.misses", 0)
+    return {
+        "enabled": COMMAND_PARSER_ENABLED,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+    }
+
+
+# --- offline coverage report ---
+
+def load_requests(path: Optional[str] = None) -> List[dict]:
+    """Past requests ({user_input, domain, routed_by}) from the policy_enforcer audit log."""
+    from agentzero.memory import AuditLog
+    from agentzero.policy_enforcer import LOG_PATH
+    requests, last = [], None
+    for entry in AuditLog(path or LOG_PATH).read_all():
+        if entry.get("step") != "policy_enforcer" or not entry.get("user_input"):
+            continue
+        if entry["user_input"] == last:
+            continue  # one entry per domain of a multi-domain request
+        last = entry["user_input"]
+        requests.append({"user_input": entry["user_input"], "domain": entry.get("domain"),
+                         "routed_by": entry.get("routed_by")})
+    return requests
+
+
+def report(requests: List[dict]) -> dict:
+    """
+    How much past traffic the parser would have handled, and how often it agrees on
+    the domain. Agreement is only scored against requests it didn't route itself.
+    """
+    rules: Counter = Counter()
+    covered = scored = agreed = parsed_low = 0
+    for request in requests:
+        result = parse(request["user_input"])
+        if result is None:
+            continue
+        if result.confidence < COMMAND_PARSER_MIN_CONFIDENCE:
+            parsed_low += 1
+            continue
+        covered += 1
+        rules[result.rule] += 1
+        if request.get("routed_by") != "command_parser":
+            scored += 1
+            agreed += result.domain == request["domain"]
+    total = len(requests)
+    return {
+        "requests": total,
+        "coverage": round(covered / total, 3) if total else 0.0,
+        "below_confidence": parsed_low,
+        "domain_agreement": round(agreed / scored, 3) if scored else 0.0,
+        "agreement_scored_on": scored,
+        "by_rule": dict(rules),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local command parser tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    one = sub.add_parser("parse", help="parse one command")
+    one.add_argument("text")
+    cov = sub.add_parser("report", help="coverage over the audit log")
+    cov.add_argument("--log", default=None, help="audit log (default: policy_enforcer.LOG_PATH)")
+    args = parser.parse_args()
+    if args.command == "parse":
+        result = parse(args.text)
+        print(json.dumps(result.__dict__ if result else None, indent=2))
+    else:
+        print(json.dumps(report(load_requests(args.log)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
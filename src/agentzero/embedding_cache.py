@@ -0,0 +1,146 @@
+"""
+Content-addressed embedding cache for AgentZero.
+Vectors live in an append-only float32 file that is memory-mapped for reads,
+so lookups are zero-copy views and the cache survives restarts without being
+loaded into RAM. A compact append-only index maps blake2b(model, text) to
+(offset, dim). Hit/miss counters are exported under "embedding_cache.*".
+"""
+import os
+import mmap
+import array
+import struct
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.embedding_cache")
+
+load_dotenv()
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache")
+
+# Index record: 16-byte digest, uint64 float offset, uint32 dimension
+_INDEX_RECORD = struct.Struct("<16sQI")
+_FLOAT_SIZE = array.array("f").itemsize
+
+
+def cache_key(model: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """mmap-backed float32 vector store with an in-memory key -> (offset, dim) index."""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.vectors_path = f"{path}.f32"
+        self.index_path = f"{path}.idx"
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._mapped_floats = 0
+        os.makedirs(os.path.dirname(self.vectors_path) or ".", exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        for p in (self.vectors_path, self.index_path):
+            if not os.path.exists(p):
+                open(p, "ab").close()
+        total_floats = os.path.getsize(self.vectors_path) // _FLOAT_SIZE
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % _INDEX_RECORD.size
+        for digest, offset, dim in _INDEX_RECORD.iter_unpack(data[:usable]):
+            if offset + dim <= total_floats:  # skip records whose vector write never completed
+                self._index[digest] = (offset, dim)
+        if usable != len(data):
+            logger.warning("Embedding cache index has a truncated trailing record; ignoring it.")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _ensure_mapped(self, floats_needed: int):
+        if self._mmap is not None and floats_needed <= self._mapped_floats:
+            return
+        size = os.path.getsize(self.vectors_path)
+        if size == 0:
+            return
+        with open(self.vectors_path, "rb") as f:
+            # The previous map is left to the GC: outstanding views may still reference it
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_floats = size // _FLOAT_SIZE
+
+    def get_view(self, model: str, text: str) -> Optional[memoryview]:
+        """Zero-copy float32 view of a cached vector, or None on miss."""
+        from agentzero.metrics import MetricsCollector
+        with self._lock:
+            entry = self._index.get(cache_key(model, text))
+            if entry is None:
+                MetricsCollector().incr("embedding_cache.misses")
+                return None
+            offset, dim = entry
+            self._ensure_mapped(offset + dim)
+            start = offset * _FLOAT_SIZE
+            view = memoryview(self._mmap)[start:start + dim * _FLOAT_SIZE].cast("f")
+        MetricsCollector().incr("embedding_cache.hits")
+        return view
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        view = self.get_view(model, text)
+        return view.tolist() if view is not None else None
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        return [self.get(model, t) for t in texts]
+
+    def put(self, model: str, text: str, vector: Sequence[float]):
+        if not vector:
+            return
+        digest = cache_key(model, text)
+        payload = array.array("f", vector).tobytes()
+        with self._lock:
+            if digest in self._index:
+                return
+            with open(self.vectors_path, "ab") as f:
+                f.write(b"\0" * (-f.tell() % _FLOAT_SIZE))  # re-align after a torn write
+                offset = f.tell() // _FLOAT_SIZE
+                f.write(payload)
+            with open(self.index_path, "ab") as f:
+                f.write(_INDEX_RECORD.pack(digest, offset, len(vector)))
+            self._index[digest] = (offset, len(vector))
+
+    def stats(self) -> dict:
+        from agentzero.metrics import MetricsCollector
+        counters = MetricsCollector().get_counters()
+        hits = counters.get("embedding_cache.hits", 0)
+        misses = counters.get("embedding_cache.misses", 0)
+        return {
+            "entries": len(self._index),
+            "bytes": os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache (None when disabled via EMBEDDING_CACHE_ENABLED)."""
+    global _cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+
+def set_embedding_cache(cache: Optional[EmbeddingCache]):
+    """Swap the global cache (tests)."""
+    global _cache
+    _cache = cache
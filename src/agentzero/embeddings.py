@@ -0,0 +1,37 @@
+"""
+ChromaDB embedding function backed by AgentZero's LLM provider.
+Lets LongTermMemory embed through Ollama / Cloudflare in batches instead of
+Chroma's bundled default model, so ingestion scales with batch size.
+"""
+from typing import Any, Dict
+
+import httpx
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from agentzero import llm_service
+
+
+class LLMEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Batched, keep-alive embedding function for chromadb collections."""
+
+    def __init__(self, batch_size: int = llm_service.EMBEDDING_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._client = httpx.Client()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = llm_service.get_embeddings_sync(input, batch_size=self.batch_size, client=self._client)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            raise RuntimeError(f"Embedding failed for {len(missing)} of {len(vectors)} inputs")
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "agentzero-llm"
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "LLMEmbeddingFunction":
+        return LLMEmbeddingFunction(batch_size=config.get("batch_size", llm_service.EMBEDDING_BATCH_SIZE))
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"batch_size": self.batch_size}
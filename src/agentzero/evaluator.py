@@ -5,6 +5,15 @@ it increments the retry counter and loops back to the planner to self-correct.
 """
 
 from agentzero.agent_state import AgentState
+from agentzero.metrics import MetricsCollector
+
+
+def result_failed(result: dict) -> bool:
+    """True if a tool result reports an error (an "error" key or an "Error: ..." string)."""
+    if "error" in result:
+        return True
+    return any(isinstance(v, str) and v.startswith("Error:") for v in result.values())
+
 
 async def evaluator(state: AgentState) -> AgentState:
     from agentzero.memory import log_node
@@ -15,14 +24,7 @@ async def evaluator(state: AgentState) -> AgentState:
         log_node('evaluator:error', state)
         return state
 
-    has_error = False
-    if state.tool_results:
-        for result in state.tool_results:
-            if "error" in result:
-                has_error = True
-            for k, v in result.items():
-                if isinstance(v, str) and v.startswith("Error:"):
-                    has_error = True
+    has_error = any(result_failed(result) for result in state.tool_results or [])
 
     if has_error:
         state.retries += 1
@@ -31,6 +33,8 @@ async def evaluator(state: AgentState) -> AgentState:
             state.step = "evaluator (max retries)"
         else:
             state.step = "evaluator (retry loop)"
+            # Each retry costs another planner LLM call
+            MetricsCollector().incr("evaluator.retries")
     else:
         # Reset retries on success so subsequent chat turns don't carry it over
         state.retries = 0
@@ -2,32 +2,45 @@
 Executor node for AgentZero (LangGraph).
 Executes planned actions using the unified action registry.
 Handles 'chat' intent by generating a conversational response using the LLM.
+When the graph is streamed with stream_tokens, chat tokens are forwarded as they arrive.
 """
 import asyncio
+import logging
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
 
 from agentzero.agent_state import AgentState
 from agentzero.actions import load_actions
+from agentzero import slot_filling
 from agentzero.llm_service import chat_completion
+from agentzero.prompt_builder import RAG, PromptBuilder
+from agentzero.streaming import TokenSink, token_sink, stream_chat
+
+logger = logging.getLogger("agentzero.executor")
 
 ACTIONS = load_actions()
 
 
-async def chat_with_llm(message: str, history: list = None, rag_context: list = None) -> str:
-    system_prompt = "Your name is Ein. You are a helpful, productivity AI agent."
+async def chat_with_llm(message: str, history: list = None, rag_context: list = None,
+                        on_token: Optional[TokenSink] = None) -> str:
+    prompt = PromptBuilder("executor").system("Your name is Ein. You are a helpful, productivity AI agent.")
     if rag_context:
-        system_prompt += "\n\nRelevant Context about the User:\n" + "\n".join([f"- {fact}" for fact in rag_context])
-        
-    messages = [{"role": "system", "content": system_prompt}]
-    if history:
-        messages.extend(history)
-    messages.append({"role": "user", "content": message})
+        prompt.context("Relevant Context about the User:\n" + "\n".join([f"- {fact}" for fact in rag_context]),
+                       priority=RAG, truncatable=True)
+    # Full history; the oldest turns are dropped first when over budget
+    prompt.history(history).user(message)
+    messages = prompt.build()
     try:
-        return await chat_completion(messages=messages, stream=False, timeout=120)
+        if on_token:
+            return await stream_chat(messages, on_token, timeout=120, node="executor")
+        return await chat_completion(messages=messages, stream=False, timeout=120, cache_ttl=0, node="executor")
     except Exception as e:
-        return f"[Chat error: {str(e)}]"
+        logger.error(f"Chat failed: {e}")
+        return "Sorry, I can't reach my language model right now. Please try again in a moment."
 
 
-async def executor(state: AgentState) -> AgentState:
+async def executor(state: AgentState, config: RunnableConfig = None) -> AgentState:
     from agentzero.memory import log_node
     log_node('executor:entry', state)
     if state.error:
@@ -45,10 +58,16 @@ async def executor(state: AgentState) -> AgentState:
         state.step = "error_handler"
         return state
 
+    pending = None
     for action in state.plan:
         action_type = action.get("type")
         params = action.get("params", {})
 
+        # Already ran in an earlier attempt (multi-domain retry of another domain): keep its result
+        if "done" in action:
+            results.append(action["done"])
+            continue
+
         # Handle chat intent directly
         if action_type == "chat":
             if isinstance(params, str):
@@ -56,7 +75,10 @@ async def executor(state: AgentState) -> AgentState:
             else:
                 user_message = params.get("message", state.user_input)
             rag_context = state.context.get("rag") if state.context else None
-            chat_response = await chat_with_llm(user_message, state.chat_history, rag_context)
+            chat_response = await chat_with_llm(
+                user_message, state.chat_history, rag_context,
+                on_token=token_sink(config, "executor"),
+            )
             results.append({"chat": chat_response})
             continue
 
@@ -69,6 +91,8 @@ async def executor(state: AgentState) -> AgentState:
         if action_type == "ask_user":
             question = params.get("question", "Could you provide more details?")
             results.append({"chat": question})
+            # Remember what the answer is for so the next turn can complete it directly
+            pending = slot_filling.pending_from(params, state.intent) or pending
             continue
 
         # Unified action dispatch (supports both sync and async actions)
@@ -86,6 +110,7 @@ async def executor(state: AgentState) -> AgentState:
             results.append({"error": f"Unknown action type: {action_type}"})
 
     state.tool_results = results
+    state.pending = pending
     state.step = "executor"
     log_node('executor:exit', state)
     return state
@@ -0,0 +1,281 @@
+"""
+Zero-LLM fast path for the supervisor's domain routing.
+classify() tries, in order:
+  1. keyword/regex rules ("hi", "list my tasks", "remind me to...") - microseconds;
+  2. a nearest-centroid model over embeddings (NumPy; centroids trained from past
+     supervisor decisions in the node trace log), used only when the input's
+     embedding is already in the embedding cache, so no model call is ever made.
+Anything below FAST_ROUTER_MIN_CONFIDENCE, with conflicting rules, or answering a
+question the assistant just asked (a slot-filling follow-up, whose domain depends
+on context; also whenever a pending slot-filling action exists) falls back to the
+LLM supervisor.
+
+Enable with FAST_ROUTER_ENABLED=true. Hits/misses are counted under "fast_router.*"
+and routing latency is observed as "routing_ms" (node "fast_router" or "supervisor_llm").
+
+Offline tools (read LLM routing decisions, source="llm", from the node trace log):
+  python -m agentzero.fast_router train    # fit centroids -> FAST_ROUTER_MODEL_PATH
+  python -m agentzero.fast_router report   # coverage/accuracy vs. past LLM decisions
+"""
+import os
+import re
+import json
+import asyncio
+import logging
+import argparse
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.fast_router")
+
+load_dotenv()
+
+FAST_ROUTER_ENABLED = os.getenv("FAST_ROUTER_ENABLED", "false").lower() in ("1", "true", "yes")
+FAST_ROUTER_MIN_CONFIDENCE = float(os.getenv("FAST_ROUTER_MIN_CONFIDENCE", "0.8"))
+FAST_ROUTER_MODEL_PATH = os.getenv("FAST_ROUTER_MODEL_PATH", "data/fast_router.npz")
+# Centroid votes need this cosine similarity and this lead over the runner-up
+FAST_ROUTER_MIN_SIMILARITY = float(os.getenv("FAST_ROUTER_MIN_SIMILARITY", "0.6"))
+FAST_ROUTER_MIN_MARGIN = float(os.getenv("FAST_ROUTER_MIN_MARGIN", "0.08"))
+
+DOMAINS = ("calendar", "task", "knowledge", "chat")
+
+# (domain, pattern, confidence). A rule only decides when every matching rule agrees.
+# Only command-shaped patterns (a verb and its object) clear FAST_ROUTER_MIN_CONFIDENCE;
+# bare domain keywords ("book", "event", "habit") are hints for speculation and for
+# spotting conflicts, since questions *about* them ("what is a good habit?") are not commands.
+_RULES = [
+    ("chat", r"^\s*(hi|hello|hey|yo|hiya|good (morning|afternoon|evening|night)|thanks?( you)?|thank you( so much)?"
+             r"|ok(ay)?|cool|great|bye|goodbye|see you|how are you( doing)?( today)?)\s*[!.?]*\s*$", 0.95),
+    ("task", r"\b(list|show|what are|what's on)\b.*\b(tasks?|to-?dos?|todo list)\b", 0.92),
+    ("task", r"\b(remind me|add (a |an )?(task|todo|to-do)|mark .* (done|complete)|complete (the |my )?task)\b", 0.9),
+    ("task", r"\b(list|show|track|log|add|start|mark)\b.*\bhabits?\b|\bmy (habits|streaks?)\b", 0.9),
+    ("task", r"\b(habits?|streak)\b", 0.6),
+    ("calendar", r"^\s*(please\s+)?(can you\s+)?(schedule|reschedule)\b"
+                 r"|^\s*(please\s+)?book (a|an|me|my)\b.*\b(meeting|appointment|call|slot|session)\b"
+                 r"|\b(add|put)\b.*\b(to|on|in) my calendar\b|\bwhat'?s on my calendar\b", 0.88),
+    ("calendar", r"\b(schedule|reschedule|book|meeting|appointment|calendar|event)\b", 0.6),
+    ("calendar", r"\b(plan my (day|week)|what'?s on my (day|week|schedule)|am i free|free time)\b", 0.9),
+    ("knowledge", r"\b(remember (that|this)|note (that|down)|make a note|save (this|a note)|"
+                  r"what did i (say|tell you)|do you remember)\b", 0.9),
+]
+_COMPILED = [(domain, re.compile(pattern, re.IGNORECASE), conf) for domain, pattern, conf in _RULES]
+
+
+@dataclass
+class Route:
+    domain: str
+    confidence: float
+    method: str  # "rules" | "centroid"
+
+
+def classify_rules(text: str) -> Optional[Route]:
+    """Rule verdict, or None when no rule (or conflicting rules) match."""
+    matches = [(domain, conf) for domain, pattern, conf in _COMPILED if pattern.search(text or "")]
+    if not matches or len({d for d, _ in matches}) > 1:
+        return None
+    return Route(matches[0][0], max(c for _, c in matches), "rules")
+
+
+class CentroidModel:
+    """Nearest-centroid classifier over L2-normalized embeddings."""
+
+    def __init__(self, domains: List[str], centroids: np.ndarray, embedding_model: str = ""):
+        self.domains = list(domains)
+        self.centroids = centroids
+        self.embedding_model = embedding_model
+
+    @classmethod
+    def fit(cls, vectors: List[list], labels: List[str], embedding_model: str = "") -> "CentroidModel":
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        domains = sorted(set(labels))
+        centroids = np.stack([matrix[[i for i, l in enumerate(labels) if l == d]].mean(axis=0) for d in domains])
+        return cls(domains, _normalize(centroids), embedding_model)
+
+    def predict(self, vector: list) -> Optional[Route]:
+        sims = self.centroids @ _normalize(np.asarray(vector, dtype=np.float32))
+        order = np.argsort(sims)[::-1]
+        best = float(sims[order[0]])
+        margin = best - float(sims[order[1]]) if len(order) > 1 else best
+        if best < FAST_ROUTER_MIN_SIMILARITY or margin < FAST_ROUTER_MIN_MARGIN:
+            return None
+        # Map the margin onto [0.5, 1): a clear lead means a confident vote
+        confidence = min(0.99, 0.5 + margin * 4)
+        return Route(self.domains[int(order[0])], confidence, "centroid")
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, centroids=self.centroids, domains=np.asarray(self.domains),
+                 embedding_model=np.asarray(self.embedding_model))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CentroidModel"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            data = np.load(path)
+            return cls([str(d) for d in data["domains"]], data["centroids"], str(data["embedding_model"]))
+        except Exception as e:
+            logger.error(f"Failed to load fast router model {path}: {e}")
+            return None
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.where(norms == 0, 1, norms)
+
+
+_model: Optional[CentroidModel] = None
+_model_loaded = False
+
+
+def get_model() -> Optional[CentroidModel]:
+    """The trained centroid model, if any and if it matches the current embedding model."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        from agentzero.llm_service import _embedding_model
+        _model = CentroidModel.load(FAST_ROUTER_MODEL_PATH)
+        if _model is not None and _model.embedding_model not in ("", _embedding_model()):
+            logger.warning(f"Fast router centroids were trained with {_model.embedding_model}, "
+                           f"not {_embedding_model()}; ignoring them until retrained")
+            _model = None
+        _model_loaded = True
+    return _model
+
+
+def set_model(model: Optional[CentroidModel]):
+    global _model, _model_loaded
+    _model, _model_loaded = model, True
+
+
+def _cached_embedding(text: str) -> Optional[list]:
+    """The input's embedding if it is already cached (never calls the model)."""
+    from agentzero.embedding_cache import get_embedding_cache
+    from agentzero.llm_service import _embedding_model
+    cache = get_embedding_cache()
+    return cache.get(_embedding_model(), text) if cache is not None else None
+
+
+def awaiting_answer(chat_history: Optional[List[dict]]) -> bool:
+    """True when the last assistant turn asked the user something (slot-filling follow-up)."""
+    for msg in reversed(chat_history or []):
+        if msg.get("role") == "assistant":
+            return msg.get("content", "").rstrip().endswith("?")
+    return False
+
+
+def guess(text: str) -> Optional[Route]:
+    """Best local route (rules, then cached-embedding centroids) regardless of confidence."""
+    route = classify_rules(text)
+    if route is None and get_model() is not None:
+        vector = _cached_embedding(text)
+        if vector is not None:
+            route = get_model().predict(vector)
+    return route
+
+
+def classify(text: str, chat_history: Optional[List[dict]] = None,
+             pending: Optional[dict] = None) -> Optional[Route]:
+    """Confident local route for the input, or None to defer to the LLM supervisor."""
+    from agentzero.metrics import MetricsCollector
+    if pending or awaiting_answer(chat_history):
+        MetricsCollector().incr("fast_router.deferred_followups")
+        return None
+    route = guess(text)
+    if route is None or route.confidence < FAST_ROUTER_MIN_CONFIDENCE:
+        MetricsCollector().incr("fast_router.misses")
+        return None
+    MetricsCollector().incr("fast_router.hits")
+    MetricsCollector().incr(f"fast_router.hits.{route.method}")
+    return route
+
+
+def stats() -> dict:
+    from agentzero.metrics import MetricsCollector
+    counters = MetricsCollector().get_counters()
+    hits, misses = counters.get("fast_router.hits", 0), counters.get("fast_router.misses", 0)
+    return {
+        "enabled": FAST_ROUTER_ENABLED,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "model": get_model() is not None,
+    }
+
+
+# --- offline training / evaluation ---
+
+def load_decisions(path: Optional[str] = None) -> List[dict]:
+    """
+    Past LLM routing decisions ({user_input, intent}) from the node trace log. Only
+    exits tagged source="llm" count: routes taken by this router, the command parser
+    or slot filling (and error fallbacks) would grade the fast path against itself.
+    """
+    from agentzero.memory import LOG_PIPE_PATH
+    decisions = []
+    with open(path or LOG_PIPE_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("step") in ("supervisor:exit", "fused_planner:exit") and entry.get("source") == "llm" \
+                    and entry.get("user_input") and entry.get("intent") in DOMAINS:
+                decisions.append({"user_input": entry["user_input"], "intent": entry["intent"]})
+    return decisions
+
+
+async def train(decisions: List[dict]) -> CentroidModel:
+    """Fit centroids on the embeddings of past supervisor inputs (fills the embedding cache)."""
+    from agentzero.llm_service import _embedding_model, get_embeddings
+    texts = [d["user_input"] for d in decisions]
+    vectors = await get_embeddings(texts)
+    pairs = [(v, d["intent"]) for v, d in zip(vectors, decisions) if v]
+    return CentroidModel.fit([v for v, _ in pairs], [l for _, l in pairs], _embedding_model())
+
+
+def report(decisions: List[dict]) -> dict:
+    """Coverage and accuracy of the fast path against past LLM routing decisions."""
+    confusion: Dict[str, Counter] = defaultdict(Counter)
+    methods: Counter = Counter()
+    covered = correct = 0
+    for d in decisions:
+        route = guess(d["user_input"])
+        if route is None or route.confidence < FAST_ROUTER_MIN_CONFIDENCE:
+            continue
+        covered += 1
+        methods[route.method] += 1
+        correct += route.domain == d["intent"]
+        confusion[d["intent"]][route.domain] += 1
+    total = len(decisions)
+    return {
+        "decisions": total,
+        "coverage": round(covered / total, 3) if total else 0.0,
+        "accuracy_when_confident": round(correct / covered, 3) if covered else 0.0,
+        "by_method": dict(methods),
+        "confusion": {label: dict(preds) for label, preds in confusion.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the fast-path router.")
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("--log", default=None, help="node trace log (default: memory.LOG_PIPE_PATH)")
+    args = parser.parse_args()
+    decisions = load_decisions(args.log)
+    if args.command == "train":
+        model = asyncio.run(train(decisions))
+        model.save(FAST_ROUTER_MODEL_PATH)
+        print(f"Trained on {len(decisions)} decisions -> {FAST_ROUTER_MODEL_PATH} ({', '.join(model.domains)})")
+        print("Note: a report on the same log overstates centroid accuracy; hold out recent traffic.")
+    else:
+        print(json.dumps(report(decisions), indent=2))
+
+
+if __name__ == "__main__":
+    main()
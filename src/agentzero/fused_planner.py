@@ -0,0 +1,169 @@
+"""
+Fused routing + planning node (opt-in replacement for supervisor -> domain agent).
+One LLM call returns {"domain": ..., "plan": [...]} under a combined schema that
+covers every domain's tools, so a task or calendar request costs one round trip
+(and one copy of the history) before any action runs. The graph then goes
+straight to policy_enforcer and executor.
+
+A plan that doesn't fit the chosen domain (empty, or using another domain's
+tools) is dropped and the graph falls back to that domain's agent, which also
+still handles evaluator retries. Enable with FUSED_PLANNING_ENABLED=true;
+benchmarks/bench_fused.py compares latency and plan accuracy with the two-call path.
+"""
+import os
+import json
+import logging
+from datetime import datetime
+
+from dateutil import tz
+from dotenv import load_dotenv
+
+from agentzero.agent_state import AgentState
+from agentzero import command_parser, fast_router, slot_filling
+from agentzero.agents.calendar_agent import (
+    CALENDAR_ACTIONS, calendar_date_context, load_habits, normalize_calendar_plan,
+)
+from agentzero.agents.task_agent import TASK_ACTIONS, normalize_task_plan
+from agentzero.agents.knowledge_agent import KNOWLEDGE_ACTIONS
+from agentzero.llm_service import chat_completion
+from agentzero.llm_scheduler import Priority
+from agentzero.prompt_builder import HABITS, PromptBuilder
+from agentzero.llm_schemas import ASK_USER, action_name, parse_json_reply, routed_plan_schema
+
+logger = logging.getLogger("agentzero.fused_planner")
+
+load_dotenv()
+
+FUSED_PLANNING_ENABLED = os.getenv("FUSED_PLANNING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+DOMAIN_ACTIONS = {
+    "calendar": {action_name(a) for a in CALENDAR_ACTIONS},
+    "task": {action_name(a) for a in TASK_ACTIONS},
+    "knowledge": {action_name(a) for a in KNOWLEDGE_ACTIONS},
+    "chat": set(),
+}
+
+FUSED_PLANNER_SCHEMA = routed_plan_schema(
+    list(DOMAIN_ACTIONS), *CALENDAR_ACTIONS, *TASK_ACTIONS, *KNOWLEDGE_ACTIONS, ASK_USER,
+)
+
+FUSED_PLANNER_PROMPT = """You are the Router & Planner for a personal productivity assistant.
+In ONE reply, pick the domain of the user's latest input (using the conversation history) and write the JSON execution plan for it.
+
+Domains and their tools:
+- 'calendar': calendar events, daily/weekly planning, scheduling meetings, time management.
+  1. 'add_event': Requires 'name', 'date' (YYYY-MM-DD), 'time' (HH:MM).
+  2. 'list_events': Requires 'start' and 'end' (YYYY-MM-DD). For a single day, give BOTH start and end for that day.
+  3. 'plan_day': Requires 'date' (YYYY-MM-DD).
+  4. 'plan_week': Requires 'start_date' (YYYY-MM-DD).
+- 'task': todo lists, tasks, deadlines, habits.
+  1. 'add_task': Requires 'task' (name), optional 'deadline' (YYYY-MM-DD HH:MM).
+  2. 'list_tasks': No params.
+  3. 'edit_task': Requires 'old_name', optional 'new_name', optional 'new_deadline' (YYYY-MM-DD HH:MM).
+  4. 'complete_task': Requires 'task_name'.
+  5. 'add_habit': Requires 'name', optional 'time_of_day', 'days_of_week' (list of day names), 'description'.
+  6. 'list_habits': No params.
+  7. 'track_habit': Requires 'name', optional 'date' (YYYY-MM-DD, default today).
+- 'knowledge': remembering facts, querying notes, searching for information.
+  1. 'remember_fact': Requires 'fact' (a clear, concise statement).
+  2. 'query_note': Requires 'query'.
+  3. 'get_file': Requires 'path'.
+- 'chat': general conversation and greetings. The plan MUST be empty: {"domain": "chat", "plan": []}
+
+Only use tools of the domain you picked.
+If the latest input answers a clarifying question asked earlier (e.g. a time for an event, a name for a task), pick that same domain and finish the job.
+If a required parameter is missing, DO NOT guess: use {"type": "ask_user", "params": {"question": "..."}} instead.
+
+JSON FORMAT REQUIREMENT:
+You must respond with ONLY a valid JSON object, e.g.
+{"domain": "task", "plan": [{"type": "add_task", "params": {"task": "Buy milk"}}]}
+
+DO NOT wrap the JSON in markdown blocks (e.g. ```json). DO NOT output any conversational text. ONLY raw JSON.
+"""
+
+
+def _plan_fits(domain: str, plan) -> bool:
+    """A non-empty list of steps that only use the domain's tools (or ask_user)."""
+    if not isinstance(plan, list) or not plan:
+        return False
+    allowed = DOMAIN_ACTIONS[domain] | {"ask_user"}
+    return all(isinstance(step, dict) and step.get("type") in allowed for step in plan)
+
+
+def normalize_plan(domain: str, plan: list) -> list:
+    if domain == "calendar":
+        return normalize_calendar_plan(plan)
+    if domain == "task":
+        return normalize_task_plan(plan)
+    return plan
+
+
+async def fused_planner_node(state: AgentState) -> AgentState:
+    from agentzero.memory import log_node
+    from agentzero.metrics import MetricsCollector
+    log_node('fused_planner:entry', state)
+
+    if state.error:
+        state.step = "error_handler"
+        log_node("fused_planner:error", state)
+        return state
+
+    # An answer to our last question, or a simple command: the plan is ready
+    if state.pending and slot_filling.SLOT_FILLING_ENABLED and await slot_filling.resume(state):
+        state.step = "fused_planner"
+        state.routed_by = "slot_filling"
+        log_node('fused_planner:exit', state, source=state.routed_by)
+        return state
+    if command_parser.COMMAND_PARSER_ENABLED and command_parser.apply(state):
+        state.step = "fused_planner"
+        state.routed_by = "command_parser"
+        log_node('fused_planner:exit', state, source=state.routed_by)
+        return state
+
+    # An obvious domain still needs a plan: let that domain's agent write it
+    route = fast_router.classify(state.user_input, state.chat_history, state.pending) if fast_router.FAST_ROUTER_ENABLED else None
+    if route is not None:
+        state.intent = route.domain
+        state.step = "fused_planner"
+        state.routed_by = "fast_router"
+        log_node('fused_planner:exit', state, source=state.routed_by)
+        return state
+
+    prompt = PromptBuilder("fused_planner").system(FUSED_PLANNER_PROMPT)
+    if slot_filling.ask_user_note():
+        prompt.context(slot_filling.ask_user_note())
+    if "plan" in state.user_input.lower():
+        prompt.context(f"User Habits (for planning reference):\n{json.dumps(load_habits())}",
+                       priority=HABITS, truncatable=True)
+    prompt.history(state.chat_history, max_turns=6).context(calendar_date_context(datetime.now(tz.tzlocal())))
+    messages = prompt.user(state.user_input).build()
+
+    source = "llm"
+    try:
+        output = await chat_completion(
+            messages=messages, stream=False, timeout=30,
+            priority=Priority.ROUTING, node="fused_planner", json_early_stop=True,
+            schema=FUSED_PLANNER_SCHEMA,
+        )
+        data = parse_json_reply(output, "fused_planner")
+        domain = str(data.get("domain", "chat")).lower()
+        if domain not in DOMAIN_ACTIONS:
+            domain = "chat"
+        plan = data.get("plan")
+        state.intent = domain
+        if domain != "chat":
+            if _plan_fits(domain, plan):
+                state.plan = normalize_plan(domain, plan)
+                MetricsCollector().incr("fused_planner.plans")
+            else:
+                logger.info(f"Fused plan doesn't fit domain '{domain}'; falling back to the {domain} agent")
+                MetricsCollector().incr("fused_planner.fallbacks")
+    except Exception as e:
+        logger.error(f"Fused planner failed: {e}")
+        state.intent = "chat"  # Safe fallback, like the supervisor
+        source = "fallback"
+
+    state.step = "fused_planner"
+    state.routed_by = source
+    log_node('fused_planner:exit', state, source=state.routed_by)
+    return state
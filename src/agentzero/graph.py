@@ -1,14 +1,22 @@
 """
 LangGraph setup for AgentZero: defines the core graph, nodes, and transitions.
 Every node transition checks state.error and routes to error_handler if set.
+With FUSED_PLANNING_ENABLED the supervisor is replaced by fused_planner, whose
+plans go straight from policy_enforcer to the executor (as do the command
+parser's, in either mode). With
+SPECULATIVE_PLANNING_ENABLED the domain agents pick up plans started speculatively
+during supervisor routing.
 """
 
 from langgraph.graph import StateGraph, START, END
 from agentzero.agent_state import AgentState
 from agentzero.supervisor import supervisor_node
+from agentzero.fused_planner import FUSED_PLANNING_ENABLED, fused_planner_node
+from agentzero import speculation
 from agentzero.policy_enforcer import policy_enforcer
 from agentzero.context_builder import context_builder
 from agentzero.agents import calendar_agent_node, task_agent_node, knowledge_agent_node
+from agentzero.multi_agent import multi_agent_node
 from agentzero.executor import executor
 from agentzero.evaluator import evaluator
 from agentzero.memory_writer import memory_writer
@@ -34,16 +42,28 @@ def _error_or_context_route(state: AgentState):
     return "planner"
 
 
-def build_agentzero_graph():
+def _error_or_planned(state: AgentState):
+    """Route after policy_enforcer: executor if a plan is ready (fused planner, command parser), else context_builder."""
+    if state.error:
+        return "error_handler"
+    if state.plan and state.intent != "chat":
+        return "executor"
+    return "context_builder"
+
+
+def build_agentzero_graph(fused: bool = FUSED_PLANNING_ENABLED):
     graph = StateGraph(AgentState)
-    graph.add_node("supervisor", supervisor_node)
+    entry = "fused_planner" if fused else "supervisor"
+    graph.add_node(entry, fused_planner_node if fused else supervisor_node)
     graph.add_node("policy_enforcer", policy_enforcer)
     graph.add_node("context_builder", context_builder)
     
     # Sub-Agents
-    graph.add_node("calendar_agent", calendar_agent_node)
-    graph.add_node("task_agent", task_agent_node)
-    graph.add_node("knowledge_agent", knowledge_agent_node)
+    speculative = speculation.SPECULATIVE_PLANNING_ENABLED and not fused
+    for name, node in [("calendar_agent", calendar_agent_node), ("task_agent", task_agent_node),
+                       ("knowledge_agent", knowledge_agent_node)]:
+        graph.add_node(name, speculation.speculative_or(node) if speculative else node)
+    graph.add_node("multi_agent", multi_agent_node)
     
     graph.add_node("executor", executor)
     graph.add_node("evaluator", evaluator)
@@ -52,20 +72,23 @@ def build_agentzero_graph():
     graph.add_node("error_handler", error_handler)
 
     # Entry point
-    graph.add_edge(START, "supervisor")
+    graph.add_edge(START, entry)
 
-    graph.add_conditional_edges("supervisor", _error_or("policy_enforcer"), {
+    graph.add_conditional_edges(entry, _error_or("policy_enforcer"), {
         "policy_enforcer": "policy_enforcer",
         "error_handler": "error_handler",
     })
 
-    graph.add_conditional_edges("policy_enforcer", _error_or("context_builder"), {
+    # Ready-made plans skip context_builder (RAG is only used by chat) and the domain agents
+    graph.add_conditional_edges("policy_enforcer", _error_or_planned, {
+        "executor": "executor",
         "context_builder": "context_builder",
         "error_handler": "error_handler",
     })
 
     def route_to_agent(state: AgentState):
         if state.error: return "error_handler"
+        if state.domains: return "multi_agent" # Several domains: plan them concurrently
         domain = state.intent or "chat"
         if domain == "calendar": return "calendar_agent"
         if domain == "task": return "task_agent"
@@ -73,6 +96,7 @@ def build_agentzero_graph():
         return "executor" # If chat, skip agents directly to executor
 
     graph.add_conditional_edges("context_builder", route_to_agent, {
+        "multi_agent": "multi_agent",
         "calendar_agent": "calendar_agent",
         "task_agent": "task_agent",
         "knowledge_agent": "knowledge_agent",
@@ -81,7 +105,7 @@ def build_agentzero_graph():
     })
 
     # All sub-agents converge back to the executor
-    for agent_node in ["calendar_agent", "task_agent", "knowledge_agent"]:
+    for agent_node in ["calendar_agent", "task_agent", "knowledge_agent", "multi_agent"]:
         graph.add_conditional_edges(agent_node, _error_or("executor"), {
             "executor": "executor",
             "error_handler": "error_handler",
@@ -97,11 +121,14 @@ def build_agentzero_graph():
             return "error_handler"
         if state.step == "evaluator (retry loop)":
             # On retry, send back to the correct sub-agent!
+            if state.domains:
+                return "multi_agent"
             domain = state.intent or "chat"
             return f"{domain}_agent" if domain in ["calendar", "task", "knowledge"] else "executor"
         return "memory_writer"
 
     graph.add_conditional_edges("evaluator", route_evaluator, {
+        "multi_agent": "multi_agent",
         "calendar_agent": "calendar_agent",
         "task_agent": "task_agent",
         "knowledge_agent": "knowledge_agent",
@@ -0,0 +1,85 @@
+"""
+Incremental JSON object detection for streamed LLM output.
+JSONObjectScanner is fed tokens as they arrive and reports the first balanced
+top-level {...} that also parses, so callers can stop generation right there
+instead of waiting for (and paying for) trailing commentary.
+"""
+import json
+from typing import Any, Optional
+
+
+class JSONObjectScanner:
+    """Finds the first complete, parseable top-level JSON object in a token stream."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.text: Optional[str] = None  # the object's source text once complete
+        self.value: Any = None
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._opening = False
+
+    @property
+    def complete(self) -> bool:
+        return self.text is not None
+
+    def _restart_after(self, start: int):
+        # The candidate didn't parse (e.g. a stray "{" in prose): rescan after it
+        self._pos = start + 1
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._opening = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; True once a complete object has been found."""
+        if self.complete:
+            return True
+        self.buffer += chunk
+        while self._pos < len(self.buffer):
+            ch = self.buffer[self._pos]
+            self._pos += 1
+            if self._start < 0:
+                if ch == "{":
+                    self._start = self._pos - 1
+                    self._depth = 1
+                    self._opening = True
+                continue
+            if self._opening:
+                if ch.isspace():
+                    continue
+                self._opening = False
+                # An object opens with a key or closes at once; anything else is prose
+                if ch not in '"}':
+                    self._restart_after(self._start)
+                    continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = self.buffer[self._start:self._pos]
+                    try:
+                        value = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        self._restart_after(self._start)
+                        continue
+                    if isinstance(value, dict):
+                        self.text, self.value = candidate, value
+                        return True
+                    self._restart_after(self._start)
+        return False
@@ -0,0 +1,278 @@
+"""
+Multi-backend failover for AgentZero's LLM calls.
+Requests go to an ordered list of backends (LLM_BACKENDS, e.g. "ollama,cloudflare";
+defaults to LLM_PROVIDER alone). Each backend has a circuit breaker: after
+LLM_BREAKER_FAILURES consecutive errors it is skipped for LLM_BREAKER_RESET_SECONDS,
+then a single probe request decides whether it closes again.
+With LLM_HEDGE_ENABLED, a request that is still running once it passes the
+LLM_HEDGE_PERCENTILE of that backend's recent latencies (per node) is also sent to
+the next backend; whichever answers first wins and the other is cancelled.
+Counters are exported under "llm_backends.*".
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.llm_backends")
+
+load_dotenv()
+
+LLM_BACKENDS = [b.strip().lower() for b in os.getenv("LLM_BACKENDS", "").split(",") if b.strip()]
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "250"))
+
+T = TypeVar("T")
+
+
+class LLMUnavailableError(Exception):
+    """Every configured backend failed or is circuit-open."""
+
+
+class CircuitBreaker:
+    """closed -> open after repeated failures -> half_open (one probe) -> closed/open."""
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_timeout: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """Whether a request may be sent now (claims the probe slot when half-open)."""
+        now = time.monotonic() if now is None else now
+        if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+        return self.state != "open"
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self, now: Optional[float] = None):
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit opened after {self.failures} consecutive failure(s)")
+            self.state = "open"
+            self.opened_at = time.monotonic() if now is None else now
+
+    def release(self):
+        """An attempt was abandoned (e.g. lost a hedge race) without a verdict."""
+        self._probing = False
+
+
+class Backend:
+    """One provider plus its breaker and a latency window per calling node."""
+
+    def __init__(self, name: str, window: int = 200):
+        self.name = name
+        self.breaker = CircuitBreaker()
+        self._window = window
+        self._latencies: Dict[str, deque] = {}
+
+    def observe(self, node: Optional[str], latency_ms: float):
+        for key in {node or "_all", "_all"}:
+            self._latencies.setdefault(key, deque(maxlen=self._window)).append(latency_ms)
+
+    def latency_percentile(self, node: Optional[str], percentile: float,
+                           min_samples: int = LLM_HEDGE_MIN_SAMPLES) -> Optional[float]:
+        """Recent latency percentile for this node (falls back to all nodes), or None if too few samples."""
+        for key in (node or "_all", "_all"):
+            samples = self._latencies.get(key)
+            if samples and len(samples) >= min_samples:
+                ordered = sorted(samples)
+                idx = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+                return ordered[idx]
+        return None
+
+
+def backend_names() -> List[str]:
+    """Ordered backend list; LLM_PROVIDER alone when LLM_BACKENDS is unset."""
+    if LLM_BACKENDS:
+        return list(LLM_BACKENDS)
+    from agentzero import llm_service
+    return [llm_service.LLM_PROVIDER]
+
+
+class LLMBackendRouter:
+    """Runs a provider call against the ordered backends with breakers and optional hedging."""
+
+    def __init__(self, hedge_enabled: bool = LLM_HEDGE_ENABLED,
+                 hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+                 hedge_min_delay_ms: float = LLM_HEDGE_MIN_DELAY_MS):
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_ms = hedge_min_delay_ms
+        self._backends: Dict[str, Backend] = {}
+
+    def backend(self, name: str) -> Backend:
+        if name not in self._backends:
+            self._backends[name] = Backend(name)
+        return self._backends[name]
+
+    def _hedge_delay(self, backend: Backend, node: Optional[str]) -> Optional[float]:
+        """Seconds to wait on `backend` before also trying the next one (None = don't hedge)."""
+        if not self.hedge_enabled:
+            return None
+        p = backend.latency_percentile(node, self.hedge_percentile)
+        if p is None:
+            return None
+        return max(p, self.hedge_min_delay_ms) / 1000
+
+    async def _attempt(self, backend: Backend, call: Callable[[str], Awaitable[T]], node: Optional[str]) -> T:
+        from agentzero.metrics import MetricsCollector
+        start = time.perf_counter()
+        try:
+            result = await call(backend.name)
+        except asyncio.CancelledError:
+            backend.breaker.release()
+            raise
+        except Exception:
+            backend.breaker.record_failure()
+            MetricsCollector().incr(f"llm_backends.{backend.name}.failures")
+            raise
+        backend.observe(node, (time.perf_counter() - start) * 1000)
+        backend.breaker.record_success()
+        MetricsCollector().incr(f"llm_backends.{backend.name}.successes")
+        return result
+
+    async def call(self, call: Callable[[str], Awaitable[T]], node: Optional[str] = None) -> T:
+        """
+        Return the first successful `call(backend_name)`. Falls through to the next
+        backend on error or open circuit; raises LLMUnavailableError when none is left.
+        """
+        from agentzero.metrics import MetricsCollector
+        remaining = iter([self.backend(n) for n in backend_names()])
+        pending: Dict[asyncio.Future, Backend] = {}
+        errors: List[str] = []
+        hedged = False
+        hedge_task = None
+
+        def launch_next() -> Optional[asyncio.Future]:
+            for backend in remaining:
+                if backend.breaker.allow():
+                    task = asyncio.ensure_future(self._attempt(backend, call, node))
+                    pending[task] = backend
+                    return task
+                errors.append(f"{backend.name}: circuit open")
+                MetricsCollector().incr(f"llm_backends.{backend.name}.skipped")
+            return None
+
+        try:
+            launch_next()
+            while pending:
+                delay = None
+                if not hedged and len(pending) == 1:
+                    delay = self._hedge_delay(next(iter(pending.values())), node)
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    hedge_task = launch_next()
+                    if hedge_task is not None:
+                        MetricsCollector().incr("llm_backends.hedges")
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning(f"LLM backend '{backend.name}' failed: {e}")
+                        errors.append(f"{backend.name}: {e}")
+                        continue
+                    if task is hedge_task:
+                        MetricsCollector().incr("llm_backends.hedge_wins")
+                    return result
+                if not pending and launch_next() is not None:
+                    MetricsCollector().incr("llm_backends.failovers")
+        finally:
+            for task in pending:
+                task.cancel()
+        raise LLMUnavailableError("; ".join(errors) or "no LLM backends configured")
+
+    async def stream(self, open_stream: Callable[[str], AsyncIterator[str]],
+                     node: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streaming variant: fails over only until the first token arrives (a partly
+        delivered answer can't be retried elsewhere). No hedging.
+        """
+        from agentzero.metrics import MetricsCollector
+        errors: List[str] = []
+        for name in backend_names():
+            backend = self.backend(name)
+            if not backend.breaker.allow():
+                errors.append(f"{name}: circuit open")
+                MetricsCollector().incr(f"llm_backends.{name}.skipped")
+                continue
+            start = time.perf_counter()
+            started = False
+            try:
+                async for token in open_stream(name):
+                    if not started:
+                        started = True
+                        backend.observe(node, (time.perf_counter() - start) * 1000)
+                    yield token
+            except Exception as e:
+                backend.breaker.record_failure()
+                MetricsCollector().incr(f"llm_backends.{name}.failures")
+                if started:
+                    raise
+                logger.warning(f"LLM backend '{name}' failed before streaming: {e}")
+                errors.append(f"{name}: {e}")
+                continue
+            finally:
+                # Cancellation or a consumer that stops early leaves no verdict
+                backend.breaker.release()
+            backend.breaker.record_success()
+            MetricsCollector().incr(f"llm_backends.{name}.successes")
+            return
+        raise LLMUnavailableError("; ".join(errors) or "no LLM backends configured")
+
+    def stats(self) -> dict:
+        from agentzero.metrics import MetricsCollector
+        counters = MetricsCollector().get_counters()
+        result = {"order": backend_names(), "hedging": self.hedge_enabled, "backends": {}}
+        for name in backend_names():
+            backend = self.backend(name)
+            result["backends"][name] = {
+                "circuit": backend.breaker.state,
+                "consecutive_failures": backend.breaker.failures,
+                "successes": counters.get(f"llm_backends.{name}.successes", 0),
+                "failures": counters.get(f"llm_backends.{name}.failures", 0),
+                "skipped": counters.get(f"llm_backends.{name}.skipped", 0),
+                f"p{int(self.hedge_percentile)}_ms": backend.latency_percentile(None, self.hedge_percentile, 1),
+            }
+        result["hedges"] = counters.get("llm_backends.hedges", 0)
+        result["hedge_wins"] = counters.get("llm_backends.hedge_wins", 0)
+        result["failovers"] = counters.get("llm_backends.failovers", 0)
+        return result
+
+
+_router = LLMBackendRouter()
+
+
+def get_router() -> LLMBackendRouter:
+    return _router
+
+
+def set_router(router: LLMBackendRouter):
+    """Swap the global router (tests)."""
+    global _router
+    _router = router
@@ -0,0 +1,221 @@
+"""
+Load balancing across several Ollama servers.
+OLLAMA_API_URLS lists the servers (e.g. "http://box1:11434,http://box2:11434";
+defaults to the single OLLAMA_API_URL host). Every Ollama request leases one
+endpoint and is sent to the same path on that host:
+
+  least_outstanding (default) - fewest in-flight requests, ties broken by latency
+  ewma                        - lowest EWMA latency x (in-flight + 1)
+
+Each endpoint has a circuit breaker (passive: request failures; active: a
+/api/tags probe every LLM_BALANCER_PROBE_SECONDS) and open endpoints are skipped.
+With LLM_BALANCER_AFFINITY, calls for the same conversation stick to the endpoint
+that served it before, so Ollama can reuse that conversation's KV cache, unless it
+is down or has more than LLM_BALANCER_AFFINITY_SLACK requests above the least
+loaded one.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from agentzero.llm_backends import CircuitBreaker
+
+logger = logging.getLogger("agentzero.llm_balancer")
+
+load_dotenv()
+
+OLLAMA_API_URLS = [u.strip() for u in os.getenv("OLLAMA_API_URLS", "").split(",") if u.strip()]
+LLM_BALANCER_STRATEGY = os.getenv("LLM_BALANCER_STRATEGY", "least_outstanding").lower()
+LLM_BALANCER_AFFINITY = os.getenv("LLM_BALANCER_AFFINITY", "true").lower() in ("1", "true", "yes")
+LLM_BALANCER_AFFINITY_SLACK = int(os.getenv("LLM_BALANCER_AFFINITY_SLACK", "1"))
+LLM_BALANCER_EWMA_ALPHA = float(os.getenv("LLM_BALANCER_EWMA_ALPHA", "0.3"))
+LLM_BALANCER_PROBE_SECONDS = float(os.getenv("LLM_BALANCER_PROBE_SECONDS", "15"))
+
+_AFFINITY_MAX = 4096
+
+# Conversation the current task serves (set by the API per request)
+_affinity_key: ContextVar[Optional[str]] = ContextVar("agentzero_affinity_key", default=None)
+
+
+def set_affinity_key(key: Optional[str]):
+    """Tag LLM calls made from the current task with a conversation/session key."""
+    _affinity_key.set(key)
+
+
+def _host(url: str) -> str:
+    """scheme://host:port of a URL."""
+    parsed = httpx.URL(url)
+    return str(parsed.copy_with(path="/", query=None, fragment=None)).rstrip("/")
+
+
+class Endpoint:
+    """One Ollama server: in-flight count, EWMA latency and a circuit breaker."""
+
+    def __init__(self, url: str):
+        self.url = _host(url)
+        self.breaker = CircuitBreaker()
+        self.outstanding = 0
+        self.ewma_ms: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+
+    def rebase(self, url: str) -> str:
+        """The same request URL pointed at this server."""
+        target = httpx.URL(self.url)
+        return str(httpx.URL(url).copy_with(scheme=target.scheme, host=target.host, port=target.port))
+
+    def observe(self, ms: float, alpha: float):
+        self.ewma_ms = ms if self.ewma_ms is None else alpha * ms + (1 - alpha) * self.ewma_ms
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.breaker.state,
+            "outstanding": self.outstanding,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class OllamaBalancer:
+    """Picks an Ollama endpoint per request and tracks load, latency and health."""
+
+    def __init__(self, urls: List[str], strategy: str = LLM_BALANCER_STRATEGY,
+                 affinity: bool = LLM_BALANCER_AFFINITY, affinity_slack: int = LLM_BALANCER_AFFINITY_SLACK,
+                 ewma_alpha: float = LLM_BALANCER_EWMA_ALPHA, probe_interval: float = LLM_BALANCER_PROBE_SECONDS):
+        if strategy not in ("least_outstanding", "ewma"):
+            logger.error(f"Unknown LLM_BALANCER_STRATEGY '{strategy}'. Using least_outstanding.")
+            strategy = "least_outstanding"
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.strategy = strategy
+        self.affinity = affinity
+        self.affinity_slack = affinity_slack
+        self.ewma_alpha = ewma_alpha
+        self.probe_interval = probe_interval
+        self._sticky: "OrderedDict[str, Endpoint]" = OrderedDict()
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def _score(self, endpoint: Endpoint):
+        # Unmeasured endpoints look fast so they get traffic (and a measurement)
+        latency = endpoint.ewma_ms or 0.0
+        if self.strategy == "ewma":
+            return (latency * (endpoint.outstanding + 1), endpoint.requests)
+        return (endpoint.outstanding, latency, endpoint.requests)
+
+    def _candidates(self) -> List[Endpoint]:
+        healthy = [e for e in self.endpoints if e.breaker.state == "closed"]
+        if healthy:
+            return healthy
+        # Claim at most one half-open probe slot
+        probe = next((e for e in self.endpoints if e.breaker.allow()), None)
+        # Everything is down: still try one so the backend router sees the failure
+        return [probe] if probe else self.endpoints
+
+    def pick(self, affinity_key: Optional[str] = None) -> Endpoint:
+        from agentzero.metrics import MetricsCollector
+        if len(self.endpoints) == 1:
+            return self.endpoints[0]
+        candidates = self._candidates()
+        best = min(candidates, key=self._score)
+        if not (self.affinity and affinity_key):
+            return best
+        sticky = self._sticky.get(affinity_key)
+        if sticky in candidates and sticky.outstanding <= best.outstanding + self.affinity_slack:
+            self._sticky.move_to_end(affinity_key)
+            MetricsCollector().incr("llm_balancer.affinity_hits")
+            return sticky
+        if sticky is not None:
+            MetricsCollector().incr("llm_balancer.affinity_moves")
+        self._sticky[affinity_key] = best
+        self._sticky.move_to_end(affinity_key)
+        while len(self._sticky) > _AFFINITY_MAX:
+            self._sticky.popitem(last=False)
+        return best
+
+    @asynccontextmanager
+    async def lease(self, affinity_key: Optional[str] = None) -> AsyncIterator[Endpoint]:
+        """Hold an endpoint for one request (or one whole stream) and record the outcome."""
+        endpoint = self.pick(affinity_key or _affinity_key.get())
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        start = time.perf_counter()
+        try:
+            yield endpoint
+        except Exception:
+            endpoint.failures += 1
+            endpoint.breaker.record_failure()
+            raise
+        except BaseException:
+            endpoint.breaker.release()  # cancelled / closed early: no verdict
+            raise
+        else:
+            endpoint.breaker.record_success()
+            endpoint.observe((time.perf_counter() - start) * 1000, self.ewma_alpha)
+        finally:
+            endpoint.outstanding -= 1
+
+    async def probe(self):
+        """Health-check every endpoint once."""
+        from agentzero.llm_pool import get_pool
+        client = get_pool().client("ollama")
+
+        async def check(endpoint: Endpoint):
+            try:
+                response = await client.get(f"{endpoint.url}/api/tags", timeout=3)
+                response.raise_for_status()
+                if endpoint.breaker.state != "closed":
+                    logger.info(f"Ollama endpoint {endpoint.url} is healthy again")
+                endpoint.breaker.record_success()
+            except Exception as e:
+                logger.warning(f"Health probe failed for {endpoint.url}: {e}")
+                endpoint.breaker.record_failure()
+
+        await asyncio.gather(*(check(e) for e in self.endpoints))
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe()
+
+    def start(self):
+        """Start background health probes (only useful with more than one endpoint)."""
+        if len(self.endpoints) > 1 and self.probe_interval > 0 and self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    def stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "affinity": self.affinity,
+            "endpoints": [e.stats() for e in self.endpoints],
+        }
+
+
+_balancer: Optional[OllamaBalancer] = None
+
+
+def get_balancer() -> OllamaBalancer:
+    global _balancer
+    if _balancer is None:
+        from agentzero import llm_service
+        _balancer = OllamaBalancer(OLLAMA_API_URLS or [llm_service.OLLAMA_BASE_URL])
+    return _balancer
+
+
+def set_balancer(balancer: Optional[OllamaBalancer]):
+    """Swap the global balancer (tests); None rebuilds it from the environment."""
+    global _balancer
+    _balancer = balancer
@@ -0,0 +1,231 @@
+"""
+Exact-match LLM response cache for AgentZero.
+In-process LRU backed by a SQLite table, so repeated routing/planning prompts
+are answered in milliseconds and survive restarts. Entries carry a per-call-site
+TTL; cached text is encrypted at rest like session history.
+Caching is opt-in per call site (stateless classifiers such as the supervisor):
+replies that depend on live calendar/task data must not be served stale.
+aget()/aset() keep the SQLite I/O off the event loop.
+Hit/miss counters are exported to MetricsCollector under "llm_cache.*".
+"""
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.llm_cache")
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "600"))  # seconds, for call sites that opt in (routing)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))  # in-memory LRU
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "10000"))
+
+
+def make_cache_key(provider: str, model: str, messages: Any, options: Optional[dict] = None) -> str:
+    """Stable SHA-256 over everything that determines the model's output."""
+    blob = json.dumps(
+        {"provider": provider, "model": model, "messages": messages, "options": options or {}},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-level (memory LRU -> SQLite) cache of completion text keyed by request hash."""
+
+    def __init__(self, db_path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_disk_entries: int = LLM_CACHE_MAX_DISK_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (response, expires_at)
+        self._lru_lock = threading.Lock()
+        self._lock = threading.Lock()  # guards the SQLite connection
+        self._conn = None
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_cache(last_accessed)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to initialize LLM cache at {self.db_path}: {e}. Using memory only.")
+            self._conn = None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response, or None on miss/expiry."""
+        now = time.time()
+        response = self._memory_get(key, now)
+        if response is None:
+            response = self._disk_lookup(key, now)
+        return self._count(response)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() for the event loop: memory hits inline, SQLite lookups in a worker thread."""
+        now = time.time()
+        response = self._memory_get(key, now)
+        if response is None:
+            response = await asyncio.to_thread(self._disk_lookup, key, now)
+        return self._count(response)
+
+    def set(self, key: str, response: str, ttl: int):
+        """Store a response for `ttl` seconds (ttl <= 0 is a no-op)."""
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._lru_put(key, response, expires_at)
+        self._disk_set(key, response, expires_at)
+
+    async def aset(self, key: str, response: str, ttl: int):
+        """set() for the event loop: the SQLite write runs in a worker thread."""
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._lru_put(key, response, expires_at)
+        await asyncio.to_thread(self._disk_set, key, response, expires_at)
+
+    def clear(self):
+        with self._lru_lock:
+            self._lru.clear()
+        with self._lock:
+            if self._conn:
+                try:
+                    self._conn.execute("DELETE FROM llm_cache")
+                    self._conn.commit()
+                except Exception as e:
+                    logger.error(f"Error clearing LLM cache: {e}")
+
+    @staticmethod
+    def _count(response: Optional[str]) -> Optional[str]:
+        from agentzero.metrics import MetricsCollector
+        MetricsCollector().incr("llm_cache.hits" if response is not None else "llm_cache.misses")
+        return response
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        with self._lru_lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            if entry[1] > now:
+                self._lru.move_to_end(key)
+                return entry[0]
+            del self._lru[key]
+            return None
+
+    def _lru_put(self, key: str, response: str, expires_at: float):
+        with self._lru_lock:
+            self._lru[key] = (response, expires_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _disk_lookup(self, key: str, now: float) -> Optional[str]:
+        """SQLite lookup; a hit is promoted into the memory LRU."""
+        from agentzero.metrics import MetricsCollector
+        with self._lock:
+            entry = self._disk_get(key, now)
+        if entry is None:
+            return None
+        self._lru_put(key, entry[0], entry[1])
+        MetricsCollector().incr("llm_cache.disk_hits")
+        return entry[0]
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        if not self._conn:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            from agentzero.encryption import decrypt_data
+            return decrypt_data(row[0]), row[1]
+        except Exception as e:
+            logger.error(f"LLM cache read error: {e}")
+            return None
+
+    def _disk_set(self, key: str, response: str, expires_at: float):
+        with self._lock:
+            self._disk_write(key, response, expires_at)
+
+    def _disk_write(self, key: str, response: str, expires_at: float):
+        if not self._conn:
+            return
+        try:
+            from agentzero.encryption import encrypt_data
+            now = time.time()
+            self._conn.execute(
+                """
+                INSERT INTO llm_cache (key, response, expires_at, last_accessed)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    response = excluded.response,
+                    expires_at = excluded.expires_at,
+                    last_accessed = excluded.last_accessed
+                """,
+                (key, encrypt_data(response), expires_at, now)
+            )
+            # Drop expired rows, then evict least-recently-used beyond the disk cap
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_disk_entries,)
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"LLM cache write error: {e}")
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_cache() -> LLMResponseCache:
+    """Process-wide cache, opened lazily on first use."""
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
+
+
+def set_cache(cache: Optional[LLMResponseCache]):
+    """Swap the global cache (tests)."""
+    global _cache
+    _cache = cache
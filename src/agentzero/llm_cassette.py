@@ -0,0 +1,226 @@
+"""
+Record/replay cassettes for LLM HTTP traffic.
+With LLM_CASSETTE_MODE=record every request the pooled LLM clients send (chat,
+generate, streaming, embeddings; Ollama and Cloudflare alike) is appended with its
+response and timings to LLM_CASSETTE_PATH, one JSON line per call:
+
+  {"t": ..., "node": ..., "method": ..., "url": ..., "key": ..., "request": {...},
+   "status": 200, "content_type": ..., "ttfb_ms": ..., "chunks": [[offset_ms, text], ...]}
+
+With LLM_CASSETTE_MODE=replay the same calls are answered from the file without
+touching a model. Calls match on method + URL + body; when the body differs (prompts
+embed the current time) the next unplayed call recorded for the same node and
+endpoint is used instead. LLM_CASSETTE_LATENCY scales the recorded time-to-first-byte
+and chunk timings (0 = instant, 1 = as recorded).
+
+Disable LLM_CACHE_ENABLED while recording so cache hits don't hide calls.
+The synchronous embedding path (get_embeddings_sync) bypasses the pool and is not recorded.
+"""
+import os
+import json
+import time
+import codecs
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.llm_cassette")
+
+load_dotenv()
+
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "").lower()  # "", "record" or "replay"
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "data/llm_cassette.jsonl")
+LLM_CASSETTE_LATENCY = float(os.getenv("LLM_CASSETTE_LATENCY", "0"))
+
+
+class CassetteMissError(Exception):
+    """Replay mode got a request the cassette has no recording for."""
+
+
+def _request_key(request: httpx.Request) -> str:
+    body = request.content or b""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    digest = hashlib.sha256(f"{request.method} {request.url}\n".encode("utf-8") + body)
+    return digest.hexdigest()[:32]
+
+
+def _request_body(request: httpx.Request):
+    try:
+        return json.loads(request.content or b"null")
+    except ValueError:
+        return (request.content or b"").decode("utf-8", "replace")
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes a live response body through while capturing its chunks and offsets."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, entry: dict, transport: "CassetteTransport", start: float):
+        self._stream = stream
+        self._entry = entry
+        self._transport = transport
+        self._start = start
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._written = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._entry["chunks"].append([round((time.perf_counter() - self._start) * 1000, 1), text])
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+        if not self._written:
+            # Early-stopped streams are recorded with the chunks actually received
+            self._written = True
+            self._transport.write(self._entry)
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: List[list], ttfb_ms: float, scale: float):
+        self._chunks = chunks
+        self._ttfb_ms = ttfb_ms
+        self._scale = scale
+
+    async def __aiter__(self):
+        start = time.perf_counter()
+        for offset_ms, text in self._chunks:
+            if self._scale > 0:
+                due = (offset_ms - self._ttfb_ms) * self._scale / 1000
+                delay = due - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield text.encode("utf-8")
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records to, or replays from, a JSONL cassette."""
+
+    def __init__(self, mode: str, path: str, inner: Optional[httpx.AsyncBaseTransport] = None,
+                 latency_scale: float = LLM_CASSETTE_LATENCY):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected 'record' or 'replay')")
+        self.mode = mode
+        self.path = path
+        self.inner = inner
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, deque] = defaultdict(deque)
+        self._by_node: Dict[tuple, deque] = defaultdict(deque)
+        self._last: Dict[str, dict] = {}
+        if mode == "replay":
+            self._load()
+        elif inner is None:
+            raise ValueError("Recording needs an inner transport to forward requests to")
+
+    def _load(self):
+        count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                entry["_played"] = False
+                self._by_key[entry["key"]].append(entry)
+                self._by_node[(entry.get("node"), entry["method"], entry["url"])].append(entry)
+                count += 1
+        logger.info(f"Loaded {count} recorded LLM calls from {self.path}")
+
+    def write(self, entry: dict):
+        """Append one recorded call (thread-safe)."""
+        from agentzero.metrics import MetricsCollector
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        MetricsCollector().incr("llm_cassette.recorded")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.mode == "record":
+            return await self._record(request)
+        return await self._replay(request)
+
+    async def _record(self, request: httpx.Request) -> httpx.Response:
+        # Keep recorded chunks as plain text (no gzip)
+        request.headers["Accept-Encoding"] = "identity"
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        entry = {
+            "t": round(time.time(), 3),
+            "node": request.headers.get("x-agentzero-node"),
+            "method": request.method,
+            "url": str(request.url),
+            "key": _request_key(request),
+            "request": _request_body(request),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", ""),
+            "ttfb_ms": round((time.perf_counter() - start) * 1000, 1),
+            "chunks": [],
+        }
+        return httpx.Response(
+            response.status_code, headers=response.headers,
+            stream=_RecordingStream(response.stream, entry, self, start),
+            extensions=response.extensions,
+        )
+
+    def _match(self, request: httpx.Request) -> Optional[dict]:
+        from agentzero.metrics import MetricsCollector
+        key = _request_key(request)
+        queue = self._by_key.get(key)
+        while queue and queue[0]["_played"]:
+            queue.popleft()
+        if queue:
+            return queue.popleft()
+        node = (request.headers.get("x-agentzero-node"), request.method, str(request.url))
+        fallback = self._by_node.get(node)
+        while fallback and fallback[0]["_played"]:
+            fallback.popleft()
+        if fallback:
+            MetricsCollector().incr("llm_cassette.fallback_matches")
+            return fallback.popleft()
+        # Replay beyond the recording repeats the last answer for an identical request
+        return self._last.get(key)
+
+    async def _replay(self, request: httpx.Request) -> httpx.Response:
+        from agentzero.metrics import MetricsCollector
+        entry = self._match(request)
+        if entry is None:
+            MetricsCollector().incr("llm_cassette.misses")
+            raise CassetteMissError(f"No recorded call for {request.method} {request.url} "
+                                    f"(node={request.headers.get('x-agentzero-node')})")
+        entry["_played"] = True
+        self._last[_request_key(request)] = entry
+        MetricsCollector().incr("llm_cassette.replayed")
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry.get("ttfb_ms", 0) * self.latency_scale / 1000)
+        headers = {"content-type": entry["content_type"]} if entry.get("content_type") else {}
+        return httpx.Response(entry["status"], headers=headers,
+                              stream=_ReplayStream(entry["chunks"], entry.get("ttfb_ms", 0), self.latency_scale))
+
+    async def aclose(self):
+        # Shared by every pooled client: closing one provider's client must not close it for the others
+        pass
+
+
+def install_cassette(pool, mode: str = LLM_CASSETTE_MODE, path: str = LLM_CASSETTE_PATH):
+    """Route a client pool through a cassette when a mode is configured (idempotent)."""
+    if not mode or isinstance(pool.transport, CassetteTransport):
+        return
+    inner = None
+    if mode == "record":
+        inner = pool.transport or httpx.AsyncHTTPTransport(http2=pool.http2, limits=pool.limits)
+    pool.transport = CassetteTransport(mode, path, inner)
+    logger.info(f"LLM cassette {mode} mode: {path}")
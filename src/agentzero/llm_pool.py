@@ -0,0 +1,143 @@
+"""
+Shared, pooled async HTTP clients for AgentZero's LLM and embedding calls.
+One keep-alive httpx.AsyncClient per provider, created at app startup and
+closed at shutdown, so the 3-4 LLM round-trips of a /chat request reuse the
+same TCP/TLS connection instead of re-handshaking every time.
+Connection reuse is counted in MetricsCollector under "llm_pool.*".
+"""
+import os
+import logging
+from typing import Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.llm_pool")
+
+load_dotenv()
+
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+LLM_POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "120"))
+LLM_POOL_HTTP2 = os.getenv("LLM_POOL_HTTP2", "false").lower() in ("1", "true", "yes")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class LLMClientPool:
+    """Provider-aware registry of long-lived httpx.AsyncClient instances."""
+
+    def __init__(self, max_connections: int = LLM_POOL_MAX_CONNECTIONS,
+                 max_keepalive: int = LLM_POOL_MAX_KEEPALIVE,
+                 keepalive_expiry: float = LLM_POOL_KEEPALIVE_EXPIRY,
+                 http2: bool = LLM_POOL_HTTP2,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not _http2_available():
+            logger.warning("LLM_POOL_HTTP2 is set but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+            http2 = False
+        self.http2 = http2
+        self.transport = transport  # injectable for tests / stand-in servers
+        self._base_urls: Dict[str, str] = {}
+        self._headers: Dict[str, dict] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def register(self, provider: str, base_url: str = "", headers: Optional[dict] = None):
+        """Declare a provider's base URL and default headers (idempotent)."""
+        self._base_urls[provider] = base_url or ""
+        self._headers[provider] = headers or {}
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        """Return the shared client for a provider, creating it lazily if startup was skipped."""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._build_client(provider)
+            self._clients[provider] = client
+        return client
+
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        async def trace(event_name: str, info: dict):
+            _record_trace_event(provider, event_name)
+
+        async def attach_trace(request: httpx.Request):
+            request.extensions["trace"] = trace
+
+        kwargs = dict(
+            base_url=self._base_urls.get(provider, ""),
+            headers=self._headers.get(provider, {}),
+            limits=self.limits,
+            event_hooks={"request": [attach_trace]},
+        )
+        if self.transport is not None:
+            kwargs["transport"] = self.transport
+        else:
+            kwargs["http2"] = self.http2
+        logger.info(f"Opening pooled HTTP client for provider '{provider}' "
+                    f"(max_connections={self.limits.max_connections}, http2={self.http2})")
+        return httpx.AsyncClient(**kwargs)
+
+    async def start(self):
+        """Eagerly create a client for every registered provider."""
+        for provider in self._base_urls:
+            self.client(provider)
+
+    async def aclose(self):
+        """Close all pooled clients (called at app shutdown)."""
+        for provider, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client for '{provider}': {e}")
+        self._clients.clear()
+
+    def stats(self) -> dict:
+        """Connection reuse stats per provider, derived from the metrics counters."""
+        from agentzero.metrics import MetricsCollector
+        counters = MetricsCollector().get_counters()
+        result = {}
+        for provider in set(self._base_urls) | set(self._clients):
+            requests = counters.get(f"llm_pool.{provider}.requests", 0)
+            opened = counters.get(f"llm_pool.{provider}.connections_opened", 0)
+            result[provider] = {
+                "requests": requests,
+                "connections_opened": opened,
+                "connections_reused": max(0, requests - opened),
+                "tls_handshakes": counters.get(f"llm_pool.{provider}.tls_handshakes", 0),
+                "open": provider in self._clients and not self._clients[provider].is_closed,
+            }
+        return result
+
+
+def _record_trace_event(provider: str, event_name: str):
+    """Translate httpcore trace events into reuse counters."""
+    from agentzero.metrics import MetricsCollector
+    if event_name == "connection.connect_tcp.complete":
+        MetricsCollector().incr(f"llm_pool.{provider}.connections_opened")
+    elif event_name == "connection.start_tls.complete":
+        MetricsCollector().incr(f"llm_pool.{provider}.tls_handshakes")
+    elif event_name in ("http11.send_request_headers.started", "http2.send_request_headers.started"):
+        MetricsCollector().incr(f"llm_pool.{provider}.requests")
+
+
+# Process-wide pool used by llm_service
+_pool = LLMClientPool()
+
+
+def get_pool() -> LLMClientPool:
+    return _pool
+
+
+def set_pool(pool: LLMClientPool):
+    """Swap the global pool (tests, benchmarks against a stand-in server)."""
+    global _pool
+    _pool = pool
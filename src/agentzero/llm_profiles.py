@@ -0,0 +1,120 @@
+"""
+Per-node LLM profiles for AgentZero.
+Each calling node (supervisor, agents, executor chat, response_composer,
+plan_day/plan_week) gets its own model name, output cap (num_predict),
+context size (num_ctx), temperature and stop sequences, so routing can run on a
+small fast model with a ~32-token cap while chat keeps the large one.
+
+Override any field with LLM_PROFILE_<NODE>_<FIELD>, e.g.
+LLM_PROFILE_SUPERVISOR_MODEL=qwen2.5:1.5b, LLM_PROFILE_EXECUTOR_TEMPERATURE=0.8,
+LLM_PROFILE_PLAN_DAY_STOP="###|END". CLOUDFLARE_MODEL selects the Workers AI
+model for the node when Cloudflare serves the request, OPENAI_MODEL the model name
+sent to an OpenAI-compatible server.
+
+num_ctx is unset by default: Ollama reloads a model whenever num_ctx changes,
+so only set it per node when that node also has its own model.
+"""
+import os
+import logging
+from dataclasses import asdict, dataclass, field, replace
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.llm_profiles")
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class LLMProfile:
+    model: Optional[str] = None  # Ollama model (None = OLLAMA_MODEL)
+    cloudflare_model: Optional[str] = None  # None = CLOUDFLARE_TEXT_MODEL
+    openai_model: Optional[str] = None  # None = OPENAI_MODEL
+    num_predict: Optional[int] = None
+    num_ctx: Optional[int] = None
+    temperature: Optional[float] = None
+    stop: List[str] = field(default_factory=list)
+
+    def ollama_options(self) -> dict:
+        """Ollama `options` for this profile (unset fields are omitted)."""
+        options = {k: v for k, v in (("num_predict", self.num_predict), ("num_ctx", self.num_ctx),
+                                     ("temperature", self.temperature)) if v is not None}
+        if self.stop:
+            options["stop"] = list(self.stop)
+        return options
+
+    def cloudflare_params(self) -> dict:
+        """Workers AI sampling parameters for this profile."""
+        params = {}
+        if self.num_predict is not None:
+            params["max_tokens"] = self.num_predict
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        return params
+
+    def openai_params(self) -> dict:
+        """Sampling parameters for an OpenAI-compatible /v1/chat/completions request."""
+        params = self.cloudflare_params()
+        if self.stop:
+            params["stop"] = list(self.stop)
+        return params
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_DEFAULT_PROFILES: Dict[str, LLMProfile] = {
+    # Routing emits ~10 tokens of JSON
+    "supervisor": LLMProfile(num_predict=32, temperature=0.0),
+    "calendar_agent": LLMProfile(num_predict=256, temperature=0.0),
+    "task_agent": LLMProfile(num_predict=256, temperature=0.0),
+    "knowledge_agent": LLMProfile(num_predict=256, temperature=0.0),
+    # Domain + plan in one reply
+    "fused_planner": LLMProfile(num_predict=288, temperature=0.0),
+    # A few slot values extracted from a follow-up answer
+    "slot_filler": LLMProfile(num_predict=64, temperature=0.0),
+    "executor": LLMProfile(num_predict=512, temperature=0.7),
+    "response_composer": LLMProfile(num_predict=384, temperature=0.3),
+    "plan_day": LLMProfile(num_predict=1024, temperature=0.4),
+    "plan_week": LLMProfile(num_predict=1536, temperature=0.4),
+}
+
+
+def _env(node: str, name: str) -> Optional[str]:
+    value = os.getenv(f"LLM_PROFILE_{node.upper()}_{name}")
+    return value if value not in (None, "") else None
+
+
+def _from_env(node: str, base: LLMProfile) -> LLMProfile:
+    overrides = {}
+    try:
+        if _env(node, "MODEL"):
+            overrides["model"] = _env(node, "MODEL")
+        if _env(node, "CLOUDFLARE_MODEL"):
+            overrides["cloudflare_model"] = _env(node, "CLOUDFLARE_MODEL")
+        if _env(node, "OPENAI_MODEL"):
+            overrides["openai_model"] = _env(node, "OPENAI_MODEL")
+        if _env(node, "NUM_PREDICT"):
+            overrides["num_predict"] = int(_env(node, "NUM_PREDICT"))
+        if _env(node, "NUM_CTX"):
+            overrides["num_ctx"] = int(_env(node, "NUM_CTX"))
+        if _env(node, "TEMPERATURE"):
+            overrides["temperature"] = float(_env(node, "TEMPERATURE"))
+        if _env(node, "STOP"):
+            overrides["stop"] = [s for s in _env(node, "STOP").split("|") if s]
+    except ValueError as e:
+        logger.error(f"Invalid LLM profile override for '{node}': {e}. Using defaults.")
+        return base
+    return replace(base, **overrides)
+
+
+def get_profile(node: Optional[str]) -> LLMProfile:
+    """Profile for a calling node (an empty profile for unknown/None nodes)."""
+    if not node:
+        return LLMProfile()
+    return _from_env(node, _DEFAULT_PROFILES.get(node, LLMProfile()))
+
+
+def all_profiles() -> Dict[str, LLMProfile]:
+    return {node: get_profile(node) for node in _DEFAULT_PROFILES}
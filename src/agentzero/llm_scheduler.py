@@ -0,0 +1,124 @@
+"""
+Priority-aware admission scheduler for LLM calls.
+A local model server only serves a few parallel requests well, so all calls
+share a bounded global concurrency limit. Waiters are admitted strictly by
+priority class (routing before interactive generation before background work),
+FIFO within a class. Queue wait and depth are recorded per node in MetricsCollector.
+Work started inside priority_floor(...) (e.g. speculative planning) is never admitted
+ahead of that class, whatever priority its call sites declare.
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.llm_scheduler")
+
+load_dotenv()
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+
+class Priority(IntEnum):
+    """Admission class declared by each LLM caller. Lower value = admitted first."""
+    ROUTING = 0      # supervisor routing and domain planners (short, on the critical path)
+    GENERATION = 1   # interactive text generation (chat, response composer, plan_day/plan_week)
+    BACKGROUND = 2   # scheduler jobs, precompute, speculative work
+
+
+# Lowest priority class the current task may claim (see priority_floor)
+_priority_floor: ContextVar[int] = ContextVar("agentzero_priority_floor", default=Priority.ROUTING)
+
+
+@contextmanager
+def priority_floor(priority: Priority):
+    """Demote every LLM call made in this block (and tasks it starts) to at most `priority`."""
+    token = _priority_floor.set(priority)
+    try:
+        yield
+    finally:
+        _priority_floor.reset(token)
+
+
+class LLMAdmissionScheduler:
+    """Bounded-concurrency gate with per-priority queues."""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._active = 0
+        self._waiters: List[tuple] = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def queue_depth(self, priority: Optional[Priority] = None) -> int:
+        return sum(1 for p, _, f in self._waiters
+                   if not f.done() and (priority is None or p == priority))
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queued": {p.name.lower(): self.queue_depth(p) for p in Priority},
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.GENERATION, node: Optional[str] = None):
+        """Hold one model slot for the duration of the block."""
+        from agentzero.metrics import MetricsCollector
+        collector = MetricsCollector()
+        node = node or "unknown"
+        start = time.perf_counter()
+
+        collector.observe("llm_queue_depth", node, self.queue_depth())
+        await self._acquire(Priority(max(priority, _priority_floor.get())))
+        collector.observe("llm_queue_wait_ms", node, (time.perf_counter() - start) * 1000)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority):
+        if self._active < self.max_concurrency and not self.queue_depth():
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed to us just as we were cancelled: pass it on
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)  # hand the slot over directly; _active unchanged
+                return
+        self._active -= 1
+
+
+_scheduler = LLMAdmissionScheduler()
+
+
+def get_scheduler() -> LLMAdmissionScheduler:
+    return _scheduler
+
+
+def set_scheduler(scheduler: LLMAdmissionScheduler):
+    """Swap the global scheduler (tests, benchmarks)."""
+    global _scheduler
+    _scheduler = scheduler
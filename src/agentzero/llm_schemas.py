@@ -0,0 +1,113 @@
+"""
+JSON-schema helpers for structured LLM output.
+Nodes declare the exact shape of their reply (the supervisor's routing object,
+each agent's plan with per-action parameter shapes) and pass it to
+chat_completion(schema=...). Ollama turns the schema into a decoding grammar via
+`format`; Cloudflare gets it as a json_schema response_format.
+Parse outcomes are counted under "llm.structured.*" so the drop in malformed
+replies (and the evaluator retries they used to cause) is visible in metrics.
+"""
+import re
+import json
+import inspect
+from typing import Callable, Dict, Optional
+
+DATE = {"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2}$"}
+TIME = {"type": "string", "pattern": r"^\d{2}:\d{2}$"}
+DATETIME = {"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$"}
+TEXT = {"type": "string", "minLength": 1}
+TEXT_LIST = {"type": "array", "items": TEXT}
+
+
+def action(name: str, required: Optional[Dict[str, dict]] = None,
+           optional: Optional[Dict[str, dict]] = None) -> dict:
+    """Schema of one plan step: {"type": name, "params": {...}}."""
+    properties = {**(required or {}), **(optional or {})}
+    params = {"type": "object", "properties": properties, "additionalProperties": False}
+    if required:
+        params["required"] = list(required)
+    return {
+        "type": "object",
+        "properties": {"type": {"const": name}, "params": params},
+        "required": ["type", "params"],
+    }
+
+
+def signature_action(name: str, run: Callable, **types: dict) -> dict:
+    """
+    action() schema derived from the function the executor calls with the params:
+    parameters without a default are required, the rest optional. Types default to
+    TEXT; **kwargs catch-alls are not offered to the model.
+    """
+    required, optional = {}, {}
+    for param in inspect.signature(run).parameters.values():
+        if param.kind in (param.VAR_KEYWORD, param.VAR_POSITIONAL):
+            continue
+        target = required if param.default is param.empty else optional
+        target[param.name] = types.get(param.name, TEXT)
+    return action(name, required, optional)
+
+
+# The optional fields describe the action the answer is for (see slot_filling)
+ASK_USER = action("ask_user", {"question": TEXT}, {
+    "action": TEXT,
+    "known": {"type": "object"},
+    "missing": {"type": "array", "items": {"type": "string"}},
+})
+
+
+def plan_schema(*actions: dict) -> dict:
+    """{"plan": [step, ...]} where each step matches one of the given actions."""
+    return {
+        "type": "object",
+        "properties": {"plan": {"type": "array", "items": {"anyOf": list(actions)}}},
+        "required": ["plan"],
+    }
+
+
+def routed_plan_schema(domains, *actions: dict) -> dict:
+    """{"domain": one of domains, "plan": [step, ...]} - routing and planning in one reply."""
+    schema = plan_schema(*actions)
+    schema["properties"] = {**enum_object("domain", domains)["properties"], **schema["properties"]}
+    schema["required"] = ["domain", "plan"]
+    return schema
+
+
+def action_name(step_schema: dict) -> str:
+    """The tool name a step schema built by action() accepts."""
+    return step_schema["properties"]["type"]["const"]
+
+
+def enum_object(key: str, values) -> dict:
+    """{"<key>": one of values} (e.g. the supervisor's routing reply)."""
+    return {
+        "type": "object",
+        "properties": {key: {"type": "string", "enum": list(values)}},
+        "required": [key],
+    }
+
+
+def record_parse(node: str, ok: bool):
+    """Count a structured-output parse result for a node."""
+    from agentzero.metrics import MetricsCollector
+    outcome = "parsed" if ok else "parse_failures"
+    MetricsCollector().incr(f"llm.structured.{outcome}")
+    MetricsCollector().incr(f"llm.structured.{node}.{outcome}")
+
+
+def parse_json_reply(output: str, node: str) -> dict:
+    """
+    Extract the JSON object from a model reply ({} when there is none) and count the
+    outcome. Raises json.JSONDecodeError on a malformed object, like json.loads.
+    """
+    match = re.search(r'\{.*\}', output or "", re.DOTALL)
+    if not match:
+        record_parse(node, False)
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        record_parse(node, False)
+        raise
+    record_parse(node, True)
+    return data
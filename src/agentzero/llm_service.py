@@ -1,12 +1,29 @@
 """
 LLM Service for AgentZero — async httpx client.
-Supports Ollama (local) and Cloudflare Workers AI.
+Supports Ollama (local), Cloudflare Workers AI and OpenAI-compatible servers
+(LLM_PROVIDER=openai: llama.cpp server, vLLM and other /v1/chat/completions servers
+with continuous batching).
+All calls go through the shared per-provider client pool in llm_pool.
+Text generation fails over across the ordered backends in llm_backends.
 """
 import asyncio
+import json
 import os
 import logging
+import time
+from typing import AsyncIterator, List, Optional, Sequence
 import httpx
 from dotenv import load_dotenv
+from agentzero.llm_pool import get_pool
+from agentzero.llm_cache import LLM_CACHE_ENABLED, get_cache, make_cache_key
+from agentzero.llm_singleflight import SingleFlight
+from agentzero.llm_scheduler import Priority, get_scheduler
+from agentzero.llm_cassette import install_cassette
+from agentzero.llm_balancer import get_balancer
+from agentzero.llm_backends import LLMUnavailableError, backend_names, get_router
+from agentzero.llm_profiles import get_profile
+from agentzero.embedding_cache import get_embedding_cache
+from agentzero.json_stream import JSONObjectScanner
 
 logger = logging.getLogger("agentzero.llm")
 
@@ -19,40 +36,216 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b-instruct-q4_K_M")
 OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
 OLLAMA_CHAT_URL = OLLAMA_API_URL.replace("/api/generate", "/api/chat")
 OLLAMA_EMBEDDINGS_API_URL = os.getenv("OLLAMA_EMBEDDINGS_API_URL", "http://localhost:11434/api/embeddings")
+OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", OLLAMA_MODEL)
+# How long Ollama keeps a model resident after a request (sent with every call)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Stop JSON-producing calls as soon as a complete object has streamed in
+LLM_JSON_EARLY_STOP = os.getenv("LLM_JSON_EARLY_STOP", "true").lower() in ("1", "true", "yes")
 
 # Cloudflare Config
 CLOUDFLARE_ACCOUNT_ID = os.getenv("CLOUDFLARE_ACCOUNT_ID")
 CLOUDFLARE_API_TOKEN = os.getenv("CLOUDFLARE_API_TOKEN")
 CLOUDFLARE_TEXT_MODEL = os.getenv("CLOUDFLARE_TEXT_MODEL", "@cf/meta/llama-3.1-8b-instruct")
 CLOUDFLARE_EMBEDDING_MODEL = os.getenv("CLOUDFLARE_EMBEDDING_MODEL", "@cf/baai/bge-base-en-v1.5")
+CLOUDFLARE_BASE_URL = f"https://api.cloudflare.com/client/v4/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/"
 
+# OpenAI-compatible server config (llama.cpp server, vLLM, ... exposing /v1/chat/completions)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://localhost:8000/v1").rstrip("/")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "default")
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", OPENAI_MODEL)
 
-def _cloudflare_headers():
+
+# Identical concurrent requests share one in-flight call
+_chat_flight = SingleFlight("chat")
+_generate_flight = SingleFlight("generate")
+_embedding_flight = SingleFlight("embedding")
+
+
+def _base_url(url: str) -> str:
+    """scheme://host:port of a full endpoint URL."""
+    parsed = httpx.URL(url)
+    return str(parsed.copy_with(path="/", query=None, fragment=None)).rstrip("/")
+
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", _base_url(OLLAMA_API_URL))
+# Batch endpoint (accepts a list of inputs); the legacy /api/embeddings takes one prompt
+OLLAMA_EMBED_BATCH_URL = os.getenv("OLLAMA_EMBED_BATCH_URL", f"{OLLAMA_BASE_URL}/api/embed")
+
+# Batched embeddings
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_MAX_PARALLEL_BATCHES = int(os.getenv("EMBEDDING_MAX_PARALLEL_BATCHES", "2"))
+
+
+def register_providers(pool=None):
+    """Register per-provider base URLs with the client pool."""
+    pool = pool or get_pool()
+    pool.register("ollama", OLLAMA_BASE_URL)
+    pool.register("cloudflare", CLOUDFLARE_BASE_URL)
+    pool.register("openai", OPENAI_BASE_URL)
+    install_cassette(pool)
+
+
+register_providers()
+
+
+async def startup():
+    """Open pooled clients and start endpoint health probes (called from the API startup hook)."""
+    register_providers()
+    await get_pool().start()
+    get_balancer().start()
+
+
+async def shutdown():
+    """Close pooled clients (called from the API shutdown hook)."""
+    get_balancer().stop()
+    await get_pool().aclose()
+
+
+_last_request_at = 0.0
+
+
+def last_request_at() -> float:
+    """Wall-clock time of the most recent model request (drives keep-alive refreshes)."""
+    return _last_request_at
+
+
+def _mark_traffic():
+    global _last_request_at
+    _last_request_at = time.time()
+
+
+def _prompt_tokens(payload: dict) -> int:
+    """Estimated prompt size of a request (Ollama only reports the tokens it evaluated)."""
+    from agentzero.prompt_builder import count_message_tokens, count_tokens
+    model = payload.get("model")
+    if "messages" in payload:
+        return count_message_tokens(payload["messages"], model)
+    return count_tokens(payload.get("prompt", ""), model)
+
+
+def _note_ollama_stats(data: dict, model: str, node: Optional[str] = None, prompt_tokens: int = 0):
+    """
+    Record a model load event when Ollama reports it had to (re)load the model,
+    and how much of the prompt was evaluated vs. served from the KV cache.
+    """
+    load_ms = (data.get("load_duration") or 0) / 1e6
+    from agentzero.llm_warmup import LLM_COLD_LOAD_THRESHOLD_MS, record_load_event
+    if load_ms > LLM_COLD_LOAD_THRESHOLD_MS:
+        record_load_event(model, load_ms=load_ms, reason="request")
+    evaluated = data.get("prompt_eval_count")
+    if evaluated is not None and prompt_tokens:
+        from agentzero.metrics import MetricsCollector
+        cached = max(0, prompt_tokens - evaluated)
+        MetricsCollector().observe("prompt_eval_tokens", node, evaluated)
+        MetricsCollector().observe("prompt_cached_tokens", node, cached)
+        MetricsCollector().incr("llm.prompt_eval_tokens", evaluated)
+        MetricsCollector().incr("llm.prompt_cached_tokens", cached)
+
+
+def _ns_to_ms(value) -> Optional[float]:
+    return value / 1e6 if value else None
+
+
+def _record_llm_call(node: Optional[str], backend: str, model: str, started: float,
+                     stats: Optional[dict] = None, ttft_ms: Optional[float] = None,
+                     streamed: bool = False, chunks: int = 0):
+    """
+    Record one model call in MetricsCollector: wall time, TTFT (streams only), token
+    counts and Ollama's load/prefill/decode durations. `stats` is Ollama's final
+    response object (or token usage mapped onto its field names); overhead_ms is the
+    wall time not spent inside the model server (queueing in the HTTP pool, network,
+    JSON decoding).
+    """
+    from agentzero.metrics import MetricsCollector
+    stats = stats or {}
+    wall_ms = (time.perf_counter() - started) * 1000
+    server_ms = _ns_to_ms(stats.get("total_duration"))
+    MetricsCollector().record_llm_call({
+        "node": node,
+        "backend": backend,
+        "model": model,
+        "streamed": streamed,
+        "wall_ms": wall_ms,
+        "ttft_ms": ttft_ms,
+        "prompt_tokens": stats.get("prompt_eval_count"),
+        "output_tokens": stats.get("eval_count", chunks or None),
+        "load_ms": _ns_to_ms(stats.get("load_duration")),
+        "prefill_ms": _ns_to_ms(stats.get("prompt_eval_duration")),
+        "decode_ms": _ns_to_ms(stats.get("eval_duration")),
+        "overhead_ms": max(0.0, wall_ms - server_ms) if server_ms else None,
+    })
+
+
+def _cloudflare_usage(data: dict) -> dict:
+    """Workers AI token usage, under Ollama's field names."""
+    usage = (data.get("result") or {}).get("usage") or {}
+    return {k: usage[src] for k, src in (("prompt_eval_count", "prompt_tokens"),
+                                          ("eval_count", "completion_tokens")) if src in usage}
+
+
+async def _ollama_post(url: str, payload: dict, timeout: int, node: Optional[str] = None) -> dict:
+    """
+    POST to the least-loaded Ollama endpoint with keep_alive set; returns the decoded
+    JSON body. Raises on failure.
+    """
+    payload.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+    _mark_traffic()
+    async with get_balancer().lease() as endpoint:
+        response = await get_pool().client("ollama").post(endpoint.rebase(url), json=payload, timeout=timeout,
+                                                           headers=_node_headers(node))
+        response.raise_for_status()
+    data = response.json()
+    _note_ollama_stats(data, payload.get("model", ""), node, _prompt_tokens(payload))
+    return data
+
+
+def _node_headers(node: Optional[str] = None) -> dict:
+    """Tags the request with its calling node (used by llm_standin to pick scripted replies)."""
+    return {"X-AgentZero-Node": node} if node else {}
+
+
+def _cloudflare_headers(node: Optional[str] = None):
     return {
         "Authorization": f"Bearer {CLOUDFLARE_API_TOKEN}",
-        "Content-Type": "application/json"
+        "Content-Type": "application/json",
+        **_node_headers(node),
     }
 
 
 def _cloudflare_url(model: str) -> str:
-    return f"https://api.cloudflare.com/client/v4/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/{model}"
+    return f"{CLOUDFLARE_BASE_URL}{model}"
+
+
+def _cloudflare_text(data: dict) -> str:
+    """Reply text of a Workers AI response (JSON mode may return an already-parsed object)."""
+    response = data["result"]["response"]
+    if isinstance(response, (dict, list)):
+        return json.dumps(response)
+    return response.strip()
 
 
-async def _cloudflare_request(url: str, payload: dict, timeout: int, max_retries: int = 2) -> dict:
+def _cloudflare_retries() -> int:
+    """Retry Cloudflare in place only when there is no other backend to fail over to."""
+    return 2 if len(backend_names()) == 1 else 0
+
+
+async def _cloudflare_request(url: str, payload: dict, timeout: int, max_retries: int = 2,
+                              node: Optional[str] = None) -> dict:
     """Async Cloudflare API request with retry + exponential backoff."""
     last_error = None
     for attempt in range(max_retries + 1):
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, headers=_cloudflare_headers(), json=payload, timeout=timeout
-                )
-                response.raise_for_status()
-                data = response.json()
-                if data.get("success"):
-                    return data
-                else:
-                    raise Exception(f"Cloudflare error: {data.get('errors')}")
+            client = get_pool().client("cloudflare")
+            response = await client.post(
+                url, headers=_cloudflare_headers(node), json=payload, timeout=timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("success"):
+                return data
+            else:
+                raise Exception(f"Cloudflare error: {data.get('errors')}")
         except Exception as e:
             last_error = e
             if attempt < max_retries:
@@ -64,94 +257,656 @@ async def _cloudflare_request(url: str, payload: dict, timeout: int, max_retries
     raise last_error
 
 
-async def generate_completion(prompt: str, stream: bool = False, options: dict = None, timeout: int = 30) -> str:
-    """Async raw text completion (used by router, planner)."""
-    if LLM_PROVIDER == "cloudflare":
+def _openai_headers(node: Optional[str] = None) -> dict:
+    headers = {"Content-Type": "application/json", **_node_headers(node)}
+    if OPENAI_API_KEY:
+        headers["Authorization"] = f"Bearer {OPENAI_API_KEY}"
+    return headers
+
+
+def _openai_usage(data: dict) -> dict:
+    """OpenAI token usage, under Ollama's field names."""
+    usage = data.get("usage") or {}
+    return {k: usage[src] for k, src in (("prompt_eval_count", "prompt_tokens"),
+                                          ("eval_count", "completion_tokens")) if usage.get(src) is not None}
+
+
+async def _openai_chat(messages: list, timeout: int, node: Optional[str] = None,
+                       schema: Optional[dict] = None) -> str:
+    """Non-streaming /chat/completions round-trip to an OpenAI-compatible server. Raises on failure."""
+    payload = {
+        "model": _openai_model(node),
+        "messages": messages,
+        "stream": False,
+        **get_profile(node).openai_params(),
+    }
+    _apply_schema("openai", payload, schema)
+    _mark_traffic()
+    started = time.perf_counter()
+    response = await get_pool().client("openai").post(
+        f"{OPENAI_BASE_URL}/chat/completions", headers=_openai_headers(node), json=payload, timeout=timeout
+    )
+    response.raise_for_status()
+    data = response.json()
+    _record_llm_call(node, "openai", payload["model"], started, _openai_usage(data))
+    return (data["choices"][0]["message"].get("content") or "").strip()
+
+
+async def generate_completion(prompt: str, stream: bool = False, options: dict = None, timeout: int = 30,
+                              priority: Priority = Priority.GENERATION, node: Optional[str] = None) -> str:
+    """Async raw text completion (used by router, planner). Raises LLMUnavailableError if every backend fails."""
+    async def fetch() -> str:
+        async with get_scheduler().slot(priority, node):
+            return await get_router().call(
+                lambda backend: _generate_request(backend, prompt, stream, options, timeout, node), node
+            )
+
+    key = make_cache_key(LLM_PROVIDER, _text_model(node), prompt,
+                         {"options": options, "stream": stream, "profile": get_profile(node).to_dict()})
+    return await _generate_flight.do(key, fetch)
+
+
+async def _generate_request(backend: str, prompt: str, stream: bool, options: Optional[dict], timeout: int,
+                            node: Optional[str] = None) -> str:
+    profile = get_profile(node)
+    if backend == "openai":
+        return await _openai_chat([{"role": "user", "content": prompt}], timeout, node)
+    if backend == "cloudflare":
         payload = {
             "messages": [{"role": "user", "content": prompt}],
-            "stream": stream
+            "stream": stream,
+            **profile.cloudflare_params(),
         }
-        url = _cloudflare_url(CLOUDFLARE_TEXT_MODEL)
-        data = await _cloudflare_request(url, payload, timeout)
-        return data["result"]["response"].strip()
+        url = _cloudflare_url(_cloudflare_model(node))
+        started = time.perf_counter()
+        data = await _cloudflare_request(url, payload, timeout, _cloudflare_retries(), node)
+        _record_llm_call(node, backend, _cloudflare_model(node), started, _cloudflare_usage(data))
+        return _cloudflare_text(data)
     else:
         # Default: Ollama
         payload = {
-            "model": OLLAMA_MODEL,
+            "model": _ollama_model(node),
             "prompt": prompt,
             "stream": stream
         }
-        if options:
-            payload["options"] = options
+        # Explicit per-call options win over the node profile
+        merged = {**profile.ollama_options(), **(options or {})}
+        if merged:
+            payload["options"] = merged
 
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(OLLAMA_API_URL, json=payload, timeout=timeout)
-                response.raise_for_status()
-                return response.json().get("response", "").strip()
+            data = await _ollama_post(OLLAMA_API_URL, payload, timeout, node)
         except Exception as e:
             logger.error(f"Ollama generate error: {e}")
             raise
+        _record_llm_call(node, backend, payload["model"], started, data)
+        return data.get("response", "").strip()
 
 
-async def chat_completion(messages: list, stream: bool = False, timeout: int = 30) -> str:
-    """Async chat-based completion with history (used by executor, response composer)."""
-    if LLM_PROVIDER == "cloudflare":
+def _ollama_model(node: Optional[str] = None) -> str:
+    return get_profile(node).model or OLLAMA_MODEL
+
+
+def _cloudflare_model(node: Optional[str] = None) -> str:
+    return get_profile(node).cloudflare_model or CLOUDFLARE_TEXT_MODEL
+
+
+def _openai_model(node: Optional[str] = None) -> str:
+    return get_profile(node).openai_model or OPENAI_MODEL
+
+
+def _model_for(backend: str, node: Optional[str] = None) -> str:
+    if backend == "cloudflare":
+        return _cloudflare_model(node)
+    if backend == "openai":
+        return _openai_model(node)
+    return _ollama_model(node)
+
+
+def _text_model(node: Optional[str] = None) -> str:
+    """Model the primary provider uses for a node (per-node profile, else the global default)."""
+    return _model_for(LLM_PROVIDER, node)
+
+
+def _apply_schema(backend: str, payload: dict, schema: Optional[dict]):
+    """Constrain the reply to a JSON schema (Ollama `format`, Cloudflare json_schema mode)."""
+    if not schema:
+        return
+    if backend == "cloudflare":
+        payload["response_format"] = {"type": "json_schema", "json_schema": schema}
+    elif backend == "openai":
+        payload["response_format"] = {"type": "json_schema",
+                                      "json_schema": {"name": "reply", "schema": schema, "strict": True}}
+    else:
+        payload["format"] = schema
+
+
+async def _chat_request(backend: str, messages: list, stream: bool, timeout: int,
+                        node: Optional[str] = None, schema: Optional[dict] = None) -> str:
+    """Single round-trip to one backend for a chat completion. Raises on failure."""
+    profile = get_profile(node)
+    if backend == "openai":
+        return await _openai_chat(messages, timeout, node, schema)
+    if backend == "cloudflare":
         payload = {
             "messages": messages,
-            "stream": stream
+            "stream": stream,
+            **profile.cloudflare_params(),
         }
-        url = _cloudflare_url(CLOUDFLARE_TEXT_MODEL)
-        data = await _cloudflare_request(url, payload, timeout)
-        return data["result"]["response"].strip()
+        _apply_schema(backend, payload, schema)
+        url = _cloudflare_url(_cloudflare_model(node))
+        started = time.perf_counter()
+        data = await _cloudflare_request(url, payload, timeout, _cloudflare_retries(), node)
+        _record_llm_call(node, backend, _cloudflare_model(node), started, _cloudflare_usage(data))
+        return _cloudflare_text(data)
     else:
         # Default: Ollama
         payload = {
-            "model": OLLAMA_MODEL,
+            "model": _ollama_model(node),
             "messages": messages,
             "stream": stream
         }
+        if profile.ollama_options():
+            payload["options"] = profile.ollama_options()
+        _apply_schema(backend, payload, schema)
+        started = time.perf_counter()
+        data = await _ollama_post(OLLAMA_CHAT_URL, payload, timeout, node)
+        _record_llm_call(node, backend, payload["model"], started, data)
+        return data.get("message", {}).get("content", "[No response]").strip()
+
+
+async def _chat_json_request(backend: str, messages: list, timeout: int, node: Optional[str] = None,
+                             schema: Optional[dict] = None) -> str:
+    """
+    Stream a chat completion and hang up as soon as a complete JSON object has
+    arrived (closing the stream makes the server stop generating). Returns the
+    object's text, or the whole output if no object ever completed.
+    """
+    scanner = JSONObjectScanner()
+    start = time.perf_counter()
+    received = 0
+    tokens = _chat_stream_request(backend, messages, timeout, node, schema)
+    try:
+        async for token in tokens:
+            received += 1
+            if scanner.feed(token):
+                break
+    finally:
+        await tokens.aclose()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not scanner.complete:
+        return scanner.buffer.strip()
+    _note_json_early_stop(node, received, elapsed_ms)
+    return scanner.text
+
+
+def _note_json_early_stop(node: Optional[str], received: int, elapsed_ms: float):
+    """
+    Report an early stop. Saved work is estimated against the node's output cap
+    (num_predict) at the per-token rate observed for this call.
+    """
+    from agentzero.metrics import MetricsCollector
+    cap = get_profile(node).num_predict or 0
+    saved_tokens = max(0, cap - received)
+    saved_ms = saved_tokens * (elapsed_ms / received) if received else 0.0
+    MetricsCollector().incr("llm.json_early_stops")
+    MetricsCollector().incr("llm.json_early_stop_saved_tokens", saved_tokens)
+    MetricsCollector().observe("json_stop_tokens", node, received)
+    MetricsCollector().observe("json_stop_latency_ms", node, elapsed_ms)
+    MetricsCollector().observe("json_stop_saved_tokens", node, saved_tokens)
+    MetricsCollector().observe("json_stop_saved_ms", node, saved_ms)
+    logger.debug(f"[{node}] JSON complete after {received} chunks ({elapsed_ms:.0f}ms); "
+                 f"~{saved_tokens} tokens / ~{saved_ms:.0f}ms saved")
+
+
+async def chat_completion(messages: list, stream: bool = False, timeout: int = 30,
+                          cache_ttl: int = 0,
+                          priority: Priority = Priority.GENERATION, node: Optional[str] = None,
+                          json_early_stop: bool = False, schema: Optional[dict] = None) -> str:
+    """
+    Async chat-based completion with history (used by executor, response composer).
+    Identical requests are served from the response cache for `cache_ttl` seconds.
+    Caching is opt-in (default 0): only stateless classifiers such as routing should
+    set it, since planner replies depend on live calendar/task data.
+    Concurrent identical requests are coalesced into a single model call, which
+    then waits for a model slot in the admission scheduler according to `priority`.
+    `node` names the caller for per-node queue metrics and selects its LLM profile
+    (model, num_predict, num_ctx, temperature, stop).
+    Backends are tried in LLM_BACKENDS order; raises LLMUnavailableError if all fail.
+    With `json_early_stop`, the reply is streamed and cut off once a complete JSON
+    object has arrived; the object's text is returned.
+    `schema` constrains the reply to a JSON schema where the provider supports it.
+    """
+    ttl = cache_ttl
+    early_stop = json_early_stop and LLM_JSON_EARLY_STOP
+    request_key = make_cache_key(LLM_PROVIDER, _text_model(node), messages,
+                                 {**get_profile(node).to_dict(), "json_early_stop": early_stop, "schema": schema})
+    use_cache = LLM_CACHE_ENABLED and ttl > 0
+    if use_cache:
+        cached = await get_cache().aget(request_key)
+        if cached is not None:
+            return cached
+
+    async def fetch() -> str:
+        async with get_scheduler().slot(priority, node):
+            if early_stop:
+                result = await get_router().call(
+                    lambda backend: _chat_json_request(backend, messages, timeout, node, schema), node
+                )
+            else:
+                result = await get_router().call(
+                    lambda backend: _chat_request(backend, messages, stream, timeout, node, schema), node
+                )
+        if use_cache:
+            await get_cache().aset(request_key, result, ttl)
+        return result
+
+    try:
+        return await _chat_flight.do(request_key, fetch)
+    except LLMUnavailableError as e:
+        logger.error(f"Chat completion failed on every backend: {e}")
+        raise
+
+
+async def _iter_ollama_stream(response: httpx.Response, model: str = "", node: Optional[str] = None,
+                              prompt_tokens: int = 0, final: Optional[dict] = None) -> AsyncIterator[str]:
+    """
+    Yield content chunks from an Ollama NDJSON stream (one JSON object per line).
+    The closing "done" object (token counts, durations) is copied into `final`.
+    """
+    async for line in response.aiter_lines():
+        if not line.strip():
+            continue
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(OLLAMA_CHAT_URL, json=payload, timeout=timeout)
+            chunk = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed Ollama stream line: {line[:80]}")
+            continue
+        if chunk.get("error"):
+            raise Exception(f"Ollama stream error: {chunk['error']}")
+        content = chunk.get("message", {}).get("content") or chunk.get("response")
+        if content:
+            yield content
+        if chunk.get("done"):
+            _note_ollama_stats(chunk, model, node, prompt_tokens)
+            if final is not None:
+                final.update(chunk)
+            break
+
+
+async def _iter_cloudflare_stream(response: httpx.Response, final: Optional[dict] = None) -> AsyncIterator[str]:
+    """
+    Yield content chunks from a Cloudflare Workers AI SSE stream ("data: {...}" events).
+    Token usage, when the last event reports it, is copied into `final`.
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if final is not None and chunk.get("usage"):
+            final.update(_cloudflare_usage({"result": chunk}))
+        content = chunk.get("response")
+        if content:
+            yield content
+
+
+async def _iter_openai_stream(response: httpx.Response, final: Optional[dict] = None) -> AsyncIterator[str]:
+    """
+    Yield content deltas from an OpenAI-style SSE stream ("data: {choices: [{delta}]}").
+    Token usage from the final event (stream_options.include_usage) is copied into `final`.
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if final is not None and chunk.get("usage"):
+            final.update(_openai_usage(chunk))
+        for choice in chunk.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+async def chat_completion_stream(messages: list, timeout: int = 120,
+                                 priority: Priority = Priority.GENERATION,
+                                 node: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Async generator variant of chat_completion: yields tokens as the model produces them.
+    Fails over to the next backend only if the stream breaks before its first token.
+    """
+    async with get_scheduler().slot(priority, node):
+        async for token in get_router().stream(
+            lambda backend: _chat_stream_request(backend, messages, timeout, node), node
+        ):
+            yield token
+
+
+async def _chat_stream_request(backend: str, messages: list, timeout: int,
+                               node: Optional[str] = None, schema: Optional[dict] = None) -> AsyncIterator[str]:
+    """
+    Stream one chat completion from one backend. The call is recorded when the
+    stream ends, including streams closed early by the caller (JSON early stop).
+    """
+    started = time.perf_counter()
+    final: dict = {}
+    ttft_ms = None
+    chunks = 0
+    model = _model_for(backend, node)
+    tokens = _chat_stream_tokens(backend, messages, timeout, node, schema, final)
+    try:
+        async for token in tokens:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+            chunks += 1
+            yield token
+    finally:
+        # Close the HTTP stream now (not at GC) so an early stop really stops generation
+        await tokens.aclose()
+        if chunks:
+            _record_llm_call(node, backend, model, started, final, ttft_ms, streamed=True, chunks=chunks)
+
+
+async def _chat_stream_tokens(backend: str, messages: list, timeout: int, node: Optional[str],
+                              schema: Optional[dict], final: dict) -> AsyncIterator[str]:
+    profile = get_profile(node)
+    if backend == "openai":
+        payload = {
+            "model": _openai_model(node),
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            **profile.openai_params(),
+        }
+        _apply_schema(backend, payload, schema)
+        _mark_traffic()
+        async with get_pool().client("openai").stream(
+            "POST", f"{OPENAI_BASE_URL}/chat/completions",
+            headers=_openai_headers(node), json=payload, timeout=timeout
+        ) as response:
+            response.raise_for_status()
+            async for token in _iter_openai_stream(response, final):
+                yield token
+    elif backend == "cloudflare":
+        payload = {
+            "messages": messages,
+            "stream": True,
+            **profile.cloudflare_params(),
+        }
+        _apply_schema(backend, payload, schema)
+        _mark_traffic()
+        client = get_pool().client("cloudflare")
+        async with client.stream(
+            "POST", _cloudflare_url(_cloudflare_model(node)),
+            headers=_cloudflare_headers(node), json=payload, timeout=timeout
+        ) as response:
+            response.raise_for_status()
+            async for token in _iter_cloudflare_stream(response, final):
+                yield token
+    else:
+        # Default: Ollama
+        payload = {
+            "model": _ollama_model(node),
+            "messages": messages,
+            "stream": True,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+        }
+        if profile.ollama_options():
+            payload["options"] = profile.ollama_options()
+        _apply_schema(backend, payload, schema)
+        _mark_traffic()
+        client = get_pool().client("ollama")
+        async with get_balancer().lease() as endpoint:
+            async with client.stream("POST", endpoint.rebase(OLLAMA_CHAT_URL), json=payload, timeout=timeout,
+                                     headers=_node_headers(node)) as response:
                 response.raise_for_status()
-                return response.json().get("message", {}).get("content", "[No response]").strip()
-        except Exception as e:
-            logger.error(f"Ollama chat error: {e}")
-            return f"[Chat error: {str(e)}]"
+                async for token in _iter_ollama_stream(response, payload["model"], node,
+                                                       _prompt_tokens(payload), final):
+                    yield token
 
 
-async def get_embedding(text: str) -> list:
-    """Async text embedding (used by context_builder)."""
+# Embeddings stay on LLM_PROVIDER (no failover): vectors from different models aren't comparable.
+def _embedding_model() -> str:
+    """Cache namespace for vectors: provider plus embedding model name."""
+    if LLM_PROVIDER == "cloudflare":
+        return f"cloudflare:{CLOUDFLARE_EMBEDDING_MODEL}"
+    if LLM_PROVIDER == "openai":
+        return f"openai:{OPENAI_EMBEDDING_MODEL}"
+    return f"ollama:{OLLAMA_EMBEDDING_MODEL}"
+
+
+async def get_embedding(text: str, priority: Priority = Priority.GENERATION) -> list:
+    """
+    Async text embedding (used by context_builder).
+    Served from the persistent embedding cache when possible; concurrent
+    identical texts share one call.
+    """
+    cache = get_embedding_cache()
+    model = _embedding_model()
+    if cache is not None:
+        cached = cache.get(model, text)
+        if cached is not None:
+            return cached
+
+    key = make_cache_key(LLM_PROVIDER, "embedding", text)
+
+    async def fetch() -> Optional[list]:
+        async with get_scheduler().slot(priority, "embedding"):
+            vector = await _embedding_request(text)
+        if vector and cache is not None:
+            cache.put(model, text, vector)
+        return vector
+
+    return await _embedding_flight.do(key, fetch)
+
+
+async def _embedding_request(text: str) -> Optional[list]:
+    if LLM_PROVIDER == "openai":
+        try:
+            return (await _embed_batch([text], timeout=10))[0]
+        except Exception as e:
+            logger.error(f"OpenAI-compatible embedding error: {e}")
+            return None
     if LLM_PROVIDER == "cloudflare":
         payload = {"text": [text]}
         url = _cloudflare_url(CLOUDFLARE_EMBEDDING_MODEL)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, headers=_cloudflare_headers(), json=payload, timeout=10
-                )
-                response.raise_for_status()
-                data = response.json()
-                if data.get("success"):
-                    return data["result"]["data"][0]
-                else:
-                    logger.error(f"Cloudflare embedding error: {data.get('errors')}")
-                    return None
+            client = get_pool().client("cloudflare")
+            response = await client.post(
+                url, headers=_cloudflare_headers(), json=payload, timeout=10
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("success"):
+                return data["result"]["data"][0]
+            else:
+                logger.error(f"Cloudflare embedding error: {data.get('errors')}")
+                return None
         except Exception as e:
             logger.error(f"Cloudflare embedding error: {e}")
             return None
     else:
         # Default: Ollama
         payload = {
-            "model": OLLAMA_MODEL,
+            "model": OLLAMA_EMBEDDING_MODEL,
             "prompt": text
         }
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(OLLAMA_EMBEDDINGS_API_URL, json=payload, timeout=10)
-                response.raise_for_status()
-                return response.json().get("embedding")
+            data = await _ollama_post(OLLAMA_EMBEDDINGS_API_URL, payload, timeout=10)
+            return data.get("embedding")
         except Exception as e:
             logger.error(f"Ollama embedding error: {e}")
             return None
+
+
+def _embed_batch_spec(texts: Sequence[str]):
+    """(provider, url, payload, headers) for one batched embedding request."""
+    if LLM_PROVIDER == "cloudflare":
+        return ("cloudflare", _cloudflare_url(CLOUDFLARE_EMBEDDING_MODEL),
+                {"text": list(texts)}, _cloudflare_headers())
+    if LLM_PROVIDER == "openai":
+        return ("openai", f"{OPENAI_BASE_URL}/embeddings",
+                {"model": OPENAI_EMBEDDING_MODEL, "input": list(texts)}, _openai_headers())
+    return ("ollama", OLLAMA_EMBED_BATCH_URL,
+            {"model": OLLAMA_EMBEDDING_MODEL, "input": list(texts), "keep_alive": OLLAMA_KEEP_ALIVE}, {})
+
+
+def _parse_embed_batch(data: dict, expected: int) -> List[list]:
+    """Extract the ordered vector list from a batch response. Raises on a short or failed reply."""
+    if LLM_PROVIDER == "cloudflare":
+        if not data.get("success"):
+            raise Exception(f"Cloudflare embedding error: {data.get('errors')}")
+        vectors = data["result"]["data"]
+    elif LLM_PROVIDER == "openai":
+        vectors = [item["embedding"] for item in sorted(data.get("data") or [], key=lambda d: d.get("index", 0))]
+    else:
+        vectors = data.get("embeddings") or []
+    if len(vectors) != expected:
+        raise Exception(f"Embedding batch returned {len(vectors)} vectors for {expected} inputs")
+    return vectors
+
+
+async def _embed_batch(texts: Sequence[str], timeout: int) -> List[list]:
+    provider, url, payload, headers = _embed_batch_spec(texts)
+    _mark_traffic()
+    if provider == "ollama":
+        async with get_balancer().lease() as endpoint:
+            response = await get_pool().client(provider).post(endpoint.rebase(url), headers=headers,
+                                                              json=payload, timeout=timeout)
+            response.raise_for_status()
+    else:
+        response = await get_pool().client(provider).post(url, headers=headers, json=payload, timeout=timeout)
+        response.raise_for_status()
+    return _parse_embed_batch(response.json(), len(texts))
+
+
+def _split_cached(texts: List[str]):
+    """(results prefilled from the embedding cache, indices still to fetch)."""
+    cache = get_embedding_cache()
+    if cache is None:
+        return [None] * len(texts), list(range(len(texts)))
+    results = cache.get_many(_embedding_model(), texts)
+    return results, [i for i, v in enumerate(results) if v is None]
+
+
+def _store_fetched(texts: List[str], missing: List[int], fetched: List[Optional[list]],
+                   results: List[Optional[list]]):
+    cache = get_embedding_cache()
+    model = _embedding_model()
+    for i, vector in zip(missing, fetched):
+        results[i] = vector
+        if vector and cache is not None:
+            cache.put(model, texts[i], vector)
+
+
+async def get_embeddings(texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE,
+                         max_retries: int = 2, timeout: int = 60,
+                         priority: Priority = Priority.BACKGROUND) -> List[Optional[list]]:
+    """
+    Embed many texts with batched requests (used for bulk fact import / re-indexing).
+    Cached vectors are reused; only misses are sent to the provider.
+    Batches are pipelined up to EMBEDDING_MAX_PARALLEL_BATCHES at a time and the
+    result preserves input order. A batch that keeps failing is split in half and
+    retried so one bad input only costs its own slot; those entries come back as None.
+    """
+    texts = list(texts)
+    results, missing = _split_cached(texts)
+    if missing:
+        fetched = await _fetch_embeddings([texts[i] for i in missing], batch_size, max_retries, timeout, priority)
+        _store_fetched(texts, missing, fetched, results)
+    return results
+
+
+async def _fetch_embeddings(texts: List[str], batch_size: int, max_retries: int, timeout: int,
+                            priority: Priority) -> List[Optional[list]]:
+    results: List[Optional[list]] = [None] * len(texts)
+    batch_size = max(1, batch_size)
+    gate = asyncio.Semaphore(max(1, EMBEDDING_MAX_PARALLEL_BATCHES))
+
+    async def run(start: int, chunk: List[str]):
+        last_error = None
+        for attempt in range(max_retries + 1):
+            try:
+                async with gate:
+                    async with get_scheduler().slot(priority, "embedding_batch"):
+                        vectors = await _embed_batch(chunk, timeout)
+                results[start:start + len(chunk)] = vectors
+                return
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries:
+                    await asyncio.sleep(0.5 * (2 ** attempt))
+        if len(chunk) > 1:
+            mid = len(chunk) // 2
+            logger.warning(f"Embedding batch of {len(chunk)} failed ({last_error}). Splitting and retrying.")
+            await asyncio.gather(run(start, chunk[:mid]), run(start + mid, chunk[mid:]))
+        else:
+            logger.error(f"Embedding failed for input #{start}: {last_error}")
+
+    await asyncio.gather(*[
+        run(i, texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)
+    ])
+    return results
+
+
+def get_embeddings_sync(texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE,
+                        max_retries: int = 2, timeout: int = 60,
+                        client: Optional[httpx.Client] = None) -> List[Optional[list]]:
+    """
+    Blocking variant of get_embeddings for synchronous callers (e.g. ChromaDB
+    embedding functions). Uses its own keep-alive httpx.Client because the pooled
+    async clients are bound to the server's event loop.
+    """
+    texts = list(texts)
+    results, missing = _split_cached(texts)
+    if missing:
+        fetched = _fetch_embeddings_sync([texts[i] for i in missing], batch_size, max_retries, timeout, client)
+        _store_fetched(texts, missing, fetched, results)
+    return results
+
+
+def _fetch_embeddings_sync(texts: List[str], batch_size: int, max_retries: int, timeout: int,
+                           client: Optional[httpx.Client]) -> List[Optional[list]]:
+    results: List[Optional[list]] = [None] * len(texts)
+    owns_client = client is None
+    client = client or httpx.Client()
+
+    def run(start: int, chunk: List[str]):
+        provider, url, payload, headers = _embed_batch_spec(chunk)
+        last_error = None
+        for attempt in range(max_retries + 1):
+            try:
+                response = client.post(url, headers=headers, json=payload, timeout=timeout)
+                response.raise_for_status()
+                results[start:start + len(chunk)] = _parse_embed_batch(response.json(), len(chunk))
+                return
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries:
+                    time.sleep(0.5 * (2 ** attempt))
+        if len(chunk) > 1:
+            mid = len(chunk) // 2
+            run(start, chunk[:mid])
+            run(start + mid, chunk[mid:])
+        else:
+            logger.error(f"Embedding failed for input #{start}: {last_error}")
+
+    try:
+        for i in range(0, len(texts), max(1, batch_size)):
+            run(i, texts[i:i + batch_size])
+    finally:
+        if owns_client:
+            client.close()
+    return results
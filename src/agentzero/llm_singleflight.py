@@ -0,0 +1,45 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests.
+Concurrent callers with the same request key (e.g. a WhatsApp webhook retry or
+a double-tapped send) await one shared task instead of each taking a model slot.
+Coalesced calls are counted in MetricsCollector under "llm_singleflight.<name>.coalesced".
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger("agentzero.llm_singleflight")
+
+
+class SingleFlight:
+    """Deduplicates concurrent awaitables by key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() once per key at a time; concurrent callers share its result or exception."""
+        from agentzero.metrics import MetricsCollector
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            MetricsCollector().incr(f"llm_singleflight.{self.name}.coalesced")
+            # shield: one caller being cancelled must not cancel the shared request
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        MetricsCollector().incr(f"llm_singleflight.{self.name}.leaders")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight '{self.name}' request failed: {task.exception()}")
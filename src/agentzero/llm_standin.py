@@ -0,0 +1,410 @@
+"""
+Deterministic local LLM stand-in server for benchmarks and tests.
+Speaks enough of the Ollama (/api/chat, /api/generate, /api/embed,
+/api/embeddings, /api/tags), Cloudflare Workers AI (ai/run) and OpenAI-compatible
+(/v1/chat/completions, /v1/embeddings, /v1/models) protocols for llm_service,
+with a configurable latency model:
+
+  time to first token = STANDIN_TTFT_MS + prompt_tokens / STANDIN_PREFILL_TPS
+  then one token every 1 / STANDIN_TOKENS_PER_SEC seconds
+  at most STANDIN_SLOTS generations in parallel (the rest queue, like OLLAMA_NUM_PARALLEL)
+
+Replies are scripted per calling node. The node comes from the X-AgentZero-Node
+header llm_service sends, or is recognised from the system prompt. A JSON script
+file (STANDIN_SCRIPT) can override the defaults. Each node maps to:
+  - a string (always returned),
+  - a list (returned round-robin), or
+  - {"rules": [{"contains": "...", "response": ...}], "default": ...}
+    (matched case-insensitively against the last user message).
+
+Run:  python -m agentzero.llm_standin --port 11435 --ttft-ms 300 --tps 20 --slots 1
+then point OLLAMA_API_URL at http://127.0.0.1:11435/api/generate
+(or LLM_PROVIDER=openai with OPENAI_BASE_URL=http://127.0.0.1:11435/v1).
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger("agentzero.llm_standin")
+
+load_dotenv()
+
+STANDIN_TTFT_MS = float(os.getenv("STANDIN_TTFT_MS", "250"))
+STANDIN_TOKENS_PER_SEC = float(os.getenv("STANDIN_TOKENS_PER_SEC", "25"))
+STANDIN_PREFILL_TPS = float(os.getenv("STANDIN_PREFILL_TPS", "400"))
+STANDIN_SLOTS = int(os.getenv("STANDIN_SLOTS", "1"))
+STANDIN_JITTER = float(os.getenv("STANDIN_JITTER", "0.1"))  # +/- fraction applied to every delay
+STANDIN_EMBED_DIM = int(os.getenv("STANDIN_EMBED_DIM", "768"))
+STANDIN_EMBED_MS_PER_INPUT = float(os.getenv("STANDIN_EMBED_MS_PER_INPUT", "5"))
+STANDIN_SCRIPT = os.getenv("STANDIN_SCRIPT", "")
+STANDIN_SEED = int(os.getenv("STANDIN_SEED", "0"))
+
+# System-prompt fragments that identify a node when no header is sent
+_NODE_MARKERS = [
+    ("Supervisor Router", "supervisor"),
+    ("Calendar Specialist", "calendar_agent"),
+    ("Task & Habit Specialist", "task_agent"),
+    ("Knowledge & Memory Specialist", "knowledge_agent"),
+    ("Router & Planner", "fused_planner"),
+    ("Convert the following action results", "response_composer"),
+    ("daily scheduler", "plan_day"),
+    ("weekly scheduler", "plan_week"),
+    ("Your name is Ein", "executor"),
+]
+
+DEFAULT_SCRIPT: Dict[str, Any] = {
+    "supervisor": {
+        "rules": [
+            {"contains": "meeting", "response": '{"domain": "calendar"}'},
+            {"contains": "schedule", "response": '{"domain": "calendar"}'},
+            {"contains": "plan my", "response": '{"domain": "calendar"}'},
+            {"contains": "remind", "response": '{"domain": "task"}'},
+            {"contains": "task", "response": '{"domain": "task"}'},
+            {"contains": "habit", "response": '{"domain": "task"}'},
+            {"contains": "remember", "response": '{"domain": "knowledge"}'},
+        ],
+        "default": '{"domain": "chat"}',
+    },
+    "calendar_agent": '{"plan": [{"type": "ask_user", "params": {"question": "What time should I schedule it?"}}]}',
+    "task_agent": '{"plan": [{"type": "list_tasks", "params": {}}]}',
+    "knowledge_agent": '{"plan": [{"type": "ask_user", "params": {"question": "What exactly should I remember?"}}]}',
+    "fused_planner": {
+        "rules": [
+            {"contains": "meeting", "response": '{"domain": "calendar", "plan": [{"type": "ask_user", '
+                                                '"params": {"question": "What time should I schedule it?"}}]}'},
+            {"contains": "remind", "response": '{"domain": "task", "plan": [{"type": "add_task", '
+                                               '"params": {"task": "call mom"}}]}'},
+            {"contains": "task", "response": '{"domain": "task", "plan": [{"type": "list_tasks", "params": {}}]}'},
+            {"contains": "remember", "response": '{"domain": "knowledge", "plan": [{"type": "remember_fact", '
+                                                 '"params": {"fact": "Passport expires in May"}}]}'},
+        ],
+        "default": '{"domain": "chat", "plan": []}',
+    },
+    "executor": "Sure! This is a scripted reply from the local stand-in model, long enough to exercise streaming.",
+    "response_composer": "All done. Here is a short summary of what happened.",
+    "plan_day": "Morning: focus work. Afternoon: meetings. Evening: Free Time.",
+    "plan_week": "Monday to Friday: focus blocks in the morning, Free Time in the evenings.",
+    "default": "OK.",
+}
+
+
+@dataclass
+class LatencyModel:
+    ttft_ms: float = STANDIN_TTFT_MS
+    tokens_per_sec: float = STANDIN_TOKENS_PER_SEC
+    prefill_tps: float = STANDIN_PREFILL_TPS
+    jitter: float = STANDIN_JITTER
+    embed_ms_per_input: float = STANDIN_EMBED_MS_PER_INPUT
+
+    def _jittered(self, seconds: float, rng: random.Random) -> float:
+        if self.jitter <= 0 or seconds <= 0:
+            return max(0.0, seconds)
+        return max(0.0, seconds * (1 + rng.uniform(-self.jitter, self.jitter)))
+
+    def first_token_delay(self, prompt_tokens: int, rng: random.Random) -> float:
+        prefill = prompt_tokens / self.prefill_tps if self.prefill_tps > 0 else 0.0
+        return self._jittered(self.ttft_ms / 1000 + prefill, rng)
+
+    def token_interval(self, rng: random.Random) -> float:
+        return self._jittered(1 / self.tokens_per_sec, rng) if self.tokens_per_sec > 0 else 0.0
+
+
+def _tokenize(text: str) -> List[str]:
+    """Rough word-piece split used for pacing and token counts."""
+    return re.findall(r"\S{1,4}|\s+", text) or [""]
+
+
+class StandInLLM:
+    """Scripted, latency-modelled fake model with a bounded number of parallel slots."""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, slots: int = STANDIN_SLOTS,
+                 script: Optional[Dict[str, Any]] = None, seed: int = STANDIN_SEED,
+                 embed_dim: int = STANDIN_EMBED_DIM):
+        self.latency = latency or LatencyModel()
+        self.slots = max(1, slots)
+        self.script = {**DEFAULT_SCRIPT, **(script or {})}
+        self.embed_dim = embed_dim
+        self._rng = random.Random(seed)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._turns: Dict[str, int] = {}
+        self.active = 0
+        self.waiting = 0
+        self.max_active = 0
+        self.requests: Dict[str, int] = {}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.slots)
+        return self._semaphore
+
+    # --- scripting ---
+    def detect_node(self, headers, messages: List[dict]) -> str:
+        node = headers.get("x-agentzero-node")
+        if node:
+            return node
+        system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        for marker, name in _NODE_MARKERS:
+            if marker in system:
+                return name
+        return "default"
+
+    def reply_for(self, node: str, messages: List[dict]) -> str:
+        entry = self.script.get(node, self.script.get("default", ""))
+        if isinstance(entry, dict):
+            user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "").lower()
+            for rule in entry.get("rules", []):
+                if rule.get("contains", "").lower() in user:
+                    entry = rule.get("response", "")
+                    break
+            else:
+                entry = entry.get("default", "")
+        if isinstance(entry, list):
+            turn = self._turns.get(node, 0)
+            self._turns[node] = turn + 1
+            entry = entry[turn % len(entry)] if entry else ""
+        return entry if isinstance(entry, str) else json.dumps(entry)
+
+    def embed(self, text: str) -> List[float]:
+        """Deterministic unit vector derived from the text."""
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        rng = random.Random(seed)
+        vector = [rng.gauss(0, 1) for _ in range(self.embed_dim)]
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    # --- generation ---
+    async def generate(self, node: str, messages: List[dict]):
+        """Async iterator of (token, stats) pairs; holds a slot for the whole generation."""
+        self.requests[node] = self.requests.get(node, 0) + 1
+        prompt_tokens = sum(len(_tokenize(m.get("content", ""))) for m in messages)
+        tokens = _tokenize(self.reply_for(node, messages))
+        self.waiting += 1
+        queued_at = time.perf_counter()
+        async with self.semaphore:
+            self.waiting -= 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                start = time.perf_counter()
+                await asyncio.sleep(self.latency.first_token_delay(prompt_tokens, self._rng))
+                prefill_ns = int((time.perf_counter() - start) * 1e9)
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(self.latency.token_interval(self._rng))
+                    yield token, None
+                eval_ns = int((time.perf_counter() - start) * 1e9) - prefill_ns
+                yield "", {
+                    "total_duration": int((time.perf_counter() - queued_at) * 1e9),
+                    "load_duration": 0,
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": prefill_ns,
+                    "eval_count": len(tokens),
+                    "eval_duration": eval_ns,
+                }
+            finally:
+                self.active -= 1
+
+    async def complete(self, node: str, messages: List[dict]):
+        parts, stats = [], {}
+        async for token, final in self.generate(node, messages):
+            if final is not None:
+                stats = final
+            else:
+                parts.append(token)
+        return "".join(parts), stats
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_active": self.max_active,
+            "requests": dict(self.requests),
+        }
+
+
+def create_app(standin: Optional[StandInLLM] = None) -> FastAPI:
+    """FastAPI app serving the Ollama and Cloudflare endpoints from a StandInLLM."""
+    llm = standin or StandInLLM(script=load_script(STANDIN_SCRIPT))
+    app = FastAPI(title="AgentZero LLM stand-in")
+    app.state.llm = llm
+
+    def ollama_stream(model: str, node: str, messages: List[dict], chat: bool):
+        async def body():
+            async for token, final in llm.generate(node, messages):
+                chunk = {"model": model, "done": final is not None}
+                if chat:
+                    chunk["message"] = {"role": "assistant", "content": token}
+                else:
+                    chunk["response"] = token
+                if final is not None:
+                    chunk.update(final)
+                yield json.dumps(chunk) + "\n"
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        data = await request.json()
+        messages = data.get("messages", [])
+        node = llm.detect_node(request.headers, messages)
+        model = data.get("model", "standin")
+        if data.get("stream", True):
+            return ollama_stream(model, node, messages, chat=True)
+        text, stats = await llm.complete(node, messages)
+        return {"model": model, "message": {"role": "assistant", "content": text}, "done": True, **stats}
+
+    @app.post("/api/generate")
+    async def ollama_generate(request: Request):
+        data = await request.json()
+        model = data.get("model", "standin")
+        if not data.get("prompt"):
+            # Empty prompt = load request (warm-up)
+            return {"model": model, "response": "", "done": True, "load_duration": 0}
+        messages = [{"role": "user", "content": data["prompt"]}]
+        if data.get("system"):
+            messages.insert(0, {"role": "system", "content": data["system"]})
+        node = llm.detect_node(request.headers, messages)
+        if data.get("stream", True):
+            return ollama_stream(model, node, messages, chat=False)
+        text, stats = await llm.complete(node, messages)
+        context = list(data.get("context") or []) + [len(text)]
+        return {"model": model, "response": text, "context": context, "done": True, **stats}
+
+    @app.post("/api/embed")
+    async def ollama_embed(request: Request):
+        data = await request.json()
+        inputs = data.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        await asyncio.sleep(llm.latency.embed_ms_per_input * len(inputs) / 1000)
+        return {"model": data.get("model", "standin"), "embeddings": [llm.embed(t) for t in inputs]}
+
+    @app.post("/api/embeddings")
+    async def ollama_embeddings(request: Request):
+        data = await request.json()
+        await asyncio.sleep(llm.latency.embed_ms_per_input / 1000)
+        return {"embedding": llm.embed(data.get("prompt", ""))}
+
+    @app.get("/api/tags")
+    async def ollama_tags():
+        return {"models": [{"name": os.getenv("OLLAMA_MODEL", "llama3:8b-instruct-q4_K_M")}]}
+
+    @app.post("/client/v4/accounts/{account_id}/ai/run/{model:path}")
+    async def cloudflare_run(account_id: str, model: str, request: Request):
+        data = await request.json()
+        if "text" in data:
+            texts = data["text"] if isinstance(data["text"], list) else [data["text"]]
+            await asyncio.sleep(llm.latency.embed_ms_per_input * len(texts) / 1000)
+            return {"success": True, "result": {"data": [llm.embed(t) for t in texts]}}
+        messages = data.get("messages") or [{"role": "user", "content": data.get("prompt", "")}]
+        node = llm.detect_node(request.headers, messages)
+        if data.get("stream"):
+            async def body():
+                async for token, final in llm.generate(node, messages):
+                    if final is None and token:
+                        yield f"data: {json.dumps({'response': token})}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(body(), media_type="text/event-stream")
+        text, _ = await llm.complete(node, messages)
+        return {"success": True, "errors": [], "result": {"response": text}}
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        data = await request.json()
+        messages = data.get("messages", [])
+        node = llm.detect_node(request.headers, messages)
+        model = data.get("model", "standin")
+
+        def usage(stats: dict) -> dict:
+            prompt, completion = stats.get("prompt_eval_count", 0), stats.get("eval_count", 0)
+            return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+        if data.get("stream"):
+            include_usage = (data.get("stream_options") or {}).get("include_usage")
+
+            async def body():
+                async for token, final in llm.generate(node, messages):
+                    if final is None:
+                        chunk = {"object": "chat.completion.chunk", "model": model,
+                                 "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                    elif include_usage:
+                        chunk = {"object": "chat.completion.chunk", "model": model, "choices": [],
+                                 "usage": usage(final)}
+                    else:
+                        continue
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(body(), media_type="text/event-stream")
+        text, stats = await llm.complete(node, messages)
+        return {
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage(stats),
+        }
+
+    @app.post("/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        data = await request.json()
+        inputs = data.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        await asyncio.sleep(llm.latency.embed_ms_per_input * len(inputs) / 1000)
+        return {"object": "list", "model": data.get("model", "standin"),
+                "data": [{"object": "embedding", "index": i, "embedding": llm.embed(t)} for i, t in enumerate(inputs)]}
+
+    @app.get("/v1/models")
+    async def openai_models():
+        return {"object": "list", "data": [{"id": os.getenv("OPENAI_MODEL", "default"), "object": "model"}]}
+
+    @app.get("/stats")
+    async def standin_stats():
+        return JSONResponse(llm.stats())
+
+    return app
+
+
+def load_script(path: str) -> Dict[str, Any]:
+    """Node -> reply mapping from a JSON file ({} if unset or unreadable)."""
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to load stand-in script {path}: {e}")
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AgentZero LLM stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=STANDIN_TTFT_MS)
+    parser.add_argument("--tps", type=float, default=STANDIN_TOKENS_PER_SEC, help="decode tokens/sec")
+    parser.add_argument("--prefill-tps", type=float, default=STANDIN_PREFILL_TPS)
+    parser.add_argument("--slots", type=int, default=STANDIN_SLOTS, help="parallel generations")
+    parser.add_argument("--jitter", type=float, default=STANDIN_JITTER)
+    parser.add_argument("--script", default=STANDIN_SCRIPT, help="JSON file of scripted replies per node")
+    args = parser.parse_args()
+
+    import uvicorn
+    latency = LatencyModel(args.ttft_ms, args.tps, args.prefill_tps, args.jitter)
+    app = create_app(StandInLLM(latency, slots=args.slots, script=load_script(args.script)))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Model warm-up and keep-alive management for the Ollama backend.
+At startup every configured model (chat and embedding) is preloaded so the
+first request doesn't pay the load cost. A background loop then refreshes
+Ollama's keep_alive while the app has seen recent traffic, and lets models
+unload once it has been idle for longer than LLM_KEEPALIVE_IDLE_WINDOW.
+Model load events (startup, refresh, or a cold load observed on a request)
+are kept in a small ring buffer and exposed via /health.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.llm_warmup")
+
+load_dotenv()
+
+LLM_WARMUP_ENABLED = os.getenv("LLM_WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_KEEPALIVE_INTERVAL = int(os.getenv("LLM_KEEPALIVE_INTERVAL", "240"))  # seconds between checks
+LLM_KEEPALIVE_IDLE_WINDOW = int(os.getenv("LLM_KEEPALIVE_IDLE_WINDOW", "3600"))  # stop refreshing after this much idle
+# Ollama reports a few ms of load_duration on every call; only longer ones are real (re)loads
+LLM_COLD_LOAD_THRESHOLD_MS = float(os.getenv("LLM_COLD_LOAD_THRESHOLD_MS", "1000"))
+
+_load_events: deque = deque(maxlen=50)
+
+
+def record_load_event(model: str, load_ms: float, reason: str, ok: bool = True, error: str = None):
+    """Remember that a model was (re)loaded into memory."""
+    event = {
+        "model": model,
+        "reason": reason,
+        "load_ms": round(load_ms, 1),
+        "ok": ok,
+        "timestamp": time.time(),
+    }
+    if error:
+        event["error"] = error
+    _load_events.append(event)
+    if reason == "request":
+        logger.info(f"Model '{model}' was cold: request paid {load_ms:.0f}ms load time")
+
+
+def recent_load_events(limit: int = 10) -> List[dict]:
+    return list(_load_events)[-limit:][::-1]
+
+
+def configured_models() -> List[Tuple[str, str]]:
+    """(kind, model) pairs the app will call (including per-node profile models), de-duplicated."""
+    from agentzero import llm_service
+    from agentzero.llm_profiles import all_profiles
+    models = [("chat", llm_service.OLLAMA_MODEL), ("embedding", llm_service.OLLAMA_EMBEDDING_MODEL)]
+    models += [("chat", profile.model) for profile in all_profiles().values() if profile.model]
+    seen, result = set(), []
+    for kind, model in models:
+        if model and model not in seen:
+            seen.add(model)
+            result.append((kind, model))
+    return result
+
+
+async def preload_model(model: str, kind: str = "chat", reason: str = "startup",
+                        endpoint_url: Optional[str] = None) -> bool:
+    """
+    Ask Ollama to load a model and hold it for OLLAMA_KEEP_ALIVE. Returns success.
+    `endpoint_url` targets one server of a balanced pool (default: OLLAMA_API_URL's host).
+    """
+    from agentzero import llm_service
+    from agentzero.llm_pool import get_pool
+    from agentzero.llm_balancer import Endpoint
+
+    if kind == "embedding":
+        url = llm_service.OLLAMA_EMBED_BATCH_URL
+        payload = {"model": model, "input": "warm-up", "keep_alive": llm_service.OLLAMA_KEEP_ALIVE}
+    else:
+        # An empty prompt loads the model without generating anything
+        url = llm_service.OLLAMA_API_URL
+        payload = {"model": model, "prompt": "", "stream": False, "keep_alive": llm_service.OLLAMA_KEEP_ALIVE}
+
+    start = time.perf_counter()
+    try:
+        if endpoint_url:
+            url = Endpoint(endpoint_url).rebase(url)
+        response = await get_pool().client("ollama").post(url, json=payload, timeout=300)
+        response.raise_for_status()
+        data = response.json()
+        load_ms = (data.get("load_duration") or 0) / 1e6 or (time.perf_counter() - start) * 1000
+        record_load_event(model, load_ms, reason)
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to preload model '{model}' ({reason}): {e}")
+        record_load_event(model, (time.perf_counter() - start) * 1000, reason, ok=False, error=str(e))
+        return False
+
+
+async def warm_up_models(reason: str = "startup") -> int:
+    """Preload every configured Ollama model on every Ollama server concurrently. Returns how many loaded."""
+    from agentzero.llm_backends import backend_names
+    from agentzero.llm_balancer import get_balancer
+    if "ollama" not in backend_names() or not LLM_WARMUP_ENABLED:
+        return 0
+    models = configured_models()
+    endpoints = [e.url for e in get_balancer().endpoints]
+    logger.info(f"Warming up models: {', '.join(m for _, m in models)} on {len(endpoints)} server(s)")
+    results = await asyncio.gather(*[preload_model(m, kind, reason, url)
+                                     for kind, m in models for url in endpoints])
+    return sum(1 for ok in results if ok)
+
+
+class ModelKeepAlive:
+    """Background loop that keeps models resident while the app is in use."""
+
+    def __init__(self, interval: int = LLM_KEEPALIVE_INTERVAL, idle_window: int = LLM_KEEPALIVE_IDLE_WINDOW):
+        self.interval = interval
+        self.idle_window = idle_window
+        self.running = False
+        self.last_refresh: Optional[float] = None
+
+    def should_refresh(self, now: float, last_request: float) -> bool:
+        """Refresh only during a lull that follows recent traffic."""
+        if not last_request:
+            return False
+        idle_for = now - last_request
+        if idle_for > self.idle_window:
+            return False  # app went quiet: let Ollama unload and free memory
+        if idle_for < self.interval:
+            return False  # real requests are already renewing keep_alive
+        return self.last_refresh is None or now - self.last_refresh >= self.interval
+
+    async def start(self):
+        from agentzero import llm_service
+        self.running = True
+        while self.running:
+            await asyncio.sleep(self.interval)
+            try:
+                now = time.time()
+                if self.should_refresh(now, llm_service.last_request_at()):
+                    await warm_up_models(reason="keepalive")
+                    self.last_refresh = now
+            except Exception as e:
+                logger.error(f"Keep-alive loop error: {e}")
+
+    def stop(self):
+        self.running = False
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "idle_window_seconds": self.idle_window,
+            "last_refresh": self.last_refresh,
+        }
@@ -30,7 +30,8 @@ _node_entry_times: Dict[str, float] = {}  # node_name -> perf_counter at entry
 _entry_times_lock = threading.Lock()
 
 
-def log_node(step, state):
+def log_node(step, state, source=None):
+    """Append a node trace entry; `source` tags routing exits with who decided (e.g. "llm", "fast_router")."""
     import time as _time
     from agentzero.metrics import MetricsCollector
     
@@ -44,6 +45,8 @@ def log_node(step, state):
         'tool_results': getattr(state, 'tool_results', None),
         'response': getattr(state, 'response', None),
     }
+    if source:
+        entry['source'] = source
     with _trace_lock:
         with open(LOG_PIPE_PATH, 'a') as f:
             f.write(json.dumps(entry) + '\n')
@@ -83,12 +86,27 @@ class ShortTermMemory:
         self.state.clear()
 
 
+# "default" = Chroma's bundled embedder, "llm" = batched embeddings via llm_service.
+# The llm backend uses its own collection so vectors of different models never mix.
+LTM_EMBEDDING_BACKEND = os.getenv("LTM_EMBEDDING_BACKEND", "default").lower()
+
+
 class LongTermMemory:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, embedding_function=None):
         import chromadb
         self.db_path = db_path
         self.client = chromadb.PersistentClient(path=db_path)
-        self.collection = self.client.get_or_create_collection(name="agent_memory")
+        collection_name = "agent_memory"
+        if embedding_function is None and LTM_EMBEDDING_BACKEND == "llm":
+            from agentzero.embeddings import LLMEmbeddingFunction
+            embedding_function = LLMEmbeddingFunction()
+        if embedding_function is not None:
+            collection_name = f"agent_memory_{embedding_function.name()}".replace("-", "_")
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name, embedding_function=embedding_function
+            )
+        else:
+            self.collection = self.client.get_or_create_collection(name=collection_name)
 
     def add(self, text: str, metadata: dict = None):
         import uuid
@@ -99,6 +117,17 @@ class LongTermMemory:
             ids=[doc_id]
         )
 
+    def add_many(self, texts: List[str], metadatas: List[dict] = None):
+        """Bulk insert; the embedding function sees the whole list and batches it."""
+        import uuid
+        if not texts:
+            return
+        self.collection.add(
+            documents=list(texts),
+            metadatas=metadatas,
+            ids=[str(uuid.uuid4()) for _ in texts]
+        )
+
     def query(self, query_text: str, top_k=5) -> List[str]:
         try:
             results = self.collection.query(
@@ -1,14 +1,36 @@
 """
 Lightweight in-memory metrics collector for AgentZero observability.
-Tracks per-node latency, error rates, and domain distribution.
+Tracks per-node latency, error rates, domain distribution, named counters
+and per-node observations of other metrics (e.g. LLM queue wait).
+Every LLM call is also recorded with its TTFT, token counts and the model
+server's prefill/decode/load durations, attributed to the calling node and the
+pipeline request (carried in a contextvar set by start_request).
 Thread-safe with a capped ring buffer to prevent unbounded growth.
 """
 import time
 import threading
 import statistics
 from collections import deque, defaultdict
+from contextvars import ContextVar
 from typing import Dict, List, Optional, Any
 
+# Request being served by the current task (graph nodes and LLM calls inherit it)
+_current_request_id: ContextVar[Optional[str]] = ContextVar("agentzero_request_id", default=None)
+
+# Per-call LLM fields summarized per node (None = not reported by the backend)
+LLM_CALL_FIELDS = ("wall_ms", "ttft_ms", "prompt_tokens", "output_tokens",
+                   "prefill_ms", "decode_ms", "load_ms", "overhead_ms")
+
+
+def current_request_id() -> Optional[str]:
+    return _current_request_id.get()
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return sorted_values[int(len(sorted_values) * p)]
+
 
 class MetricsCollector:
     """Singleton metrics collector with ring buffer storage."""
@@ -30,12 +52,16 @@ class MetricsCollector:
         self._records = deque(maxlen=max_entries)
         self._request_traces: deque = deque(maxlen=200)
         self._current_traces: Dict[str, dict] = {}  # keyed by request_id
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._observations = deque(maxlen=max_entries)
+        self._llm_calls = deque(maxlen=max_entries)
         self._write_lock = threading.Lock()
         self._start_time = time.time()
     
     def record(self, node: str, duration_ms: float, had_error: bool = False,
                domain: Optional[str] = None, request_id: Optional[str] = None):
         """Record a single node execution."""
+        request_id = request_id or current_request_id()
         entry = {
             "node": node,
             "duration_ms": round(duration_ms, 2),
@@ -50,6 +76,84 @@ class MetricsCollector:
             if request_id and request_id in self._current_traces:
                 self._current_traces[request_id]["nodes"].append(entry)
     
+    def incr(self, name: str, amount: int = 1):
+        """Increment a named counter (e.g. "llm_pool.connections_reused")."""
+        with self._write_lock:
+            self._counters[name] += amount
+
+    def get_counters(self) -> Dict[str, int]:
+        """Snapshot of all named counters since startup (or last reset)."""
+        with self._write_lock:
+            return dict(self._counters)
+
+    def observe(self, metric: str, node: str, value: float):
+        """Record one sample of a named metric attributed to a node (e.g. "llm_queue_wait_ms")."""
+        entry = {
+            "metric": metric,
+            "node": node or "unknown",
+            "value": round(value, 2),
+            "timestamp": time.time(),
+        }
+        with self._write_lock:
+            self._observations.append(entry)
+
+    def record_llm_call(self, call: Dict[str, Any], request_id: Optional[str] = None):
+        """
+        Record one LLM call: node, backend, model and the LLM_CALL_FIELDS timings/token
+        counts. Also attached to the current request's trace.
+        """
+        entry = {k: (round(v, 2) if isinstance(v, float) else v) for k, v in call.items()}
+        entry["node"] = entry.get("node") or "unknown"
+        entry["request_id"] = request_id or current_request_id()
+        entry["timestamp"] = time.time()
+        with self._write_lock:
+            self._llm_calls.append(entry)
+            trace = self._current_traces.get(entry["request_id"])
+            if trace is not None:
+                trace["llm_calls"].append(entry)
+
+    def _summarize_llm_calls(self, cutoff: float) -> Dict[str, dict]:
+        """node -> {calls, <field>: {avg, p95}, tokens_per_sec} over the window."""
+        with self._write_lock:
+            recent = [c for c in self._llm_calls if c["timestamp"] > cutoff]
+        per_node: Dict[str, List[dict]] = defaultdict(list)
+        for c in recent:
+            per_node[c["node"]].append(c)
+        result: Dict[str, dict] = {}
+        for node, calls in per_node.items():
+            summary: Dict[str, Any] = {"calls": len(calls)}
+            for field in LLM_CALL_FIELDS:
+                values = sorted(c[field] for c in calls if c.get(field) is not None)
+                if values:
+                    summary[field] = {"avg": round(statistics.mean(values), 2),
+                                      "p95": round(_percentile(values, 0.95), 2)}
+            output = sum(c.get("output_tokens") or 0 for c in calls if c.get("decode_ms"))
+            decode_ms = sum(c["decode_ms"] for c in calls if c.get("decode_ms"))
+            if decode_ms:
+                summary["tokens_per_sec"] = round(output / (decode_ms / 1000), 2)
+            result[node] = summary
+        return result
+
+    def _summarize_observations(self, cutoff: float) -> Dict[str, Dict[str, dict]]:
+        """metric -> node -> {count, avg, p95, max} over the window."""
+        with self._write_lock:
+            recent = [o for o in self._observations if o["timestamp"] > cutoff]
+        groups: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        for o in recent:
+            groups[o["metric"]][o["node"]].append(o["value"])
+        result: Dict[str, Dict[str, dict]] = {}
+        for metric, per_node in groups.items():
+            result[metric] = {}
+            for node, values in per_node.items():
+                sorted_v = sorted(values)
+                result[metric][node] = {
+                    "count": len(values),
+                    "avg": round(statistics.mean(values), 2),
+                    "p95": round(_percentile(sorted_v, 0.95), 2),
+                    "max": round(sorted_v[-1], 2),
+                }
+        return result
+
     def start_request(self, request_id: str, user_input: str, domain: str = ""):
         """Mark the start of a new pipeline request."""
         with self._write_lock:
@@ -59,8 +163,10 @@ class MetricsCollector:
                 "domain": domain,
                 "start_time": time.time(),
                 "nodes": [],
+                "llm_calls": [],
                 "error": False,
             }
+        _current_request_id.set(request_id)
     
     def end_request(self, request_id: str, had_error: bool = False, domain: str = ""):
         """Mark the end of a pipeline request and archive the trace."""
@@ -72,7 +178,10 @@ class MetricsCollector:
                 trace["error"] = had_error
                 if domain:
                     trace["domain"] = domain
+                trace["breakdown"] = _request_breakdown(trace)
                 self._request_traces.append(trace)
+        if _current_request_id.get() == request_id:
+            _current_request_id.set(None)
     
     def get_summary(self, window_seconds: int = 3600) -> dict:
         """Get aggregated metrics for the given time window."""
@@ -130,6 +239,9 @@ class MetricsCollector:
             "domains": dict(domain_counts),
             "error_timeline": dict(sorted(error_timeline.items())),
             "throughput_timeline": dict(sorted(throughput_timeline.items())),
+            "counters": self.get_counters(),
+            "observations": self._summarize_observations(cutoff),
+            "llm_calls": self._summarize_llm_calls(cutoff),
         }
     
     def get_recent_requests(self, limit: int = 50) -> List[dict]:
@@ -145,4 +257,25 @@ class MetricsCollector:
             self._records.clear()
             self._request_traces.clear()
             self._current_traces.clear()
+            self._counters.clear()
+            self._observations.clear()
+            self._llm_calls.clear()
             self._start_time = time.time()
+
+
+def _request_breakdown(trace: dict) -> Dict[str, float]:
+    """
+    Where a request's time went: summed LLM wall time split into load, prefill,
+    decode and client/transport overhead, and everything else (graph, storage...).
+    Concurrent LLM calls can make llm_ms exceed total_ms.
+    """
+    calls = trace.get("llm_calls", [])
+    sums = {field: round(sum(c.get(field) or 0 for c in calls), 2)
+            for field in ("load_ms", "prefill_ms", "decode_ms", "overhead_ms")}
+    llm_ms = round(sum(c.get("wall_ms") or 0 for c in calls), 2)
+    return {
+        "llm_calls": len(calls),
+        "llm_ms": llm_ms,
+        **sums,
+        "other_ms": round(max(0.0, trace.get("total_ms", 0) - llm_ms), 2),
+    }
@@ -0,0 +1,99 @@
+"""
+Multi-domain fan-out node for AgentZero (LangGraph).
+When the supervisor routes one message to several domains ("add a task to buy
+milk and schedule a dentist visit Friday at 3"), state.domains lists them and this
+node runs their agents concurrently, each on its own copy of the state and told
+to plan only its part, then merges the plans (in domain order) for a single
+executor / response_composer pass. policy_enforcer has already granted the
+union of the domains' permissions.
+
+Merged steps are tagged with their "domain". On an evaluator retry only the
+domains whose steps failed are planned again (each agent sees only its own
+results); the other domains' steps are kept with their result under "done", so
+the executor doesn't run them twice. A domain whose agent fails while others
+succeed is reported to the user with an ask_user step instead of being dropped.
+"""
+import asyncio
+import logging
+from typing import List, Optional
+
+from agentzero.agent_state import AgentState
+from agentzero.evaluator import result_failed
+
+logger = logging.getLogger("agentzero.multi_agent")
+
+
+def scope_note(state: AgentState, domain: str) -> Optional[str]:
+    """Prompt note telling one agent of a multi-domain request which part is its own."""
+    if not state.domains or len(state.domains) < 2:
+        return None
+    others = ", ".join(d for d in state.domains if d != domain)
+    return (f"This request spans several domains. Plan ONLY the {domain} part of it; "
+            f"the {others} part is handled by other agents. Do not ask about it.")
+
+
+def _tag(domain: str, steps: Optional[List[dict]]) -> List[dict]:
+    return [{**step, "domain": domain} for step in steps or []]
+
+
+async def multi_agent_node(state: AgentState) -> AgentState:
+    from agentzero.memory import log_node
+    from agentzero import speculation
+    from agentzero.agents import calendar_agent_node, knowledge_agent_node, task_agent_node
+    log_node('multi_agent:entry', state)
+
+    if state.error:
+        state.step = "error_handler"
+        log_node('multi_agent:error', state)
+        return state
+
+    agents = {"calendar": calendar_agent_node, "task": task_agent_node, "knowledge": knowledge_agent_node}
+    domains = [d for d in state.domains or [] if d in agents]
+
+    # Retry: steps and results of the previous attempt, per domain
+    previous = {d: [] for d in domains}
+    if state.step == "evaluator (retry loop)" and state.plan:
+        for step, result in zip(state.plan, state.tool_results or []):
+            if step.get("domain") in previous:
+                previous[step["domain"]].append((step, result))
+    failed = [d for d in domains if any(result_failed(r) for _, r in previous[d])]
+    to_plan = failed if any(previous.values()) else domains
+
+    async def plan_for(domain: str) -> AgentState:
+        branch = state.model_copy(deep=True)
+        branch.intent = domain
+        branch.tool_results = [result for _, result in previous[domain]]  # its own errors only
+        node = agents[domain]
+        if speculation.SPECULATIVE_PLANNING_ENABLED:
+            node = speculation.speculative_or(node)
+        return await node(branch)
+
+    branches = dict(zip(to_plan, await asyncio.gather(*(plan_for(d) for d in to_plan))))
+
+    plan, errors = [], []
+    for domain in domains:
+        if domain not in branches:
+            # Succeeded last attempt: keep the steps, don't execute them again
+            plan.extend({**step, "done": result} if step.get("type") != "ask_user" else step
+                        for step, result in previous[domain])
+            continue
+        branch = branches[domain]
+        if branch.error:
+            logger.warning(f"{domain} planner failed in multi-domain request: {branch.error}")
+            errors.append(branch.error)
+            plan.append({"type": "ask_user", "domain": domain, "params": {
+                "question": f"I couldn't work out the {domain} part of your request. Could you rephrase it?"}})
+            continue
+        plan.extend(_tag(domain, branch.plan))
+
+    if errors and len(errors) == len(to_plan) and not any(previous.values()):
+        state.plan = []
+        state.error = "; ".join(errors)
+        state.step = "error_handler"
+        log_node('multi_agent:error', state)
+        return state
+
+    state.plan = plan
+    state.step = "multi_agent"
+    log_node('multi_agent:exit', state)
+    return state
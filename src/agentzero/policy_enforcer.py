@@ -2,6 +2,8 @@
 Policy Enforcer node for AgentZero (LangGraph).
 Enforces intent-level gating and pre-authorizes actions based on the POLICY dict.
 Per-action permission checks happen in the executor at dispatch time.
+Multi-domain requests (state.domains) must pass the policy for every domain and
+are granted the union of their permissions.
 """
 from agentzero.agent_state import AgentState
 from agentzero.memory import AuditLog
@@ -14,6 +16,21 @@ POLICY = {
     "knowledge": {"allowed": True, "reason": "Knowledge and Memory allowed"},
 }
 
+# Actions each domain pre-authorizes for the executor (chat bypasses tools)
+DOMAIN_PERMISSIONS = {
+    "task": {
+        "add_task": True, "list_tasks": True, "edit_task": True, "complete_task": True,
+        "add_habit": True, "list_habits": True, "delete_habit": True, "track_habit": True
+    },
+    "calendar": {
+        "add_event": True, "list_events": True, "plan_day": True, "plan_week": True
+    },
+    "knowledge": {
+        "remember_fact": True, "query_note": True, "get_file": False
+    },
+    "chat": {},
+}
+
 LOG_PATH = 'data/audit.log'
 
 def policy_enforcer(state: AgentState) -> AgentState:
@@ -24,45 +41,31 @@ def policy_enforcer(state: AgentState) -> AgentState:
         log_node('policy_enforcer:error', state)
         return state
 
-    domain = state.intent or "unknown"
-    policy = POLICY.get(domain, {"allowed": False, "reason": "Unknown or unconfigured domain"})
-    allowed = policy["allowed"]
-    reason = policy["reason"]
-
-    # Audit log the domain decision
     audit = AuditLog(LOG_PATH)
-    audit.append({
-        "step": "policy_enforcer",
-        "domain": domain,
-        "allowed": allowed,
-        "reason": reason,
-        "user_input": state.user_input
-    })
+    for domain in state.domains or [state.intent or "unknown"]:
+        policy = POLICY.get(domain, {"allowed": False, "reason": "Unknown or unconfigured domain"})
+        allowed = policy["allowed"]
+        reason = policy["reason"]
 
-    # Block disallowed domains
-    if not allowed:
-        state.error = f"Action '{domain}' blocked: {reason}"
-        state.step = "error_handler"
-        log_node('policy_enforcer:error', state)
-        return state
-
-    # Map domain to specific permissions for executor
-    if domain == "task":
-        state.permissions.update({
-            "add_task": True, "list_tasks": True, "edit_task": True, "complete_task": True,
-            "add_habit": True, "list_habits": True, "delete_habit": True, "track_habit": True
-        })
-    elif domain == "calendar":
-        state.permissions.update({
-            "add_event": True, "list_events": True, "plan_day": True, "plan_week": True
-        })
-    elif domain == "knowledge":
-        state.permissions.update({
-            "remember_fact": True, "query_note": True, "get_file": False
+        # Audit log the domain decision
+        audit.append({
+            "step": "policy_enforcer",
+            "domain": domain,
+            "allowed": allowed,
+            "reason": reason,
+            "user_input": state.user_input,
+            "routed_by": state.routed_by,
         })
-    elif domain == "chat":
-        # Chat bypasses tools, goes to executor directly
-        pass
+
+        # Block disallowed domains
+        if not allowed:
+            state.error = f"Action '{domain}' blocked: {reason}"
+            state.step = "error_handler"
+            log_node('policy_enforcer:error', state)
+            return state
+
+        # Map domain to specific permissions for executor
+        state.permissions.update(DOMAIN_PERMISSIONS.get(domain, {}))
 
     state.step = "policy_enforcer"
     log_node('policy_enforcer:exit', state)
@@ -0,0 +1,197 @@
+"""
+Token-budgeted prompt assembly for AgentZero's LLM call sites.
+Nodes describe their prompt as prioritized parts (system instructions, history,
+habit lists, RAG hits, the user turn). build() estimates tokens for the target
+model and, while the prompt is over the node's budget, drops or truncates the
+lowest-priority part first (oldest history goes before recent history).
+Final prompt sizes are observed per node as "prompt_tokens" in MetricsCollector.
+
+Messages are laid out prefix-stable so the model server can reuse its KV cache:
+the static system prompt first, then history (which only grows at the end), then
+a trailing system message with the volatile context (time, reflections, RAG,
+habit lists), then the user turn. Nothing that changes per request may go into
+system() - use context() for it.
+"""
+import os
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("agentzero.prompt_builder")
+
+load_dotenv()
+
+# Part priorities: higher survives longer; REQUIRED is never dropped
+REQUIRED = 100
+REFLECTION = 80
+PRIMARY_DATA = 70  # records the answer is built from (e.g. calendar events)
+RECENT_HISTORY = 60
+SECONDARY_DATA = 50  # tool results, task lists
+RAG = 40
+HABITS = 30
+OLDEST_HISTORY = 10
+
+# Prompt token budgets per node (override with PROMPT_BUDGET_<NODE>, e.g. PROMPT_BUDGET_SUPERVISOR)
+DEFAULT_PROMPT_BUDGET = int(os.getenv("PROMPT_BUDGET_DEFAULT", "2048"))
+_NODE_BUDGETS = {
+    "supervisor": 1024,
+    "calendar_agent": 2048,
+    "task_agent": 2048,
+    "knowledge_agent": 2048,
+    "fused_planner": 3072,
+    "slot_filler": 1024,
+    "executor": 3072,
+    "response_composer": 2048,
+    "plan_day": 3072,
+    "plan_week": 3072,
+}
+
+# Approximate characters per token by model family (no tokenizer dependency)
+_CHARS_PER_TOKEN = {
+    "llama3": 4.0,
+    "llama-3": 4.0,
+    "llama2": 3.6,
+    "mistral": 3.6,
+    "qwen": 3.8,
+    "gemma": 4.0,
+    "phi": 3.6,
+}
+_DEFAULT_CHARS_PER_TOKEN = 3.8
+_MESSAGE_OVERHEAD_TOKENS = 4  # role markers / separators added by chat templates
+_MIN_TRUNCATED_TOKENS = 32  # below this a truncatable part is dropped instead
+
+
+def prompt_budget(node: Optional[str]) -> int:
+    default = _NODE_BUDGETS.get(node or "", DEFAULT_PROMPT_BUDGET)
+    return int(os.getenv(f"PROMPT_BUDGET_{(node or 'default').upper()}", str(default)))
+
+
+def _chars_per_token(model: Optional[str]) -> float:
+    name = (model or "").lower()
+    for family, ratio in _CHARS_PER_TOKEN.items():
+        if family in name:
+            return ratio
+    return _DEFAULT_CHARS_PER_TOKEN
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Estimated token count of `text` for `model`."""
+    if not text:
+        return 0
+    by_chars = len(text) / _chars_per_token(model)
+    by_words = len(text.split()) * 1.3
+    return int(max(by_chars, by_words)) + 1
+
+
+def count_message_tokens(messages: List[dict], model: Optional[str] = None) -> int:
+    return sum(count_tokens(m.get("content", ""), model) + _MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut `text` to roughly `max_tokens`, keeping the beginning."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    limit = max(0, int((max_tokens - 1) * _chars_per_token(model)) - 2)
+    while limit > 0 and count_tokens(text[:limit].rstrip() + " …", model) > max_tokens:
+        limit -= max(1, limit // 20)
+    return text[:limit].rstrip() + " …"
+
+
+@dataclass
+class _Part:
+    slot: str  # "system" | "history" | "context" | "user"
+    content: str
+    priority: int
+    truncatable: bool = False
+    role: str = ""
+
+
+class PromptBuilder:
+    """Collects prioritized prompt parts for one node and assembles them within budget."""
+
+    def __init__(self, node: str, model: Optional[str] = None, budget: Optional[int] = None):
+        if model is None:
+            from agentzero.llm_service import _text_model
+            model = _text_model(node)
+        self.node = node
+        self.model = model
+        self.budget = budget if budget is not None else prompt_budget(node)
+        self._parts: List[_Part] = []
+
+    def system(self, text: str, priority: int = REQUIRED, truncatable: bool = False) -> "PromptBuilder":
+        """Append a section to the static system message (the cacheable prefix)."""
+        if text:
+            self._parts.append(_Part("system", text, priority, truncatable))
+        return self
+
+    def history(self, messages: Optional[List[dict]], max_turns: Optional[int] = None) -> "PromptBuilder":
+        """Add chat history; older messages get lower priority so they are dropped first."""
+        messages = list(messages or [])
+        if max_turns is not None:
+            messages = messages[-max_turns:] if max_turns > 0 else []
+        for i, msg in enumerate(messages):
+            age = len(messages) - 1 - i
+            priority = max(OLDEST_HISTORY, RECENT_HISTORY - age * 2)
+            self._parts.append(_Part("history", msg.get("content", ""), priority, role=msg.get("role", "user")))
+        return self
+
+    def context(self, text: str, priority: int = REQUIRED, truncatable: bool = False) -> "PromptBuilder":
+        """Append a volatile section (time, reflections, RAG...) to the system message placed after history."""
+        if text:
+            self._parts.append(_Part("context", text, priority, truncatable))
+        return self
+
+    def user(self, text: str, priority: int = REQUIRED, truncatable: bool = False) -> "PromptBuilder":
+        """Append a section to the final user message."""
+        if text:
+            self._parts.append(_Part("user", text, priority, truncatable))
+        return self
+
+    def _tokens(self, parts: List[_Part]) -> int:
+        total = sum(count_tokens(p.content, self.model) for p in parts)
+        messages = len([p for p in parts if p.slot == "history"])
+        messages += len({p.slot for p in parts if p.slot != "history"})
+        return total + messages * _MESSAGE_OVERHEAD_TOKENS
+
+    def _fit(self) -> List[_Part]:
+        parts = [_Part(p.slot, p.content, p.priority, p.truncatable, p.role) for p in self._parts]
+        total = self._tokens(parts)
+        while total > self.budget:
+            candidates = [p for p in parts if p.priority < REQUIRED]
+            if not candidates:
+                logger.warning(f"[{self.node}] Required prompt parts alone exceed the "
+                               f"{self.budget}-token budget ({total} tokens)")
+                break
+            victim = min(candidates, key=lambda p: p.priority)  # earliest added wins ties
+            current = count_tokens(victim.content, self.model)
+            keep = current - (total - self.budget)
+            trimmed = truncate_to_tokens(victim.content, keep, self.model) if victim.truncatable else ""
+            if keep >= _MIN_TRUNCATED_TOKENS and count_tokens(trimmed, self.model) < current:
+                victim.content = trimmed
+            else:
+                parts = [p for p in parts if p is not victim]
+            from agentzero.metrics import MetricsCollector
+            MetricsCollector().incr(f"prompt_builder.{self.node}.trimmed")
+            total = self._tokens(parts)
+        return parts
+
+    def build(self) -> List[dict]:
+        """Messages list (system, history..., context, user) trimmed to the budget."""
+        from agentzero.metrics import MetricsCollector
+        parts = self._fit()
+        messages = []
+        system = "\n\n".join(p.content for p in parts if p.slot == "system")
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.extend({"role": p.role, "content": p.content} for p in parts if p.slot == "history")
+        context = "\n\n".join(p.content for p in parts if p.slot == "context")
+        if context:
+            messages.append({"role": "system", "content": context})
+        user = "\n\n".join(p.content for p in parts if p.slot == "user")
+        if user:
+            messages.append({"role": "user", "content": user})
+        MetricsCollector().observe("prompt_tokens", self.node, count_message_tokens(messages, self.model))
+        return messages
+
@@ -1,16 +1,20 @@
 """
 Final Response Composer node for AgentZero (LangGraph).
 Converts action results into natural language using the LLM.
+When the graph is streamed with stream_tokens, the composed reply is streamed token by token.
 """
 import json
 import logging
+from langchain_core.runnables import RunnableConfig
 from agentzero.agent_state import AgentState
 from agentzero.llm_service import chat_completion
+from agentzero.prompt_builder import SECONDARY_DATA, PromptBuilder
+from agentzero.streaming import token_sink, stream_chat
 
 logger = logging.getLogger("agentzero.response_composer")
 
 
-async def response_composer(state: AgentState) -> AgentState:
+async def response_composer(state: AgentState, config: RunnableConfig = None) -> AgentState:
     from agentzero.memory import log_node
     log_node('response_composer:entry', state)
 
@@ -44,27 +48,22 @@ async def response_composer(state: AgentState) -> AgentState:
     elif action_results:
         # Convert action results to natural language via LLM
         results_text = json.dumps(action_results, default=str, indent=2)
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are Ein, a helpful productivity AI. "
-                    "Convert the following action results into a clear, concise, "
-                    "natural language response for the user. "
-                    "Do NOT fabricate any data — only use what is provided. "
-                    "Be friendly and conversational."
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"User's original request: {state.user_input}\n\n"
-                    f"Action results:\n{results_text}"
-                ),
-            },
-        ]
+        prompt = PromptBuilder("response_composer").system(
+            "You are Ein, a helpful productivity AI. "
+            "Convert the following action results into a clear, concise, "
+            "natural language response for the user. "
+            "Do NOT fabricate any data — only use what is provided. "
+            "Be friendly and conversational."
+        )
+        prompt.user(f"User's original request: {state.user_input}")
+        prompt.user(f"Action results:\n{results_text}", priority=SECONDARY_DATA, truncatable=True)
+        messages = prompt.build()
         try:
-            state.response = await chat_completion(messages=messages, stream=False, timeout=30)
+            sink = token_sink(config, "response_composer")
+            if sink:
+                state.response = await stream_chat(messages, sink, timeout=30, node="response_composer")
+            else:
+                state.response = await chat_completion(messages=messages, stream=False, timeout=30, node="response_composer")
         except Exception as e:
             logger.error(f"LLM response composition failed: {e}")
             # Fallback: return raw results as strings
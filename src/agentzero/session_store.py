@@ -3,7 +3,7 @@ import json
 import time
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger("agentzero.session_store")
 
@@ -12,12 +12,12 @@ class SessionStore(ABC):
     
     @abstractmethod
     def get(self, session_id: str) -> Dict[str, Any]:
-        """Retrieve a session by ID. Must return a dict with a 'history' list."""
+        """Retrieve a session by ID. Must return a dict with a 'history' list and a 'pending' action (or None)."""
         pass
 
     @abstractmethod
-    def set(self, session_id: str, history: List[Dict[str, str]]) -> None:
-        """Store the history list for a session."""
+    def set(self, session_id: str, history: List[Dict[str, str]], pending: Optional[Dict[str, Any]] = None) -> None:
+        """Store the history list and the action waiting on the user's answer (None clears it)."""
         pass
 
     @abstractmethod
@@ -60,6 +60,10 @@ class SQLiteSessionStore(SessionStore):
                 conn.execute(
                     "CREATE INDEX IF NOT EXISTS idx_sessions_last_accessed ON sessions(last_accessed)"
                 )
+                # Migration: slot-filling continuation state, added after the first release
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(sessions)")}
+                if "pending" not in columns:
+                    conn.execute("ALTER TABLE sessions ADD COLUMN pending TEXT")
         except Exception as e:
             logger.error(f"Failed to initialize SQLite session store: {e}")
 
@@ -67,7 +71,7 @@ class SQLiteSessionStore(SessionStore):
         try:
             with self._get_connection() as conn:
                 cursor = conn.execute(
-                    "SELECT history, last_accessed FROM sessions WHERE session_id = ?",
+                    "SELECT history, pending, last_accessed FROM sessions WHERE session_id = ?",
                     (session_id,)
                 )
                 row = cursor.fetchone()
@@ -81,6 +85,12 @@ class SQLiteSessionStore(SessionStore):
                         history = json.loads(history_json)
                     except json.JSONDecodeError:
                         history = []
+                    pending = None
+                    if row["pending"]:
+                        try:
+                            pending = json.loads(decrypt_data(row["pending"]))
+                        except json.JSONDecodeError:
+                            pending = None
                     
                     # Update last_accessed on read to prevent expiring active sessions
                     now = time.time()
@@ -89,31 +99,33 @@ class SQLiteSessionStore(SessionStore):
                         (now, session_id)
                     )
                     
-                    return {"history": history, "last_accessed": now}
+                    return {"history": history, "pending": pending, "last_accessed": now}
         except Exception as e:
             logger.error(f"Error fetching session {session_id}: {e}")
             
         # Return default empty structured dict if missing or error
-        return {"history": [], "last_accessed": time.time()}
+        return {"history": [], "pending": None, "last_accessed": time.time()}
 
-    def set(self, session_id: str, history: List[Dict[str, str]]) -> None:
+    def set(self, session_id: str, history: List[Dict[str, str]], pending: Optional[Dict[str, Any]] = None) -> None:
         try:
             now = time.time()
             history_json = json.dumps(history)
             # Encrypt if encryption is enabled
             from agentzero.encryption import encrypt_data
             history_json = encrypt_data(history_json)
+            pending_json = encrypt_data(json.dumps(pending)) if pending else None
             
             with self._get_connection() as conn:
                 conn.execute(
                     """
-                    INSERT INTO sessions (session_id, history, last_accessed)
-                    VALUES (?, ?, ?)
+                    INSERT INTO sessions (session_id, history, pending, last_accessed)
+                    VALUES (?, ?, ?, ?)
                     ON CONFLICT(session_id) DO UPDATE SET
                         history = excluded.history,
+                        pending = excluded.pending,
                         last_accessed = excluded.last_accessed
                     """,
-                    (session_id, history_json, now)
+                    (session_id, history_json, pending_json, now)
                 )
         except Exception as e:
             logger.error(f"Error saving session {session_id}: {e}")
@@ -0,0 +1,198 @@
+"""
+Slot-filling continuations.
+When an agent asks the user for a missing parameter, its ask_user step also names
+the action it means to run, the parameters it already has and the missing ones:
+
+  {"type": "ask_user", "params": {"question": "What time?", "action": "add_event",
+   "known": {"name": "Dentist", "date": "2026-02-20"}, "missing": ["time"]}}
+
+The executor records that as state.pending, which the API persists next to the
+session history. On the next turn supervisor_node calls resume(): the answer is
+merged into the pending action locally (dates/times via the command parser's
+resolver, a short free-text answer for a single text slot) or, failing that, with
+one tiny extraction call ("slot_filler" node, schema = the missing slots), and the
+completed plan goes straight to policy_enforcer -> executor. Skipped: the
+supervisor routing call and the agent replanning call.
+
+Replies that look like a new request (a command, a question of their own such as
+"what's the weather", a confident route to another domain), small talk or "never
+mind" drop the continuation. A reply is only taken verbatim for a text slot when
+it reads as an answer; otherwise the extraction call decides, and answers that
+still don't fill every slot fall back to the normal path.
+Enable with SLOT_FILLING_ENABLED.
+"""
+import os
+import re
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dateutil import tz
+from dotenv import load_dotenv
+
+from agentzero.agent_state import AgentState
+
+logger = logging.getLogger("agentzero.slot_filling")
+
+load_dotenv()
+
+SLOT_FILLING_ENABLED = os.getenv("SLOT_FILLING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Longest free-text answer taken verbatim for a text slot ("Dentist appointment")
+SLOT_FILLING_MAX_TEXT_WORDS = int(os.getenv("SLOT_FILLING_MAX_TEXT_WORDS", "8"))
+
+ASK_USER_NOTE = """When you use 'ask_user', also say what you will do with the answer:
+'action' (the tool you intend to run), 'known' (the parameters you already have, in that tool's format) and 'missing' (the parameter names you are asking for).
+Example: {"type": "ask_user", "params": {"question": "What time should I schedule the dentist?", "action": "add_event", "known": {"name": "Dentist", "date": "2026-02-20"}, "missing": ["time"]}}"""
+
+_CANCEL = re.compile(r"^\s*(never ?mind|cancel( that| it)?|forget (it|that|about it)|no thanks?|stop)\b", re.I)
+# A question or request of its own rather than an answer ("what's the weather", "can you ...")
+_NEW_REQUEST = re.compile(r"^\s*(what|what's|whats|how|why|where|who|which|whose|can you|could you|would you|will you|"
+                          r"do you|did you|are you|is there|tell me|show me|give me|explain)\b", re.I)
+
+SLOT_FILLER_PROMPT = """You extract values from a user's answer to a question.
+Return ONLY a JSON object with the requested fields. Leave a field out if the answer doesn't contain it,
+and return {} if the reply isn't an answer to the question at all (e.g. a new, unrelated request).
+Dates are YYYY-MM-DD, times HH:MM (24h), date-times YYYY-MM-DD HH:MM.
+"""
+
+
+def ask_user_note() -> Optional[str]:
+    """Extra instruction for planners' ask_user steps (None when slot filling is off)."""
+    return ASK_USER_NOTE if SLOT_FILLING_ENABLED else None
+
+
+def _action_schemas() -> Dict[str, dict]:
+    from agentzero.agents.calendar_agent import CALENDAR_ACTIONS
+    from agentzero.agents.task_agent import TASK_ACTIONS
+    from agentzero.agents.knowledge_agent import KNOWLEDGE_ACTIONS
+    from agentzero.llm_schemas import action_name
+    return {action_name(a): a for a in (*CALENDAR_ACTIONS, *TASK_ACTIONS, *KNOWLEDGE_ACTIONS)}
+
+
+def _slot_schemas(action: str) -> Dict[str, dict]:
+    return _action_schemas()[action]["properties"]["params"]["properties"]
+
+
+def pending_from(params: dict, domain: Optional[str]) -> Optional[dict]:
+    """The continuation described by an ask_user step, or None if it doesn't name a usable one."""
+    from agentzero.fused_planner import DOMAIN_ACTIONS
+    if not SLOT_FILLING_ENABLED or not isinstance(params, dict):
+        return None
+    action, missing = params.get("action"), params.get("missing")
+    if action not in _action_schemas() or not isinstance(missing, list) or not missing:
+        return None
+    slots = _slot_schemas(action)
+    if any(slot not in slots for slot in missing):
+        return None
+    owner = next((d for d, actions in DOMAIN_ACTIONS.items() if action in actions), domain)
+    known = params.get("known") if isinstance(params.get("known"), dict) else {}
+    return {
+        "domain": owner,
+        "action": action,
+        "params": {k: v for k, v in known.items() if k in slots and k not in missing},
+        "missing": list(missing),
+        "question": params.get("question", ""),
+    }
+
+
+def _valid(value, spec: dict) -> bool:
+    if not isinstance(value, str) or not value.strip():
+        return False
+    pattern = spec.get("pattern")
+    return not pattern or re.fullmatch(pattern, value) is not None
+
+
+def fill_locally(answer: str, missing: List[str], slots: Dict[str, dict], now: datetime) -> dict:
+    """Slot values readable from the answer without a model (unambiguous dates/times, short text)."""
+    from agentzero.command_parser import resolve_when, strip_spans, unresolved_time_words
+    from agentzero.llm_schemas import DATE, DATETIME, TEXT, TIME
+    when = resolve_when(answer, now)
+    filled, text_slots = {}, []
+    for slot in missing:
+        spec = slots.get(slot)
+        if spec == TEXT:
+            text_slots.append(slot)
+        elif when.ambiguous:
+            continue  # "at 3": let the extraction call (or the agent) decide
+        elif spec == DATE and when.day is not None:
+            filled[slot] = when.day.strftime("%Y-%m-%d")
+        elif spec == TIME and when.at is not None:
+            filled[slot] = when.at.strftime("%H:%M")
+        elif spec == DATETIME and when.at is not None:
+            filled[slot] = when.resolve(now).strftime("%Y-%m-%d %H:%M")
+    if len(text_slots) == 1 and len(filled) == len(missing) - 1:
+        text = strip_spans(answer, when.spans)
+        # Verbatim only for a short, plain answer; anything else goes to the extraction call
+        if text and len(text.split()) <= SLOT_FILLING_MAX_TEXT_WORDS and not unresolved_time_words(text):
+            filled[text_slots[0]] = text
+    return filled
+
+
+async def extract(answer: str, question: str, missing: List[str], slots: Dict[str, dict], now: datetime) -> dict:
+    """One small structured call for the slots the local pass couldn't fill."""
+    from agentzero.agents.calendar_agent import calendar_date_context
+    from agentzero.llm_scheduler import Priority
+    from agentzero.llm_schemas import parse_json_reply
+    from agentzero.llm_service import chat_completion
+    from agentzero.prompt_builder import PromptBuilder
+    schema = {
+        "type": "object",
+        "properties": {slot: slots[slot] for slot in missing},
+        "additionalProperties": False,
+    }
+    prompt = PromptBuilder("slot_filler").system(SLOT_FILLER_PROMPT).context(calendar_date_context(now))
+    messages = prompt.user(f"Question: {question}\nAnswer: {answer}\nFields: {', '.join(missing)}").build()
+    output = await chat_completion(
+        messages=messages, stream=False, timeout=10, cache_ttl=0,
+        priority=Priority.ROUTING, node="slot_filler", json_early_stop=True, schema=schema,
+    )
+    data = parse_json_reply(output, "slot_filler")
+    return {slot: data[slot].strip() for slot in missing if _valid(data.get(slot), slots[slot])}
+
+
+async def resume(state: AgentState) -> bool:
+    """Complete state.pending with the user's answer and set the plan; False to route normally."""
+    from agentzero import command_parser
+    from agentzero.fast_router import FAST_ROUTER_MIN_CONFIDENCE, classify_rules
+    from agentzero.fused_planner import normalize_plan
+    from agentzero.metrics import MetricsCollector
+    collector = MetricsCollector()
+    pending = state.pending or {}
+    action, missing = pending.get("action"), list(pending.get("missing") or [])
+    if action not in _action_schemas() or not missing:
+        state.pending = None
+        return False
+
+    parsed = command_parser.parse(state.user_input)
+    rule = classify_rules(state.user_input)
+    elsewhere = rule is not None and rule.confidence >= FAST_ROUTER_MIN_CONFIDENCE and \
+        (rule.domain == "chat" or rule.domain != pending.get("domain"))
+    if _CANCEL.match(state.user_input) or _NEW_REQUEST.match(state.user_input) or elsewhere or \
+            (parsed is not None and parsed.confidence >= command_parser.COMMAND_PARSER_MIN_CONFIDENCE):
+        # Not an answer (a new request, small talk, "never mind"): drop the continuation
+        collector.incr("slot_filling.abandoned")
+        state.pending = None
+        return False
+
+    now = datetime.now(tz.tzlocal())
+    slots = _slot_schemas(action)
+    filled = fill_locally(state.user_input, missing, slots, now)
+    remaining = [slot for slot in missing if slot not in filled]
+    if remaining:
+        try:
+            filled.update(await extract(state.user_input, pending.get("question", ""), remaining, slots, now))
+        except Exception as e:
+            logger.warning(f"Slot extraction failed: {e}")
+        if any(slot not in filled for slot in missing):
+            collector.incr("slot_filling.fallbacks")
+            return False
+        collector.incr("slot_filling.extracted")
+    else:
+        collector.incr("slot_filling.local")
+
+    domain = pending.get("domain")
+    plan = [{"type": action, "params": {**pending.get("params", {}), **filled}}]
+    state.intent = domain
+    state.plan = normalize_plan(domain, plan)
+    state.pending = None
+    return True
@@ -0,0 +1,202 @@
+"""
+Speculative domain planning, overlapped with supervisor routing.
+While the supervisor waits on the LLM, a cheap local guess (fast_router rules or
+cached-embedding centroids, any confidence) picks the likely domain and that
+domain's agent starts planning on a copy of the state. If the supervisor agrees,
+the agent node picks the finished (or still running) plan up instead of making
+its own call; otherwise the speculation is cancelled.
+
+Speculation must not starve real work:
+  - its LLM calls run at Priority.BACKGROUND (priority_floor);
+  - it only starts when the admission scheduler has an idle slot;
+  - at most SPECULATION_MAX_INFLIGHT run at once;
+  - after SPECULATION_MAX_WASTED_PER_MINUTE discarded speculations in the last
+    minute it pauses until the window clears.
+
+Enable with SPECULATIVE_PLANNING_ENABLED=true. Counters live under "speculation.*"
+and planner time saved is observed as "speculation_saved_ms" per domain; stats()
+reports the hit rate.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from agentzero.agent_state import AgentState
+
+logger = logging.getLogger("agentzero.speculation")
+
+load_dotenv()
+
+SPECULATIVE_PLANNING_ENABLED = os.getenv("SPECULATIVE_PLANNING_ENABLED", "false").lower() in ("1", "true", "yes")
+SPECULATION_MAX_INFLIGHT = int(os.getenv("SPECULATION_MAX_INFLIGHT", "1"))
+SPECULATION_MAX_WASTED_PER_MINUTE = int(os.getenv("SPECULATION_MAX_WASTED_PER_MINUTE", "6"))
+# Confirmed speculations nobody picked up (e.g. blocked by policy) are dropped after this
+SPECULATION_TTL_SECONDS = float(os.getenv("SPECULATION_TTL_SECONDS", "60"))
+
+
+@dataclass
+class Speculation:
+    key: Tuple[Optional[str], str, Optional[str]]
+    domain: str
+    task: Optional[asyncio.Task] = None
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    created: float = field(default_factory=time.monotonic)
+
+
+_pending: Dict[tuple, Speculation] = {}
+_wasted: deque = deque()  # monotonic times of discarded speculations
+
+
+def _agent_nodes() -> dict:
+    from agentzero.agents import calendar_agent_node, knowledge_agent_node, task_agent_node
+    return {"calendar": calendar_agent_node, "task": task_agent_node, "knowledge": knowledge_agent_node}
+
+
+def _key(state: AgentState) -> Tuple[Optional[str], str, Optional[str]]:
+    # The domain is part of the key so a multi-domain request's other branches don't claim it
+    from agentzero.metrics import current_request_id
+    return (current_request_id(), state.user_input, state.intent)
+
+
+def _recent_waste() -> int:
+    cutoff = time.monotonic() - 60
+    while _wasted and _wasted[0] < cutoff:
+        _wasted.popleft()
+    return len(_wasted)
+
+
+def _inflight() -> int:
+    return sum(1 for s in _pending.values() if s.task is not None and not s.task.done())
+
+
+def _purge():
+    cutoff = time.monotonic() - SPECULATION_TTL_SECONDS
+    for spec in [s for s in _pending.values() if s.created < cutoff]:
+        _discard(spec)
+
+
+def _discard(spec: Speculation):
+    from agentzero.metrics import MetricsCollector
+    _pending.pop(spec.key, None)
+    if spec.task is not None and not spec.task.done():
+        spec.task.cancel()
+    _wasted.append(time.monotonic())
+    MetricsCollector().incr("speculation.wasted")
+
+
+async def _plan(spec: Speculation, state: AgentState) -> AgentState:
+    from agentzero.llm_scheduler import Priority, priority_floor
+    with priority_floor(Priority.BACKGROUND):
+        try:
+            return await _agent_nodes()[spec.domain](state)
+        finally:
+            spec.finished = time.perf_counter()
+
+
+def start(state: AgentState) -> Optional[Speculation]:
+    """Start planning for the guessed domain if there is spare capacity; None if not speculating."""
+    from agentzero import fast_router
+    from agentzero.llm_scheduler import get_scheduler
+    from agentzero.metrics import MetricsCollector
+    collector = MetricsCollector()
+    _purge()
+
+    route = fast_router.guess(state.user_input)
+    if route is None or route.domain not in _agent_nodes():
+        collector.incr("speculation.no_guess")
+        return None
+    scheduler = get_scheduler()
+    if scheduler.active >= scheduler.max_concurrency or scheduler.queue_depth():
+        collector.incr("speculation.skipped_busy")
+        return None
+    if _inflight() >= SPECULATION_MAX_INFLIGHT:
+        collector.incr("speculation.skipped_inflight")
+        return None
+    if _recent_waste() >= SPECULATION_MAX_WASTED_PER_MINUTE:
+        collector.incr("speculation.skipped_waste_cap")
+        return None
+
+    spec_state = state.model_copy(deep=True)
+    spec_state.intent = route.domain
+    spec = Speculation(_key(spec_state), route.domain)
+    stale = _pending.get(spec.key)
+    if stale is not None:
+        _discard(stale)
+    spec.task = asyncio.create_task(_plan(spec, spec_state))
+    _pending[spec.key] = spec
+    collector.incr("speculation.started")
+    return spec
+
+
+def resolve(spec: Speculation, domains: List[str]):
+    """Keep the speculation if the supervisor routed to its domain, cancel it otherwise."""
+    from agentzero.metrics import MetricsCollector
+    if spec.domain in domains:
+        MetricsCollector().incr("speculation.hits")
+        return
+    MetricsCollector().incr("speculation.misses")
+    _discard(spec)
+
+
+async def take(state: AgentState) -> Optional[AgentState]:
+    """The confirmed speculative plan for this request merged into `state`, or None."""
+    from agentzero.metrics import MetricsCollector
+    spec = _pending.pop(_key(state), None)
+    if spec is None:
+        return None
+    if state.tool_results or state.error:
+        _discard(spec)
+        return None
+    waited = time.perf_counter()
+    try:
+        result = await spec.task
+    except Exception as e:
+        logger.warning(f"Speculative {spec.domain} plan failed, planning again: {e}")
+        return None
+    waited = time.perf_counter() - waited
+    saved_ms = max(0.0, ((spec.finished or time.perf_counter()) - spec.started - waited) * 1000)
+    MetricsCollector().observe("speculation_saved_ms", spec.domain, saved_ms)
+    state.plan = result.plan
+    state.error = result.error
+    state.step = result.step
+    return state
+
+
+def speculative_or(agent_node):
+    """Wrap a domain agent node so it uses a confirmed speculative plan when there is one."""
+    async def node(state: AgentState) -> AgentState:
+        result = await take(state)
+        return result if result is not None else await agent_node(state)
+    node.__name__ = agent_node.__name__
+    return node
+
+
+def stats() -> dict:
+    from agentzero.metrics import MetricsCollector
+    counters = MetricsCollector().get_counters()
+    hits, misses = counters.get("speculation.hits", 0), counters.get("speculation.misses", 0)
+    return {
+        "enabled": SPECULATIVE_PLANNING_ENABLED,
+        "started": counters.get("speculation.started", 0),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "wasted_last_minute": _recent_waste(),
+        "inflight": _inflight(),
+    }
+
+
+def reset():
+    """Cancel everything pending and forget the waste window (tests)."""
+    for spec in list(_pending.values()):
+        if spec.task is not None and not spec.task.done():
+            spec.task.cancel()
+    _pending.clear()
+    _wasted.clear()
@@ -0,0 +1,33 @@
+"""
+Token streaming helpers for AgentZero (LangGraph "custom" stream mode).
+Nodes forward LLM tokens to the client only when the run was started with
+config["configurable"]["stream_tokens"], so plain ainvoke() callers are unaffected.
+"""
+from typing import Callable, Optional
+
+from agentzero.llm_service import chat_completion_stream
+from agentzero.llm_scheduler import Priority
+
+TokenSink = Callable[[str], None]
+
+
+def token_sink(config: Optional[dict], node: str) -> Optional[TokenSink]:
+    """Return a callable that emits {"type": "token", ...} events, or None if not streaming."""
+    if not config or not config.get("configurable", {}).get("stream_tokens"):
+        return None
+    from langgraph.config import get_stream_writer
+    writer = get_stream_writer()
+
+    def emit(token: str):
+        writer({"type": "token", "node": node, "content": token})
+    return emit
+
+
+async def stream_chat(messages: list, sink: TokenSink, timeout: int = 120,
+                      priority: Priority = Priority.GENERATION, node: Optional[str] = None) -> str:
+    """Stream a chat completion through `sink` and return the full text."""
+    parts = []
+    async for token in chat_completion_stream(messages=messages, timeout=timeout, priority=priority, node=node):
+        parts.append(token)
+        sink(token)
+    return "".join(parts).strip()
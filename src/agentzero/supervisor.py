@@ -1,7 +1,15 @@
-import json
-import re
+import os
+import time
+
+from dotenv import load_dotenv
+
 from agentzero.agent_state import AgentState
+from agentzero import command_parser, fast_router, slot_filling, speculation
+from agentzero.llm_cache import LLM_CACHE_TTL
 from agentzero.llm_service import chat_completion
+from agentzero.llm_scheduler import Priority
+from agentzero.prompt_builder import PromptBuilder
+from agentzero.llm_schemas import enum_object, parse_json_reply
 
 SUPERVISOR_PROMPT = """You are the Supervisor Router for a multi-agent system.
 Your job is to route the user's request to the correct specialized sub-agent based on the conversation history.
@@ -14,14 +22,57 @@ Available Agents:
 
 Analyze the user's latest input, alongside the context of the conversation history.
 CRITICAL: If the user's latest input is a direct response to a clarifying question asked previously by a sub-agent (e.g. providing a time for an event, or a name for a task), YOU MUST route it to that same sub-agent domain so it can finish its job!
+"""
 
-JSON FORMAT REQUIREMENT:
+# Reply format; MULTI_DOMAIN_PROMPT replaces it when multi-domain routing is on
+SINGLE_DOMAIN_FORMAT = """JSON FORMAT REQUIREMENT:
 You must respond with ONLY a valid JSON object matching this schema:
 {"domain": "calendar|task|knowledge|chat"}
 
 DO NOT wrap the JSON in markdown blocks (e.g. ```json). DO NOT output any conversational text. ONLY raw JSON.
 """
 
+SUPERVISOR_SCHEMA = enum_object("domain", ["calendar", "task", "knowledge", "chat"])
+
+load_dotenv()
+
+# Let one message route to several domains ({"domains": [...]}) and fan out to their agents
+MULTI_DOMAIN_ENABLED = os.getenv("MULTI_DOMAIN_ENABLED", "false").lower() in ("1", "true", "yes")
+
+MULTI_DOMAIN_PROMPT = """JSON FORMAT REQUIREMENT:
+You must respond with ONLY a valid JSON object listing the domains of the request:
+{"domains": ["calendar|task|knowledge|chat", ...]}
+If the latest input asks for things in more than one of 'calendar', 'task' and 'knowledge' (e.g. "add a task to buy milk and schedule a dentist visit Friday at 3"), list every one of them, most important first:
+{"domains": ["task", "calendar"]}
+Otherwise list exactly one domain, e.g. {"domains": ["chat"]}. Never combine 'chat' with other domains.
+
+DO NOT wrap the JSON in markdown blocks (e.g. ```json). DO NOT output any conversational text. ONLY raw JSON.
+"""
+
+MULTI_DOMAIN_SCHEMA = {
+    "type": "object",
+    "properties": {"domains": {
+        "type": "array", "minItems": 1, "maxItems": 3,
+        "items": {"type": "string", "enum": ["calendar", "task", "knowledge", "chat"]},
+    }},
+    "required": ["domains"],
+}
+
+
+def _parse_domains(data: dict) -> list:
+    """Valid, de-duplicated domains from a {"domains": [...]} or {"domain": ...} reply (chat if none)."""
+    valid_domains = {"calendar", "task", "knowledge", "chat"}
+    raw = data.get("domains")
+    if not isinstance(raw, list):
+        raw = [data.get("domain", "chat")]
+    domains = []
+    for domain in raw:
+        domain = str(domain).lower()
+        if domain in valid_domains and domain not in domains:
+            domains.append(domain)
+    actions = [d for d in domains if d != "chat"]
+    return actions or ["chat"]
+
 async def supervisor_node(state: AgentState) -> AgentState:
     from agentzero.memory import log_node
     log_node('supervisor:entry', state)
@@ -31,27 +82,64 @@ async def supervisor_node(state: AgentState) -> AgentState:
         log_node("supervisor:error", state)
         return state
 
-    messages = [{"role": "system", "content": SUPERVISOR_PROMPT}]
-    if state.chat_history:
-        # Give it a good window of history to understand conversational context
-        messages.extend(state.chat_history[-6:])
-    messages.append({"role": "user", "content": state.user_input})
+    from agentzero.metrics import MetricsCollector
+    started = time.perf_counter()
+    # An answer to the question asked last turn completes that action directly
+    if state.pending and slot_filling.SLOT_FILLING_ENABLED and await slot_filling.resume(state):
+        state.step = "supervisor"
+        MetricsCollector().observe("routing_ms", "slot_filling", (time.perf_counter() - started) * 1000)
+        state.routed_by = "slot_filling"
+        log_node('supervisor:exit', state, source=state.routed_by)
+        return state
+
+    # Simple commands come with their plan: skip routing and planning altogether
+    if command_parser.COMMAND_PARSER_ENABLED and command_parser.apply(state):
+        state.step = "supervisor"
+        MetricsCollector().observe("routing_ms", "command_parser", (time.perf_counter() - started) * 1000)
+        state.routed_by = "command_parser"
+        log_node('supervisor:exit', state, source=state.routed_by)
+        return state
+
+    route = fast_router.classify(state.user_input, state.chat_history, state.pending) if fast_router.FAST_ROUTER_ENABLED else None
+    if route is not None:
+        state.intent = route.domain
+        state.step = "supervisor"
+        MetricsCollector().observe("routing_ms", "fast_router", (time.perf_counter() - started) * 1000)
+        state.routed_by = "fast_router"
+        log_node('supervisor:exit', state, source=state.routed_by)
+        return state
+
+    # Let the likely domain's agent start planning while we wait on the model
+    speculative = speculation.start(state) if speculation.SPECULATIVE_PLANNING_ENABLED else None
+
+    # Give it a good window of history to understand conversational context
+    prompt = PromptBuilder("supervisor").system(SUPERVISOR_PROMPT)
+    prompt.system(MULTI_DOMAIN_PROMPT if MULTI_DOMAIN_ENABLED else SINGLE_DOMAIN_FORMAT)
+    prompt.history(state.chat_history, max_turns=6).user(state.user_input)
+    messages = prompt.build()
 
+    source = "llm"
     try:
-        output = await chat_completion(messages=messages, stream=False, timeout=10)
-        match = re.search(r'\{.*\}', output, re.DOTALL)
-        json_str = match.group(0) if match else '{}'
-        data = json.loads(json_str)
-        domain = data.get("domain", "chat").lower()
-        
-        valid_domains = {"calendar", "task", "knowledge", "chat"}
-        if domain not in valid_domains:
-            domain = "chat"
-            
-        state.intent = domain
+        output = await chat_completion(
+            messages=messages, stream=False, timeout=10, cache_ttl=LLM_CACHE_TTL,
+            priority=Priority.ROUTING, node="supervisor", json_early_stop=True,
+            schema=MULTI_DOMAIN_SCHEMA if MULTI_DOMAIN_ENABLED else SUPERVISOR_SCHEMA,
+        )
+        domains = _parse_domains(parse_json_reply(output, "supervisor"))
+        if not MULTI_DOMAIN_ENABLED:
+            domains = domains[:1]
+        state.intent = domains[0]
+        state.domains = domains if len(domains) > 1 else None
     except Exception as e:
         state.intent = "chat" # Safe fallback
+        source = "fallback"
+    MetricsCollector().observe("routing_ms", "supervisor_llm", (time.perf_counter() - started) * 1000)
+    if state.domains:
+        MetricsCollector().incr("supervisor.multi_domain")
+    if speculative is not None:
+        speculation.resolve(speculative, state.domains or [state.intent])
 
     state.step = "supervisor"
-    log_node('supervisor:exit', state)
+    state.routed_by = source
+    log_node('supervisor:exit', state, source=state.routed_by)
     return state
@@ -1,3 +1,4 @@
+import httpx
 import pytest
 from unittest.mock import AsyncMock
 
@@ -6,6 +7,7 @@ def mock_chat_completion(mocker):
     """Mocks chat_completion to return a controlled string."""
     mock = AsyncMock()
     mocker.patch("agentzero.supervisor.chat_completion", mock)
+    mocker.patch("agentzero.fused_planner.chat_completion", mock)
     mocker.patch("agentzero.agents.calendar_agent.chat_completion", mock)
     mocker.patch("agentzero.agents.task_agent.chat_completion", mock)
     mocker.patch("agentzero.agents.knowledge_agent.chat_completion", mock)
@@ -28,3 +30,33 @@ def base_state():
         error=None,
         step=""
     )
+
+@pytest.fixture
+def mock_llm_pool(tmp_path):
+    """Routes the pooled LLM HTTP clients to an in-process httpx.MockTransport.
+    Tests assign `pool.handler = lambda request: httpx.Response(...)`."""
+    from agentzero import llm_service
+    from agentzero.llm_pool import LLMClientPool, get_pool, set_pool
+    from agentzero.llm_cache import LLMResponseCache, set_cache
+    from agentzero.embedding_cache import EmbeddingCache, set_embedding_cache
+    from agentzero.llm_backends import LLMBackendRouter, set_router
+    from agentzero.llm_balancer import set_balancer
+    from agentzero.metrics import MetricsCollector
+
+    original = get_pool()
+    pool = LLMClientPool(transport=httpx.MockTransport(lambda request: pool.handler(request)))
+    pool.handler = lambda request: httpx.Response(404)
+    llm_service.register_providers(pool)
+    set_pool(pool)
+    set_cache(LLMResponseCache(":memory:"))
+    set_embedding_cache(EmbeddingCache(str(tmp_path / "embedding_cache")))
+    set_router(LLMBackendRouter())
+    set_balancer(None)
+    MetricsCollector().reset()
+    yield pool
+    set_pool(original)
+    set_cache(None)
+    set_embedding_cache(None)
+    set_router(LLMBackendRouter())
+    set_balancer(None)
+    MetricsCollector().reset()
@@ -0,0 +1,86 @@
+from datetime import datetime
+import pytest
+from agentzero import command_parser
+from agentzero.command_parser import parse, resolve_when
+from agentzero.memory import AuditLog
+from agentzero.supervisor import supervisor_node
+
+NOW = datetime(2026, 10, 17, 9, 30)  # a Saturday
+
+
+@pytest.mark.parametrize("text,plan", [
+    ("remind me to call mom tomorrow at 5pm",
+     [{"type": "add_task", "params": {"task": "call mom", "deadline": "2026-10-18T17:00:00"}}]),
+    ("add lunch with Sam on 2026-11-02 12:00",
+     [{"type": "add_event", "params": {"name": "lunch with Sam", "begin": "2026-11-02T12:00:00"}}]),
+    ("Schedule a meeting with Alex on 3rd of November at 2:30pm",
+     [{"type": "add_event", "params": {"name": "meeting with Alex", "begin": "2026-11-03T14:30:00"}}]),
+    ("add a task to buy milk", [{"type": "add_task", "params": {"task": "buy milk"}}]),
+    ("What's on my calendar friday?", [{"type": "list_events", "params": {"start": "2026-10-23", "end": "2026-10-23"}}]),
+    ("list my tasks", [{"type": "list_tasks", "params": {}}]),
+])
+def test_parses_into_agent_plans(text, plan):
+    result = parse(text, NOW)
+    assert result.plan == plan
+    assert result.confidence >= command_parser.COMMAND_PARSER_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("text", [
+    "remind me to call mom",               # no time: the agent asks
+    "schedule dentist visit Friday at 3",  # 3am or 3pm?
+    "add task pay rent tomorrow",          # a day but no time
+    "remind me to call mom at 5pm next week",
+    "remind me to pay rent on the 1st at 9am",
+    "add a task to submit the form by end of month at 5pm",
+    "remind me to water plants every day at 8am",
+    "schedule meeting with Bob at 3pm tomorrow until 4pm",
+    "schedule a call with Ann tomorrow at 3pm for 15 minutes",
+    "create a report for my boss friday at 5pm",  # not obviously an event
+])
+def test_ambiguous_commands_stay_below_confidence(text):
+    result = parse(text, NOW)
+    assert result is None or result.confidence < command_parser.COMMAND_PARSER_MIN_CONFIDENCE
+
+
+def test_relative_dates():
+    assert resolve_when("in 2 hours", NOW).resolve(NOW) == datetime(2026, 10, 17, 11, 30)
+    assert resolve_when("the day after tomorrow at noon", NOW).resolve(NOW) == datetime(2026, 10, 19, 12, 0)
+    assert resolve_when("at 8am", NOW).resolve(NOW) == datetime(2026, 10, 18, 8, 0)  # already past today
+    assert resolve_when("on Jan 5 at 9:15", NOW).resolve(NOW) == datetime(2027, 1, 5, 9, 15)
+    assert parse("tell me a joke", NOW) is None
+
+
+@pytest.mark.asyncio
+async def test_supervisor_skips_llm_for_parsed_command(base_state, mock_chat_completion, mocker):
+    mocker.patch.object(command_parser, "COMMAND_PARSER_ENABLED", True)
+    base_state.user_input = "list my tasks"
+    state = await supervisor_node(base_state)
+    assert state.intent == "task"
+    assert state.plan == [{"type": "list_tasks", "params": {}}]
+    mock_chat_completion.assert_not_awaited()
+
+
+def test_coverage_report(tmp_path):
+    log = AuditLog(str(tmp_path / "audit.log"))
+    for text, domain, routed_by in [("list my tasks", "task", "llm"), ("tell me a joke", "chat", "llm"),
+                                    ("remind me to call mom at 5pm", "task", "llm"),
+                                    ("remind me to call mom at 5pm", "task", "llm"),
+                                    ("remind me to stretch", "task", "llm"),
+                                    ("show my tasks", "calendar", "command_parser")]:  # its own route isn't scored
+        log.append({"step": "policy_enforcer", "domain": domain, "allowed": True, "user_input": text,
+                    "routed_by": routed_by})
+    result = command_parser.report(command_parser.load_requests(str(tmp_path / "audit.log")))
+    assert result["requests"] == 5
+    assert result["coverage"] == 0.6
+    assert result["below_confidence"] == 1
+    assert result["domain_agreement"] == 1.0
+    assert result["agreement_scored_on"] == 2
+
+
+def test_out_of_range_dates_fall_through_to_the_llm(base_state, mocker):
+    mocker.patch.object(command_parser, "COMMAND_PARSER_ENABLED", True)
+    result = parse("remind me to x in 99999999999 days at 5pm", NOW)
+    assert result is None or result.confidence < command_parser.COMMAND_PARSER_MIN_CONFIDENCE
+    base_state.user_input = "remind me to x in 99999999999 days"
+    assert command_parser.apply(base_state) is False
+    assert not base_state.plan
@@ -0,0 +1,50 @@
+"""Tests for the memory-mapped embedding cache."""
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.embedding_cache import EmbeddingCache
+from agentzero.metrics import MetricsCollector
+
+
+def test_roundtrip_and_zero_copy_view(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb"))
+    cache.put("ollama:nomic", "hello", [0.5, -1.25, 3.0])
+
+    view = cache.get_view("ollama:nomic", "hello")
+    assert isinstance(view, memoryview) and view.format == "f"
+    assert view.tolist() == [0.5, -1.25, 3.0]
+    assert cache.get("ollama:other-model", "hello") is None
+
+
+def test_survives_restart_and_ignores_torn_writes(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(path)
+    cache.put("m", "a", [1.0, 2.0])
+    cache.put("m", "b", [3.0, 4.0])
+    # Simulate a crash after the index record but before the vector bytes hit disk
+    with open(f"{path}.f32", "r+b") as f:
+        f.truncate(2 * 4 + 4)
+
+    reopened = EmbeddingCache(path)
+    assert reopened.get("m", "a") == [1.0, 2.0]
+    assert reopened.get("m", "b") is None
+    assert len(reopened) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_embedding_hits_cache(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"embedding": [0.25, 0.75]})
+
+    mock_llm_pool.handler = handler
+    assert await llm_service.get_embedding("remember tea") == [0.25, 0.75]
+    assert await llm_service.get_embedding("remember tea") == [0.25, 0.75]
+
+    assert len(calls) == 1
+    counters = MetricsCollector().get_counters()
+    assert counters["embedding_cache.hits"] == 1
+    assert counters["embedding_cache.misses"] == 1
@@ -0,0 +1,69 @@
+"""Tests for batched embeddings and the LongTermMemory embedding function."""
+import json
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.embeddings import LLMEmbeddingFunction
+from agentzero.embedding_cache import EmbeddingCache, set_embedding_cache
+from agentzero.memory import LongTermMemory
+
+
+def fake_vector(text: str) -> list:
+    return [float(len(text)), float(ord(text[0])), 1.0]
+
+
+def embed_handler(batches: list, poison: str = None):
+    def handler(request: httpx.Request):
+        inputs = json.loads(request.content)["input"]
+        batches.append(inputs)
+        if poison in inputs:
+            return httpx.Response(500, json={"error": "bad input"})
+        return httpx.Response(200, json={"embeddings": [fake_vector(t) for t in inputs]})
+    return handler
+
+
+@pytest.fixture
+def ollama(mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    mocker.patch("agentzero.llm_service.asyncio.sleep", new=mocker.AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_batches_preserve_order(mock_llm_pool, ollama):
+    batches = []
+    mock_llm_pool.handler = embed_handler(batches)
+    texts = [f"fact {i}" for i in range(10)]
+
+    vectors = await llm_service.get_embeddings(texts, batch_size=4)
+
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert vectors == [fake_vector(t) for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_partial_failure_is_isolated(mock_llm_pool, ollama):
+    batches = []
+    mock_llm_pool.handler = embed_handler(batches, poison="b")
+
+    vectors = await llm_service.get_embeddings(["a", "b", "c", "d"], batch_size=4, max_retries=0)
+
+    assert vectors[1] is None
+    assert vectors[0] == fake_vector("a")
+    assert vectors[2:] == [fake_vector("c"), fake_vector("d")]
+
+
+def test_long_term_memory_uses_batched_function(tmp_path, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    set_embedding_cache(EmbeddingCache(str(tmp_path / "embedding_cache")))
+    batches = []
+    ef = LLMEmbeddingFunction(batch_size=2)
+    ef._client = httpx.Client(transport=httpx.MockTransport(embed_handler(batches)))
+
+    ltm = LongTermMemory(str(tmp_path / "vdb"), embedding_function=ef)
+    ltm.add_many(["User likes tea", "User runs on Sundays", "Dentist is Dr. Rao"])
+
+    assert [len(b) for b in batches] == [2, 1]
+    # The query text was embedded on add, so the query path is a cache hit
+    assert ltm.query("User likes tea", top_k=1) == ["User likes tea"]
+    assert len(batches) == 2
+    set_embedding_cache(None)
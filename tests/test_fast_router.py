@@ -0,0 +1,80 @@
+import json
+import pytest
+from agentzero import fast_router
+from agentzero.fast_router import CentroidModel, classify, classify_rules
+from agentzero.supervisor import supervisor_node
+
+
+@pytest.fixture(autouse=True)
+def no_model():
+    fast_router.set_model(None)
+    yield
+    fast_router.set_model(None)
+
+
+@pytest.mark.parametrize("text,domain", [
+    ("hi", "chat"),
+    ("Thanks!", "chat"),
+    ("list my tasks", "task"),
+    ("remind me to call mom", "task"),
+    ("schedule a meeting with Sam tomorrow", "calendar"),
+    ("remember that my passport expires in May", "knowledge"),
+])
+def test_rules(text, domain):
+    assert classify_rules(text).domain == domain
+
+
+def test_conflicting_or_unknown_inputs_defer():
+    assert classify_rules("remind me about the meeting") is None  # task vs calendar
+    assert classify_rules("what's the capital of France") is None
+
+
+@pytest.mark.parametrize("text", [
+    "Recommend a good book to read",
+    "What happened at the event yesterday?",
+    "explain what a calendar year is",
+    "What is a good habit for focus?",
+])
+def test_bare_keywords_stay_below_threshold(text):
+    assert classify(text) is None
+
+
+def test_followup_to_a_question_defers_to_llm():
+    history = [{"role": "user", "content": "add a task"},
+               {"role": "assistant", "content": "What should the task be called?"}]
+    assert classify("hi", history) is None
+
+
+def test_centroid_model_votes_only_with_a_clear_margin():
+    model = CentroidModel.fit([[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0], [0, 0, 1]],
+                              ["task", "task", "calendar", "chat"])
+    assert model.predict([1, 0.05, 0]).domain == "task"
+    assert model.predict([1, 1, 0]) is None
+
+
+@pytest.mark.asyncio
+async def test_supervisor_skips_llm_on_fast_path(base_state, mock_chat_completion, mocker):
+    mocker.patch.object(fast_router, "FAST_ROUTER_ENABLED", True)
+    base_state.user_input = "list my tasks"
+    state = await supervisor_node(base_state)
+    assert state.intent == "task"
+    mock_chat_completion.assert_not_awaited()
+
+
+def test_report_against_logged_decisions(tmp_path):
+    log = tmp_path / "node_trace.log"
+    entries = [
+        {"step": "supervisor:exit", "user_input": "list my tasks", "intent": "task", "source": "llm"},
+        {"step": "supervisor:exit", "user_input": "hello", "intent": "chat", "source": "llm"},
+        {"step": "supervisor:exit", "user_input": "book a dentist slot", "intent": "task", "source": "llm"},
+        {"step": "supervisor:exit", "user_input": "tell me a joke", "intent": "chat", "source": "llm"},
+        {"step": "supervisor:exit", "user_input": "show my tasks", "intent": "task", "source": "fast_router"},
+        {"step": "supervisor:exit", "user_input": "add a task to x", "intent": "task", "source": "command_parser"},
+        {"step": "executor:exit", "user_input": "hello", "intent": "chat"},
+    ]
+    log.write_text("\n".join(json.dumps(e) for e in entries))
+    result = fast_router.report(fast_router.load_decisions(str(log)))
+    assert result["decisions"] == 4
+    assert result["coverage"] == 0.75
+    assert result["accuracy_when_confident"] == pytest.approx(2 / 3, abs=1e-3)
+    assert result["confusion"]["task"] == {"task": 1, "calendar": 1}
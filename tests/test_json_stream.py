@@ -0,0 +1,55 @@
+"""Tests for incremental JSON detection and early-stopped JSON calls."""
+import json
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.json_stream import JSONObjectScanner
+from agentzero.metrics import MetricsCollector
+
+
+def _feed(chunks):
+    scanner = JSONObjectScanner()
+    for i, chunk in enumerate(chunks):
+        if scanner.feed(chunk):
+            return scanner, i
+    return scanner, None
+
+
+def test_scanner_completes_on_balanced_object_across_chunks():
+    scanner, at = _feed(['Sure! {"pl', 'an": [{"type": "ask_user", ', '"params": {"question": "When?"}}]', '}', " Hope that helps"])
+    assert at == 3
+    assert scanner.value == {"plan": [{"type": "ask_user", "params": {"question": "When?"}}]}
+
+
+def test_scanner_ignores_braces_inside_strings_and_stray_braces():
+    scanner, at = _feed(['I think { maybe ', '{"domain": "chat", "note": "a } b \\" {"}', '\nmore'])
+    assert at == 1
+    assert scanner.value["note"] == 'a } b " {'
+
+
+def test_scanner_incomplete_object():
+    scanner, at = _feed(['{"domain": "cal'])
+    assert at is None and not scanner.complete
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_stops_after_json(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    pieces = ['{"domain"', ': "calendar"', "}", " Because", " the user", " mentioned", " a meeting."]
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        body = "".join(json.dumps({"message": {"content": p}, "done": False}) + "\n" for p in pieces)
+        return httpx.Response(200, text=body)
+
+    mock_llm_pool.handler = handler
+    result = await llm_service.chat_completion(
+        [{"role": "user", "content": "meeting tomorrow"}], cache_ttl=0, node="supervisor", json_early_stop=True,
+    )
+
+    assert result == '{"domain": "calendar"}'
+    assert requests[0]["stream"] is True
+    counters = MetricsCollector().get_counters()
+    assert counters["llm.json_early_stops"] == 1
+    assert counters["llm.json_early_stop_saved_tokens"] == 32 - 3  # supervisor num_predict minus chunks read
@@ -0,0 +1,91 @@
+"""Tests for multi-backend failover, circuit breakers and hedging."""
+import asyncio
+import httpx
+import pytest
+from agentzero import llm_backends, llm_service
+from agentzero.llm_backends import CircuitBreaker, LLMBackendRouter, LLMUnavailableError, set_router
+
+
+def test_breaker_opens_then_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure(now=0)
+    assert breaker.allow(now=0)
+    breaker.record_failure(now=1)
+    assert breaker.state == "open"
+    assert not breaker.allow(now=5)
+
+    assert breaker.allow(now=11)  # half-open probe
+    assert not breaker.allow(now=11)  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow(now=12)
+
+
+@pytest.mark.asyncio
+async def test_chat_fails_over_to_next_backend(mock_llm_pool, mocker):
+    mocker.patch.object(llm_backends, "LLM_BACKENDS", ["ollama", "cloudflare"])
+
+    def handler(request):
+        if "/api/chat" in request.url.path:
+            return httpx.Response(500)
+        return httpx.Response(200, json={"success": True, "result": {"response": "from cloudflare"}})
+
+    mock_llm_pool.handler = handler
+    result = await llm_service.chat_completion([{"role": "user", "content": "hi"}], cache_ttl=0)
+
+    assert result == "from cloudflare"
+    stats = llm_backends.get_router().stats()
+    assert stats["backends"]["ollama"]["failures"] == 1
+    assert stats["failovers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_backend_and_all_down_raises(mock_llm_pool, mocker):
+    mocker.patch.object(llm_backends, "LLM_BACKENDS", ["ollama"])
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    mock_llm_pool.handler = handler
+    for _ in range(llm_backends.LLM_BREAKER_FAILURES):
+        with pytest.raises(LLMUnavailableError):
+            await llm_service.chat_completion([{"role": "user", "content": "hi"}], cache_ttl=0)
+
+    with pytest.raises(LLMUnavailableError, match="circuit open"):
+        await llm_service.chat_completion([{"role": "user", "content": "hi"}], cache_ttl=0)
+    assert len(calls) == llm_backends.LLM_BREAKER_FAILURES
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_when_primary_is_slow(mock_llm_pool, mocker):
+    router = LLMBackendRouter(hedge_enabled=True, hedge_percentile=95, hedge_min_delay_ms=10)
+    set_router(router)
+    for _ in range(llm_backends.LLM_HEDGE_MIN_SAMPLES):
+        router.backend("slow").observe("supervisor", 20)
+
+    async def call(backend):
+        if backend == "slow":
+            await asyncio.sleep(5)
+        return backend
+
+    mocker.patch.object(llm_backends, "LLM_BACKENDS", ["slow", "fast"])
+    assert await router.call(call, node="supervisor") == "fast"
+    stats = router.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    assert router.backend("slow").breaker.state == "closed"  # the cancelled loser isn't a failure
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_token(mock_llm_pool, mocker):
+    mocker.patch.object(llm_backends, "LLM_BACKENDS", ["ollama", "cloudflare"])
+
+    def handler(request):
+        if "/api/chat" in request.url.path:
+            return httpx.Response(500)
+        body = 'data: {"response": "Hel"}\n\ndata: {"response": "lo"}\n\ndata: [DONE]\n\n'
+        return httpx.Response(200, text=body)
+
+    mock_llm_pool.handler = handler
+    tokens = [t async for t in llm_service.chat_completion_stream([{"role": "user", "content": "hi"}])]
+    assert "".join(tokens) == "Hello"
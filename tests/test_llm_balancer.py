@@ -0,0 +1,56 @@
+import asyncio
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_balancer import OllamaBalancer, set_balancer
+
+URLS = ["http://box1:11434", "http://box2:11434"]
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_avoids_busy_endpoint():
+    balancer = OllamaBalancer(URLS, affinity=False)
+    async with balancer.lease() as first:
+        assert balancer.pick().url != first.url
+    assert balancer.endpoints[0].outstanding == balancer.endpoints[1].outstanding == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_is_skipped():
+    balancer = OllamaBalancer(URLS, affinity=False)
+    bad = balancer.endpoints[0]
+    for _ in range(bad.breaker.failure_threshold):
+        bad.breaker.record_failure()
+    assert {balancer.pick().url for _ in range(5)} == {URLS[1]}
+
+
+def test_ewma_prefers_faster_endpoint():
+    balancer = OllamaBalancer(URLS, strategy="ewma", affinity=False)
+    balancer.endpoints[0].observe(900, 0.3)
+    balancer.endpoints[1].observe(200, 0.3)
+    assert balancer.pick().url == URLS[1]
+
+
+@pytest.mark.asyncio
+async def test_affinity_sticks_until_overloaded():
+    balancer = OllamaBalancer(URLS, affinity_slack=1)
+    home = balancer.pick("session-a")
+    assert balancer.pick("session-a") is home
+    home.outstanding = 3
+    assert balancer.pick("session-a") is not home
+
+
+@pytest.mark.asyncio
+async def test_requests_spread_across_endpoints(mock_llm_pool):
+    hosts = []
+
+    async def handler(request):
+        hosts.append(request.url.host)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"message": {"content": "ok"}, "done": True})
+
+    mock_llm_pool.transport = httpx.MockTransport(handler)
+    set_balancer(OllamaBalancer(URLS, affinity=False))
+    await asyncio.gather(*(llm_service.chat_completion([{"role": "user", "content": f"q{i}"}], cache_ttl=0)
+                           for i in range(4)))
+    assert sorted(set(hosts)) == ["box1", "box2"]
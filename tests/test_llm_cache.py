@@ -0,0 +1,87 @@
+"""Tests for the exact-match LLM response cache."""
+import asyncio
+import time
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_cache import LLMResponseCache, make_cache_key
+from agentzero.metrics import MetricsCollector
+
+MESSAGES = [{"role": "system", "content": "route"}, {"role": "user", "content": "what are my tasks"}]
+
+
+@pytest.fixture
+def counting_ollama(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"message": {"content": '{"domain": "task"}'}})
+
+    mock_llm_pool.handler = handler
+    return calls
+
+
+def test_key_depends_on_all_inputs():
+    base = make_cache_key("ollama", "llama3", MESSAGES)
+    assert base == make_cache_key("ollama", "llama3", list(MESSAGES))
+    assert base != make_cache_key("cloudflare", "llama3", MESSAGES)
+    assert base != make_cache_key("ollama", "mistral", MESSAGES)
+    assert base != make_cache_key("ollama", "llama3", MESSAGES, {"temperature": 0})
+
+
+def test_lru_eviction_and_disk_fallback(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"), max_entries=2)
+    for i in range(3):
+        cache.set(f"k{i}", f"v{i}", ttl=60)
+    assert "k0" not in cache._lru
+    # Evicted from memory but still served from SQLite, and survives a "restart"
+    assert cache.get("k0") == "v0"
+    assert LLMResponseCache(str(tmp_path / "cache.db")).get("k2") == "v2"
+
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    cache.set("k", "v", ttl=60)
+    cache._lru["k"] = ("v", time.time() - 1)
+    with cache._lock:
+        cache._conn.execute("UPDATE llm_cache SET expires_at = ?", (time.time() - 1,))
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_hits_cache(counting_ollama):
+    first = await llm_service.chat_completion(MESSAGES, cache_ttl=60)
+    second = await llm_service.chat_completion(MESSAGES, cache_ttl=60)
+    assert first == second == '{"domain": "task"}'
+    assert len(counting_ollama) == 1
+    counters = MetricsCollector().get_summary()["counters"]
+    assert counters["llm_cache.hits"] == 1
+    assert counters["llm_cache.misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_site_opt_out(counting_ollama):
+    await llm_service.chat_completion(MESSAGES, cache_ttl=0)
+    await llm_service.chat_completion(MESSAGES, cache_ttl=0)
+    assert len(counting_ollama) == 2
+
+
+@pytest.mark.asyncio
+async def test_not_cached_by_default(counting_ollama):
+    await llm_service.chat_completion(MESSAGES)
+    await llm_service.chat_completion(MESSAGES)
+    assert len(counting_ollama) == 2
+
+
+@pytest.mark.asyncio
+async def test_disk_io_runs_off_the_event_loop(tmp_path, mocker):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"), max_entries=1)
+    to_thread = mocker.spy(asyncio, "to_thread")
+    await cache.aset("k0", "v0", ttl=60)
+    await cache.aset("k1", "v1", ttl=60)
+    assert await cache.aget("k1") == "v1"  # memory hit: no thread hop
+    assert to_thread.call_count == 2
+    assert await cache.aget("k0") == "v0"  # evicted from memory, read from SQLite in a thread
+    assert to_thread.call_count == 3
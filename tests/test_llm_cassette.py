@@ -0,0 +1,69 @@
+import json
+import time
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_cassette import CassetteMissError, CassetteTransport
+from agentzero.llm_pool import LLMClientPool, set_pool
+from agentzero.llm_standin import LatencyModel, StandInLLM, create_app
+from agentzero.metrics import MetricsCollector
+
+MESSAGES = [{"role": "system", "content": "route"}, {"role": "user", "content": "Schedule a meeting"}]
+
+
+def _use(transport):
+    pool = LLMClientPool(transport=transport)
+    llm_service.register_providers(pool)
+    set_pool(pool)
+
+
+async def _record(mock_llm_pool, path, ttft_ms=0.0):
+    latency = LatencyModel(ttft_ms=ttft_ms, tokens_per_sec=0, prefill_tps=0, jitter=0, embed_ms_per_input=0)
+    inner = httpx.ASGITransport(app=create_app(StandInLLM(latency, embed_dim=4)))
+    _use(CassetteTransport("record", path, inner))
+    reply = await llm_service.chat_completion(MESSAGES, node="supervisor", cache_ttl=0)
+    tokens = [t async for t in llm_service.chat_completion_stream(MESSAGES, node="executor")]
+    return reply, tokens
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(mock_llm_pool, tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    reply, tokens = await _record(mock_llm_pool, path)
+    entries = [json.loads(line) for line in open(path)]
+    assert [e["node"] for e in entries] == ["supervisor", "executor"]
+    assert entries[0]["request"]["messages"] == MESSAGES
+
+    _use(CassetteTransport("replay", path))
+    assert await llm_service.chat_completion(MESSAGES, node="supervisor", cache_ttl=0) == reply
+    assert [t async for t in llm_service.chat_completion_stream(MESSAGES, node="executor")] == tokens
+    assert MetricsCollector().get_counters()["llm_cassette.replayed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_replay_falls_back_to_node_order(mock_llm_pool, tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    reply, _ = await _record(mock_llm_pool, path)
+    _use(CassetteTransport("replay", path))
+    changed = [MESSAGES[0], {"role": "user", "content": "Schedule a meeting at 10:01"}]
+    assert await llm_service.chat_completion(changed, node="supervisor", cache_ttl=0) == reply
+    assert MetricsCollector().get_counters()["llm_cassette.fallback_matches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_replay_miss_raises(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    path.write_text("")
+    transport = CassetteTransport("replay", str(path))
+    with pytest.raises(CassetteMissError):
+        await transport.handle_async_request(httpx.Request("POST", "http://x/api/chat", json={}))
+
+
+@pytest.mark.asyncio
+async def test_replay_reproduces_latency(mock_llm_pool, tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    await _record(mock_llm_pool, path, ttft_ms=100)
+    _use(CassetteTransport("replay", path, latency_scale=1.0))
+    start = time.perf_counter()
+    await llm_service.chat_completion(MESSAGES, node="supervisor", cache_ttl=0)
+    assert time.perf_counter() - start >= 0.08
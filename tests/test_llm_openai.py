@@ -0,0 +1,48 @@
+"""Tests for the OpenAI-compatible provider, run against the local stand-in server."""
+import json
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_standin import LatencyModel, StandInLLM, create_app
+from agentzero.metrics import MetricsCollector
+
+MESSAGES = [{"role": "system", "content": "route"}, {"role": "user", "content": "Schedule a meeting"}]
+
+
+@pytest.fixture
+def openai_standin(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "openai")
+    latency = LatencyModel(ttft_ms=0, tokens_per_sec=0, prefill_tps=0, jitter=0, embed_ms_per_input=0)
+    mock_llm_pool.transport = httpx.ASGITransport(app=create_app(StandInLLM(latency, embed_dim=4)))
+    return mock_llm_pool
+
+
+@pytest.mark.asyncio
+async def test_chat_completion(openai_standin):
+    reply = await llm_service.chat_completion(MESSAGES, node="supervisor", cache_ttl=0)
+    assert reply == '{"domain": "calendar"}'
+    calls = MetricsCollector().get_summary()["llm_calls"]["supervisor"]
+    assert calls["prompt_tokens"]["avg"] > 0
+
+
+@pytest.mark.asyncio
+async def test_streaming_and_json_early_stop(openai_standin):
+    tokens = [t async for t in llm_service.chat_completion_stream(MESSAGES, node="executor")]
+    assert "".join(tokens).startswith("Sure!")
+    reply = await llm_service.chat_completion(MESSAGES, node="supervisor", cache_ttl=0, json_early_stop=True)
+    assert json.loads(reply) == {"domain": "calendar"}
+
+
+@pytest.mark.asyncio
+async def test_embeddings_batch(openai_standin):
+    vectors = await llm_service.get_embeddings(["alpha", "beta"])
+    assert len(vectors) == 2 and len(vectors[0]) == 4
+    # Served from the embedding cache (stored as float32)
+    assert await llm_service.get_embedding("alpha") == pytest.approx(vectors[0], rel=1e-6)
+
+
+def test_schema_uses_json_schema_response_format():
+    payload = {}
+    llm_service._apply_schema("openai", payload, {"type": "object"})
+    assert payload["response_format"]["type"] == "json_schema"
+    assert payload["response_format"]["json_schema"]["schema"] == {"type": "object"}
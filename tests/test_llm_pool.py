@@ -0,0 +1,41 @@
+"""Tests for the shared LLM HTTP client pool."""
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_pool import _record_trace_event
+from agentzero.metrics import MetricsCollector
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_across_calls(mock_llm_pool, mocker):
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"message": {"content": "pong"}})
+
+    mock_llm_pool.handler = handler
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+
+    first = mock_llm_pool.client("ollama")
+    for _ in range(2):
+        assert await llm_service.chat_completion([{"role": "user", "content": "ping"}], cache_ttl=0) == "pong"
+
+    assert mock_llm_pool.client("ollama") is first
+    assert len(seen) == 2
+    await mock_llm_pool.aclose()
+    assert mock_llm_pool.client("ollama") is not first  # recreated lazily after close
+
+
+@pytest.mark.asyncio
+async def test_reuse_stats_from_trace_events(mock_llm_pool):
+    mock_llm_pool.client("ollama")
+    _record_trace_event("ollama", "connection.connect_tcp.complete")
+    for _ in range(3):
+        _record_trace_event("ollama", "http11.send_request_headers.started")
+
+    stats = mock_llm_pool.stats()["ollama"]
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 2
+    assert MetricsCollector().get_summary()["counters"]["llm_pool.ollama.requests"] == 3
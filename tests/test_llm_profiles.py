@@ -0,0 +1,43 @@
+"""Tests for per-node LLM profiles."""
+import json
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_profiles import get_profile
+from agentzero.llm_warmup import configured_models
+
+
+def test_env_overrides_profile_fields(monkeypatch):
+    monkeypatch.setenv("LLM_PROFILE_SUPERVISOR_MODEL", "qwen2.5:1.5b")
+    monkeypatch.setenv("LLM_PROFILE_SUPERVISOR_STOP", "\n\n|END")
+    profile = get_profile("supervisor")
+
+    assert profile.model == "qwen2.5:1.5b"
+    assert profile.num_predict == 32  # default kept
+    assert profile.ollama_options()["stop"] == ["\n\n", "END"]
+    assert get_profile(None).ollama_options() == {}
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_sends_node_profile(mock_llm_pool, mocker, monkeypatch):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    monkeypatch.setenv("LLM_PROFILE_SUPERVISOR_MODEL", "tiny-router")
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={"message": {"content": '{"domain": "chat"}'}})
+
+    mock_llm_pool.handler = handler
+    await llm_service.chat_completion([{"role": "user", "content": "hi"}], cache_ttl=0, node="supervisor")
+    await llm_service.chat_completion([{"role": "user", "content": "hi"}], cache_ttl=0, node="executor")
+
+    assert payloads[0]["model"] == "tiny-router"
+    assert payloads[0]["options"] == {"num_predict": 32, "temperature": 0.0}
+    assert payloads[1]["model"] == llm_service.OLLAMA_MODEL
+    assert payloads[1]["options"]["num_predict"] == 512
+
+
+def test_profile_models_are_warmed_up(monkeypatch):
+    monkeypatch.setenv("LLM_PROFILE_SUPERVISOR_MODEL", "tiny-router")
+    assert ("chat", "tiny-router") in configured_models()
@@ -0,0 +1,90 @@
+"""Tests for the priority-aware LLM admission scheduler."""
+import asyncio
+import pytest
+from agentzero.llm_scheduler import LLMAdmissionScheduler, Priority
+from agentzero.metrics import MetricsCollector
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    MetricsCollector().reset()
+    yield
+    MetricsCollector().reset()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    scheduler = LLMAdmissionScheduler(max_concurrency=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with scheduler.slot(Priority.GENERATION, "executor"):
+            peak = max(peak, scheduler.active)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[call() for _ in range(6)])
+    assert peak == 2
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_routing_admitted_before_background():
+    scheduler = LLMAdmissionScheduler(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(Priority.GENERATION, "executor"):
+            await release.wait()
+
+    async def call(priority, name):
+        async with scheduler.slot(priority, name):
+            order.append(name)
+
+    hold = asyncio.ensure_future(holder())
+    await asyncio.sleep(0)
+    waiters = [
+        asyncio.ensure_future(call(Priority.BACKGROUND, "plan_week")),
+        asyncio.ensure_future(call(Priority.GENERATION, "response_composer")),
+        asyncio.ensure_future(call(Priority.ROUTING, "supervisor")),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queued"] == {"routing": 1, "generation": 1, "background": 1}
+
+    release.set()
+    await asyncio.gather(hold, *waiters)
+    assert order == ["supervisor", "response_composer", "plan_week"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_place():
+    scheduler = LLMAdmissionScheduler(max_concurrency=1)
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(Priority.ROUTING, "supervisor"):
+            await release.wait()
+
+    hold = asyncio.ensure_future(holder())
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(scheduler.slot(Priority.BACKGROUND, "speculative").__aenter__())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    release.set()
+    await hold
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_recorded_per_node():
+    scheduler = LLMAdmissionScheduler(max_concurrency=1)
+
+    async def call(node):
+        async with scheduler.slot(Priority.ROUTING, node):
+            await asyncio.sleep(0.02)
+
+    await asyncio.gather(call("supervisor"), call("task_agent"))
+    waits = MetricsCollector().get_summary()["observations"]["llm_queue_wait_ms"]
+    assert waits["task_agent"]["max"] >= 15
+    assert waits["supervisor"]["count"] == 1
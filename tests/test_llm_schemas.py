@@ -0,0 +1,72 @@
+"""Tests for schema-constrained structured output."""
+import json
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.agents import calendar_agent_node
+from agentzero.agents.calendar_agent import CALENDAR_PLAN_SCHEMA
+from agentzero.agents.task_agent import TASK_ACTIONS
+from agentzero.llm_schemas import parse_json_reply
+from agentzero.metrics import MetricsCollector
+from agentzero.supervisor import SUPERVISOR_SCHEMA
+
+
+def test_plan_schema_lists_action_param_shapes():
+    steps = CALENDAR_PLAN_SCHEMA["properties"]["plan"]["items"]["anyOf"]
+    add_event = next(s for s in steps if s["properties"]["type"] == {"const": "add_event"})
+    assert add_event["properties"]["params"]["required"] == ["name", "date", "time"]
+    assert {s["properties"]["type"]["const"] for s in steps} >= {"ask_user", "plan_day"}
+
+
+def test_task_schemas_match_action_signatures():
+    params = {s["properties"]["type"]["const"]: s["properties"]["params"] for s in TASK_ACTIONS}
+    assert params["add_habit"]["required"] == ["name"]
+    assert set(params["add_habit"]["properties"]) == {"name", "time_of_day", "days_of_week", "description"}
+    assert params["track_habit"]["required"] == ["name"]
+    assert set(params["track_habit"]["properties"]) == {"name", "date"}
+    assert params["add_task"]["required"] == ["task"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider", ["ollama", "cloudflare"])
+async def test_schema_is_sent_to_provider(mock_llm_pool, mocker, provider):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", provider)
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        if provider == "cloudflare":
+            return httpx.Response(200, json={"success": True, "result": {"response": {"domain": "task"}}})
+        return httpx.Response(200, json={"message": {"content": '{"domain": "task"}'}})
+
+    mock_llm_pool.handler = handler
+    result = await llm_service.chat_completion([{"role": "user", "content": "x"}], cache_ttl=0,
+                                               schema=SUPERVISOR_SCHEMA)
+
+    assert json.loads(result) == {"domain": "task"}
+    if provider == "cloudflare":
+        assert payloads[0]["response_format"] == {"type": "json_schema", "json_schema": SUPERVISOR_SCHEMA}
+    else:
+        assert payloads[0]["format"] == SUPERVISOR_SCHEMA
+
+
+@pytest.mark.asyncio
+async def test_agent_declares_schema_and_counts_parses(base_state, mock_chat_completion):
+    MetricsCollector().reset()
+    base_state.user_input = "What's on tomorrow?"
+    mock_chat_completion.return_value = '{"plan": [{"type": "list_events", "params": {"start": "2026-02-15", "end": "2026-02-15"}}]}'
+
+    await calendar_agent_node(base_state)
+
+    assert mock_chat_completion.call_args.kwargs["schema"] is CALENDAR_PLAN_SCHEMA
+    assert MetricsCollector().get_counters()["llm.structured.calendar_agent.parsed"] == 1
+    MetricsCollector().reset()
+
+
+def test_parse_failures_are_counted():
+    MetricsCollector().reset()
+    assert parse_json_reply("no json here", "task_agent") == {}
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_reply('{"plan": [}', "task_agent")
+    assert MetricsCollector().get_counters()["llm.structured.parse_failures"] == 2
+    MetricsCollector().reset()
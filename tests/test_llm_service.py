@@ -0,0 +1,21 @@
+"""Tests for llm_service's chat path bookkeeping."""
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.metrics import MetricsCollector
+
+
+@pytest.mark.asyncio
+async def test_chat_records_prompt_tokens_served_from_kv_cache(mock_llm_pool, mocker):
+    """Nodes share a stable prompt prefix on /api/chat; Ollama only evaluates the new tail."""
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    mock_llm_pool.handler = lambda request: httpx.Response(
+        200, json={"message": {"content": "ok"}, "prompt_eval_count": 2})
+    messages = [{"role": "system", "content": "You are the task agent. " * 20},
+                {"role": "user", "content": "add milk"}]
+
+    await llm_service.chat_completion(messages, node="task_agent")
+
+    counters = MetricsCollector().get_counters()
+    assert counters["llm.prompt_eval_tokens"] == 2
+    assert counters["llm.prompt_cached_tokens"] > 0
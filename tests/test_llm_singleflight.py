@@ -0,0 +1,76 @@
+"""Tests for single-flight coalescing of identical in-flight LLM requests."""
+import asyncio
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_singleflight import SingleFlight
+from agentzero.metrics import MetricsCollector
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    MetricsCollector().reset()
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def slow():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    results = await asyncio.gather(*[flight.do("k", slow) for _ in range(4)])
+    assert results == ["answer"] * 4
+    assert calls == 1
+    assert flight.inflight() == 0
+    assert MetricsCollector().get_counters()["llm_singleflight.test.coalesced"] == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters():
+    flight = SingleFlight("test")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model down")
+
+    results = await asyncio.gather(flight.do("k", boom), flight.do("k", boom), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    leader = asyncio.ensure_future(flight.do("k", slow))
+    follower = asyncio.ensure_future(flight.do("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "ok"
+
+
+@pytest.mark.asyncio
+async def test_chat_and_embedding_coalesced(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    hits = {"chat": 0, "embed": 0}
+
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        if request.url.path.endswith("/api/chat"):
+            hits["chat"] += 1
+            return httpx.Response(200, json={"message": {"content": "hi"}})
+        hits["embed"] += 1
+        return httpx.Response(200, json={"embedding": [0.1, 0.2]})
+
+    mock_llm_pool.handler = handler
+    messages = [{"role": "user", "content": "hello"}]
+    chats = await asyncio.gather(*[llm_service.chat_completion(messages, cache_ttl=0) for _ in range(3)])
+    embeds = await asyncio.gather(*[llm_service.get_embedding("hello") for _ in range(3)])
+
+    assert chats == ["hi"] * 3
+    assert embeds == [[0.1, 0.2]] * 3
+    assert hits == {"chat": 1, "embed": 1}
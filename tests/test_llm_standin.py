@@ -0,0 +1,62 @@
+import json
+import time
+import asyncio
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.llm_standin import LatencyModel, StandInLLM, create_app
+
+
+def _standin(ttft_ms=0.0, tps=0.0, slots=4, script=None):
+    latency = LatencyModel(ttft_ms=ttft_ms, tokens_per_sec=tps, prefill_tps=0, jitter=0, embed_ms_per_input=0)
+    return StandInLLM(latency, slots=slots, script=script, embed_dim=8)
+
+
+@pytest.fixture
+def standin(mock_llm_pool):
+    llm = _standin()
+    mock_llm_pool.transport = httpx.ASGITransport(app=create_app(llm))
+    return llm
+
+
+@pytest.mark.asyncio
+async def test_supervisor_reply_scripted_by_node(standin):
+    messages = [{"role": "system", "content": "route"}, {"role": "user", "content": "Schedule a meeting"}]
+    reply = await llm_service.chat_completion(messages, node="supervisor", cache_ttl=0)
+    assert reply == '{"domain": "calendar"}'
+    assert standin.stats()["requests"] == {"supervisor": 1}
+
+
+@pytest.mark.asyncio
+async def test_node_detected_from_system_prompt_and_streamed():
+    llm = _standin(script={"executor": "hello from the stand-in"})
+    transport = httpx.ASGITransport(app=create_app(llm))
+    async with httpx.AsyncClient(transport=transport, base_url="http://standin") as client:
+        body = {"model": "m", "stream": True,
+                "messages": [{"role": "system", "content": "Your name is Ein."}, {"role": "user", "content": "hi"}]}
+        async with client.stream("POST", "/api/chat", json=body) as response:
+            chunks = [line async for line in response.aiter_lines() if line]
+    assert "".join(json.loads(c)["message"]["content"] for c in chunks) == "hello from the stand-in"
+    assert '"eval_count"' in chunks[-1]
+
+
+def test_scripted_list_cycles():
+    llm = _standin(script={"default": ["a", "b"]})
+    assert [llm.reply_for("default", []) for _ in range(3)] == ["a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_slot_limit_serializes_generations():
+    llm = _standin(ttft_ms=50, slots=1)
+    start = time.perf_counter()
+    await asyncio.gather(*(llm.complete("default", []) for _ in range(3)))
+    assert time.perf_counter() - start >= 0.15
+    assert llm.max_active == 1
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_deterministic(standin):
+    first = await llm_service.get_embeddings(["alpha", "beta"])
+    assert first[0] == standin.embed("alpha")
+    assert first[0] != first[1]
+    assert abs(sum(v * v for v in first[0]) - 1.0) < 1e-6
@@ -0,0 +1,70 @@
+"""Tests for model warm-up and keep-alive management."""
+import json
+import httpx
+import pytest
+from agentzero import llm_service, llm_warmup
+from agentzero.llm_warmup import ModelKeepAlive
+
+
+@pytest.fixture(autouse=True)
+def clear_events():
+    llm_warmup._load_events.clear()
+    yield
+    llm_warmup._load_events.clear()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_preloads_chat_and_embedding(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    mocker.patch.object(llm_service, "OLLAMA_MODEL", "llama3")
+    mocker.patch.object(llm_service, "OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
+    requests = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests.append((request.url.path, body))
+        return httpx.Response(200, json={"load_duration": 2_500_000_000})
+
+    mock_llm_pool.handler = handler
+    assert await llm_warmup.warm_up_models() == 2
+
+    paths = sorted(p for p, _ in requests)
+    assert paths == ["/api/embed", "/api/generate"]
+    assert all(b["keep_alive"] == llm_service.OLLAMA_KEEP_ALIVE for _, b in requests)
+    events = llm_warmup.recent_load_events()
+    assert {e["model"] for e in events} == {"llama3", "nomic-embed-text"}
+    assert events[0]["load_ms"] == 2500.0
+
+
+@pytest.mark.asyncio
+async def test_cold_request_is_recorded(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    mock_llm_pool.handler = lambda r: httpx.Response(
+        200, json={"message": {"content": "hi"}, "load_duration": 4_000_000_000})
+
+    await llm_service.chat_completion([{"role": "user", "content": "hi"}], cache_ttl=0)
+
+    assert llm_warmup.recent_load_events()[0]["reason"] == "request"
+    assert llm_service.last_request_at() > 0
+
+
+def test_keepalive_refresh_policy():
+    ka = ModelKeepAlive(interval=240, idle_window=3600)
+    now = 10_000.0
+    assert not ka.should_refresh(now, 0)              # no traffic yet
+    assert not ka.should_refresh(now, now - 60)       # busy: requests renew keep_alive
+    assert ka.should_refresh(now, now - 600)          # lull after recent traffic
+    assert not ka.should_refresh(now, now - 7200)     # long idle: let the model unload
+    ka.last_refresh = now - 100
+    assert not ka.should_refresh(now, now - 600)      # refreshed recently
+
+
+@pytest.mark.asyncio
+async def test_warm_request_is_not_a_load(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    mock_llm_pool.handler = lambda r: httpx.Response(
+        200, json={"message": {"content": "hi"}, "load_duration": 12_000_000})  # 12ms: model already resident
+
+    await llm_service.chat_completion([{"role": "user", "content": "hi"}])
+
+    assert llm_warmup.recent_load_events() == []
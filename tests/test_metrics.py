@@ -85,3 +85,27 @@ def test_window_filtering():
     summary = c.get_summary(window_seconds=3600)
     assert "old_node" not in summary["nodes"]
     assert "new_node" in summary["nodes"]
+
+
+def test_llm_calls_attach_to_current_request():
+    """LLM calls pick up the request id from context and feed the summary and breakdown."""
+    c = MetricsCollector()
+    c.start_request("req-2", "plan my day")
+    c.record("supervisor", 10.0)
+    c.record_llm_call({"node": "supervisor", "wall_ms": 120.0, "ttft_ms": 40.0, "prompt_tokens": 300,
+                       "output_tokens": 8, "prefill_ms": 30.0, "decode_ms": 80.0, "load_ms": None,
+                       "overhead_ms": 10.0})
+    time.sleep(0.13)
+    c.end_request("req-2")
+
+    trace = c.get_recent_requests()[0]
+    assert len(trace["nodes"]) == 1
+    assert trace["llm_calls"][0]["request_id"] == "req-2"
+    assert trace["breakdown"]["llm_ms"] == 120.0
+    assert trace["breakdown"]["other_ms"] > 0
+
+    summary = c.get_summary()["llm_calls"]["supervisor"]
+    assert summary["calls"] == 1
+    assert summary["ttft_ms"]["avg"] == 40.0
+    assert "load_ms" not in summary
+    assert summary["tokens_per_sec"] == 100.0
@@ -72,3 +72,121 @@ async def test_full_pipeline_permission_denied(compiled_graph, mock_chat_complet
     
     assert result["retries"] == 0 # Reset to 0 after success
     assert result["response"] == "I cannot do that."
+
+@pytest.mark.asyncio
+async def test_fused_pipeline_plans_in_one_call(mock_chat_completion):
+    """Fused mode: one call routes and plans, then policy_enforcer -> executor."""
+    compiled = build_agentzero_graph(fused=True).compile()
+    mock_chat_completion.side_effect = [
+        '{"domain": "task", "plan": [{"type": "add_task", "params": {"task": "buy groceries"}}]}',
+        "I added 'buy groceries' to your tasks.",
+    ]
+
+    result = await compiled.ainvoke(AgentState(user_input="Remind me to buy groceries"))
+
+    assert mock_chat_completion.await_count == 2
+    assert result["intent"] == "task"
+    assert any(r.get("action") == "add_task" for r in result["tool_results"])
+    assert result["response"] == "I added 'buy groceries' to your tasks."
+
+@pytest.mark.asyncio
+async def test_fused_pipeline_falls_back_to_domain_agent(mock_chat_completion):
+    """A fused plan using another domain's tools is dropped and the task agent plans instead."""
+    compiled = build_agentzero_graph(fused=True).compile()
+    mock_chat_completion.side_effect = [
+        '{"domain": "task", "plan": [{"type": "add_event", "params": {"name": "x"}}]}',
+        '{"plan": [{"type": "list_tasks", "params": {}}]}',
+        "Here are your tasks.",
+    ]
+
+    result = await compiled.ainvoke(AgentState(user_input="What's on my list?"))
+
+    assert result["plan"][0]["type"] == "list_tasks"
+    assert result["response"] == "Here are your tasks."
+
+@pytest.mark.asyncio
+async def test_multi_domain_pipeline_fans_out(compiled_graph, mock_chat_completion, mocker):
+    """One message routed to task + calendar: both agents plan concurrently, one executor pass."""
+    mocker.patch("agentzero.supervisor.MULTI_DOMAIN_ENABLED", True)
+    replies = {
+        "supervisor": '{"domains": ["task", "calendar"]}',
+        "task_agent": '{"plan": [{"type": "add_task", "params": {"task": "buy milk"}}]}',
+        "calendar_agent": '{"plan": [{"type": "ask_user", "params": {"question": "Which Friday?"}}]}',
+        "response_composer": "Added 'buy milk'. Which Friday did you mean?",
+    }
+
+    async def reply(messages, **kwargs):
+        return replies[kwargs["node"]]
+    mock_chat_completion.side_effect = reply
+
+    result = await compiled_graph.ainvoke(AgentState(user_input="Add a task to buy milk and book the dentist Friday"))
+
+    assert result["intent"] == "task"
+    assert result["domains"] == ["task", "calendar"]
+    assert [step["type"] for step in result["plan"]] == ["add_task", "ask_user"]
+    assert result["permissions"]["add_task"] and result["permissions"]["add_event"]
+    assert any(r.get("action") == "add_task" for r in result["tool_results"])
+    assert mock_chat_completion.await_count == 4
+
+@pytest.mark.asyncio
+async def test_parsed_command_goes_straight_to_executor(compiled_graph, mock_chat_completion, mocker):
+    """A locally parsed command skips the supervisor and agent LLM calls."""
+    mocker.patch("agentzero.command_parser.COMMAND_PARSER_ENABLED", True)
+    mock_chat_completion.side_effect = ["I added 'buy groceries' to your tasks."]
+
+    result = await compiled_graph.ainvoke(AgentState(user_input="add a task to buy groceries"))
+
+    assert mock_chat_completion.await_count == 1
+    assert any(r.get("action") == "add_task" for r in result["tool_results"])
+
+@pytest.mark.asyncio
+async def test_multi_domain_retry_replans_only_the_failed_domain(compiled_graph, mock_chat_completion, mocker):
+    """A failed calendar step is re-planned alone; the task that worked is not added again."""
+    from unittest.mock import MagicMock
+    from agentzero.actions import Action
+    mocker.patch("agentzero.supervisor.MULTI_DOMAIN_ENABLED", True)
+    add_task = MagicMock(return_value="Task 'buy milk' added successfully.")
+    add_event = MagicMock(side_effect=["Error: invalid date", "Event added."])
+    mocker.patch.dict("agentzero.executor.ACTIONS", {
+        "add_task": Action("add_task", "", add_task), "add_event": Action("add_event", "", add_event)})
+    calendar_prompts = []
+
+    async def reply(messages, **kwargs):
+        node = kwargs["node"]
+        if node == "calendar_agent":
+            calendar_prompts.append(" ".join(m["content"] for m in messages))
+            return '{"plan": [{"type": "add_event", "params": {"name": "Dentist", "date": "2026-10-23", "time": "15:00"}}]}'
+        return {
+            "supervisor": '{"domains": ["task", "calendar"]}',
+            "task_agent": '{"plan": [{"type": "add_task", "params": {"task": "buy milk"}}]}',
+            "response_composer": "Done.",
+        }[node]
+    mock_chat_completion.side_effect = reply
+
+    result = await compiled_graph.ainvoke(AgentState(user_input="Add a task to buy milk and book the dentist Friday at 3pm"))
+
+    assert add_task.call_count == 1
+    assert add_event.call_count == 2
+    assert len(calendar_prompts) == 2 and "invalid date" in calendar_prompts[1]
+    assert [s["type"] for s in result["plan"]] == ["add_task", "add_event"]
+    assert [r.get("result") for r in result["tool_results"]] == ["Task 'buy milk' added successfully.", "Event added."]
+
+
+@pytest.mark.asyncio
+async def test_multi_domain_reports_a_failed_branch(compiled_graph, mock_chat_completion, mocker):
+    mocker.patch("agentzero.supervisor.MULTI_DOMAIN_ENABLED", True)
+
+    async def reply(messages, **kwargs):
+        if kwargs["node"] == "calendar_agent":
+            raise RuntimeError("model unavailable")
+        return {
+            "supervisor": '{"domains": ["task", "calendar"]}',
+            "task_agent": '{"plan": [{"type": "add_task", "params": {"task": "buy milk"}}]}',
+            "response_composer": "Added the task; couldn't do the calendar part.",
+        }[kwargs["node"]]
+    mock_chat_completion.side_effect = reply
+
+    result = await compiled_graph.ainvoke(AgentState(user_input="Add a task to buy milk and book the dentist Friday"))
+
+    assert [s["type"] for s in result["plan"]] == ["add_task", "ask_user"]
+    assert "calendar part" in result["tool_results"][1]["chat"]
@@ -0,0 +1,61 @@
+"""Tests for token-budgeted, prefix-stable prompt assembly."""
+from agentzero.metrics import MetricsCollector
+from agentzero.prompt_builder import HABITS, PromptBuilder, count_message_tokens, count_tokens
+
+
+def _history(n):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "word " * 40}
+            for i in range(n)]
+
+
+def test_within_budget_keeps_everything_in_order():
+    prompt = PromptBuilder("supervisor", model="llama3", budget=10_000)
+    messages = prompt.system("You are a router.").history(_history(4)).user("hi").build()
+
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "user", "assistant", "user"]
+    assert messages[1]["content"].startswith("turn 0")
+    assert messages[-1]["content"] == "hi"
+
+
+def test_over_budget_drops_oldest_history_first():
+    history = _history(10)
+    budget = count_message_tokens(history[-3:], "llama3") + 60
+    messages = (PromptBuilder("executor", model="llama3", budget=budget)
+                .system("You are Ein.").history(history).user("hello").build())
+
+    kept = [m["content"] for m in messages[1:-1]]
+    assert kept and kept[-1].startswith("turn 9")
+    assert not any(c.startswith("turn 0") for c in kept)
+    assert count_message_tokens(messages, "llama3") <= budget
+
+
+def test_low_priority_section_is_truncated_before_history_is_dropped():
+    habits = "habit " * 400
+    budget = count_tokens(habits, "llama3") // 2
+    messages = (PromptBuilder("calendar_agent", model="llama3", budget=budget)
+                .system("Calendar agent.").system(habits, priority=HABITS, truncatable=True)
+                .history(_history(2)).user("plan my day").build())
+
+    assert messages[0]["content"].startswith("Calendar agent.")
+    assert messages[0]["content"].endswith("…")
+    assert len(messages) == 4  # both history turns survived
+    assert count_message_tokens(messages, "llama3") <= budget
+
+
+def test_prompt_tokens_recorded_per_node():
+    MetricsCollector().reset()
+    PromptBuilder("task_agent", model="llama3").system("Task agent.").user("add milk").build()
+    summary = MetricsCollector().get_summary()
+    assert summary["observations"]["prompt_tokens"]["task_agent"]["count"] == 1
+    MetricsCollector().reset()
+
+
+def test_volatile_context_goes_after_history_so_prefix_is_stable():
+    def build(now):
+        return (PromptBuilder("task_agent", model="llama3").system("Task agent.")
+                .history(_history(2)).context(f"Currently: {now}").user("add milk").build())
+
+    first, second = build("09:00"), build("09:01")
+    assert [m["role"] for m in first] == ["system", "user", "assistant", "system", "user"]
+    assert first[:3] == second[:3]  # identical prefix across requests
+    assert first[3]["content"] == "Currently: 09:00"
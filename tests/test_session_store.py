@@ -86,3 +86,22 @@ def test_persistence_across_instances(tmp_path):
     data = store2.get("persist_user")
     
     assert data["history"] == history
+
+def test_pending_action_roundtrip(temp_store):
+    pending = {"domain": "calendar", "action": "add_event", "params": {"name": "Dentist"}, "missing": ["time"]}
+    temp_store.set("user1", [{"role": "assistant", "content": "What time?"}], pending)
+    assert temp_store.get("user1")["pending"] == pending
+
+    temp_store.set("user1", [])
+    assert temp_store.get("user1")["pending"] is None
+
+def test_migrates_old_schema(tmp_path):
+    import sqlite3
+    db_path = str(tmp_path / "old.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, history TEXT NOT NULL, last_accessed REAL NOT NULL)")
+        conn.execute("INSERT INTO sessions VALUES ('old', '[]', ?)", (time.time(),))
+    store = SQLiteSessionStore(db_path)
+    assert store.get("old") == {"history": [], "pending": None, "last_accessed": pytest.approx(time.time(), abs=5)}
+    store.set("old", [], {"action": "add_task"})
+    assert store.get("old")["pending"] == {"action": "add_task"}
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import AsyncMock
+from agentzero import slot_filling
+from agentzero.agent_state import AgentState
+from agentzero.graph import build_agentzero_graph
+from agentzero.supervisor import supervisor_node
+
+DENTIST = {"domain": "calendar", "action": "add_event", "params": {"name": "Dentist", "date": "2026-10-23"},
+           "missing": ["time"], "question": "What time should I schedule the dentist?"}
+
+
+@pytest.fixture(autouse=True)
+def enabled(mocker):
+    mocker.patch.object(slot_filling, "SLOT_FILLING_ENABLED", True)
+
+
+def test_pending_from_ask_user_params():
+    params = {"question": "What time?", "action": "add_event",
+              "known": {"name": "Dentist", "date": "2026-10-23", "bogus": 1}, "missing": ["time"]}
+    assert slot_filling.pending_from(params, "calendar") == {
+        "domain": "calendar", "action": "add_event", "params": {"name": "Dentist", "date": "2026-10-23"},
+        "missing": ["time"], "question": "What time?",
+    }
+    assert slot_filling.pending_from({"question": "What time?"}, "calendar") is None
+    assert slot_filling.pending_from({"action": "add_event", "missing": ["colour"]}, "calendar") is None
+
+
+@pytest.mark.asyncio
+async def test_answer_filled_locally_skips_llm(base_state, mock_chat_completion):
+    base_state.user_input = "3:30pm"
+    base_state.pending = dict(DENTIST)
+    state = await supervisor_node(base_state)
+    assert state.intent == "calendar"
+    assert state.plan == [{"type": "add_event", "params": {"name": "Dentist", "begin": "2026-10-23T15:30:00"}}]
+    assert state.pending is None
+    mock_chat_completion.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_answer_uses_extraction_call(base_state, mock_chat_completion, mocker):
+    extractor = AsyncMock(return_value='{"time": "15:00"}')
+    mocker.patch("agentzero.llm_service.chat_completion", extractor)
+    base_state.user_input = "around 3"
+    base_state.pending = dict(DENTIST)
+    state = await supervisor_node(base_state)
+    assert state.plan == [{"type": "add_event", "params": {"name": "Dentist", "begin": "2026-10-23T15:00:00"}}]
+    assert extractor.await_args.kwargs["node"] == "slot_filler"
+    mock_chat_completion.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_new_request_abandons_pending(base_state, mock_chat_completion):
+    mock_chat_completion.return_value = '{"domain": "chat"}'
+    base_state.user_input = "never mind, what's the capital of France?"
+    base_state.pending = dict(DENTIST)
+    state = await supervisor_node(base_state)
+    assert state.pending is None
+    assert state.intent == "chat"
+    assert not state.plan
+
+
+@pytest.mark.asyncio
+async def test_follow_up_goes_straight_to_executor(mock_chat_completion):
+    """Turn 1 asks for the task name and records it as pending; turn 2 only runs executor + composer."""
+    graph = build_agentzero_graph().compile()
+    mock_chat_completion.side_effect = [
+        '{"domain": "task"}',
+        '{"plan": [{"type": "ask_user", "params": {"question": "What should the task be?", '
+        '"action": "add_task", "known": {}, "missing": ["task"]}}]}',
+        "What should the task be?",
+    ]
+    first = await graph.ainvoke(AgentState(user_input="add a task"))
+    assert first["pending"]["action"] == "add_task"
+
+    mock_chat_completion.reset_mock()
+    mock_chat_completion.side_effect = ["I added 'buy groceries' to your tasks."]
+    second = await graph.ainvoke(AgentState(user_input="buy groceries", pending=first["pending"]))
+
+    assert mock_chat_completion.await_count == 1
+    assert any(r.get("action") == "add_task" for r in second["tool_results"])
+    assert second["pending"] is None
+
+
+@pytest.mark.asyncio
+async def test_unrelated_reply_is_not_taken_as_the_task_name(base_state, mock_chat_completion):
+    mock_chat_completion.return_value = '{"domain": "chat"}'
+    base_state.user_input = "what's the weather"
+    base_state.pending = {"domain": "task", "action": "add_task", "params": {}, "missing": ["task"],
+                          "question": "What should the task be?"}
+    state = await supervisor_node(base_state)
+    assert state.pending is None
+    assert state.intent == "chat"
+    assert not state.plan
+
+
+@pytest.mark.asyncio
+async def test_reply_with_unresolved_time_words_goes_to_extraction(base_state, mock_chat_completion, mocker):
+    extractor = AsyncMock(return_value='{}')  # the model finds no task name in it
+    mocker.patch("agentzero.llm_service.chat_completion", extractor)
+    mock_chat_completion.return_value = '{"domain": "task"}'
+    base_state.user_input = "sometime next week"
+    base_state.pending = {"domain": "task", "action": "add_task", "params": {}, "missing": ["task"],
+                          "question": "What should the task be?"}
+    state = await supervisor_node(base_state)
+    assert extractor.await_args.kwargs["node"] == "slot_filler"
+    assert not state.plan  # fell back to normal routing
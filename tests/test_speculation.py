@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from agentzero import speculation
+from agentzero.agents import task_agent_node
+from agentzero.llm_scheduler import LLMAdmissionScheduler, Priority, priority_floor
+from agentzero.metrics import MetricsCollector
+from agentzero.supervisor import supervisor_node
+
+REPLIES = {
+    "supervisor": '{"domain": "task"}',
+    "task_agent": '{"plan": [{"type": "list_tasks", "params": {}}]}',
+}
+
+
+@pytest.fixture(autouse=True)
+def enabled(mocker):
+    mocker.patch.object(speculation, "SPECULATIVE_PLANNING_ENABLED", True)
+    MetricsCollector().reset()
+    speculation.reset()
+    yield
+    speculation.reset()
+
+
+def _script(mock, replies):
+    async def reply(messages, **kwargs):
+        await asyncio.sleep(0.01)
+        return replies[kwargs["node"]]
+    mock.side_effect = reply
+
+
+@pytest.mark.asyncio
+async def test_confirmed_speculation_replaces_the_planner_call(base_state, mock_chat_completion):
+    _script(mock_chat_completion, REPLIES)
+    base_state.user_input = "list my tasks"
+    state = await supervisor_node(base_state)
+    state = await speculation.speculative_or(task_agent_node)(state)
+
+    assert state.plan == [{"type": "list_tasks", "params": {}}]
+    assert mock_chat_completion.await_count == 2
+    assert speculation.stats()["hit_rate"] == 1.0
+    assert "speculation_saved_ms" in MetricsCollector().get_summary()["observations"]
+
+
+@pytest.mark.asyncio
+async def test_wrong_guess_is_cancelled(base_state, mock_chat_completion):
+    _script(mock_chat_completion, {**REPLIES, "supervisor": '{"domain": "calendar"}'})
+    base_state.user_input = "list my tasks"
+    await supervisor_node(base_state)
+
+    counters = MetricsCollector().get_counters()
+    assert counters["speculation.misses"] == 1
+    assert counters["speculation.wasted"] == 1
+    assert speculation.stats()["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waste_cap_pauses_speculation(base_state, mock_chat_completion, mocker):
+    mocker.patch.object(speculation, "SPECULATION_MAX_WASTED_PER_MINUTE", 0)
+    _script(mock_chat_completion, REPLIES)
+    base_state.user_input = "list my tasks"
+    await supervisor_node(base_state)
+    assert MetricsCollector().get_counters()["speculation.skipped_waste_cap"] == 1
+    assert mock_chat_completion.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_priority_floor_demotes_calls():
+    scheduler = LLMAdmissionScheduler(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(Priority.GENERATION, "executor"):
+            await release.wait()
+
+    async def call(name):
+        async with scheduler.slot(Priority.ROUTING, name):
+            order.append(name)
+
+    async def speculative():
+        with priority_floor(Priority.BACKGROUND):
+            await call("speculative")
+
+    hold = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(speculative()), asyncio.create_task(call("real"))]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(hold, *tasks)
+    assert order == ["real", "speculative"]
+
+
+@pytest.mark.asyncio
+async def test_multi_domain_branches_take_only_their_own_speculation(base_state, mock_chat_completion, mocker):
+    from agentzero.multi_agent import multi_agent_node
+    mocker.patch("agentzero.supervisor.MULTI_DOMAIN_ENABLED", True)
+    _script(mock_chat_completion, {
+        **REPLIES,
+        "supervisor": '{"domains": ["calendar", "task"]}',
+        "calendar_agent": '{"plan": [{"type": "list_events", "params": {}}]}',
+    })
+    base_state.user_input = "list my tasks and my events"
+    state = await supervisor_node(base_state)
+    state = await multi_agent_node(state)
+
+    planners = [c.kwargs["node"] for c in mock_chat_completion.await_args_list if c.kwargs["node"].endswith("_agent")]
+    assert sorted(planners) == ["calendar_agent", "task_agent"]
+    assert [s["domain"] for s in state.plan] == ["calendar", "task"]
+    assert speculation.stats()["hit_rate"] == 1.0
@@ -0,0 +1,81 @@
+"""Tests for LLM token streaming through the pipeline."""
+import json
+import httpx
+import pytest
+from agentzero import llm_service
+from agentzero.agent_state import AgentState
+from agentzero.graph import build_agentzero_graph
+
+
+@pytest.mark.asyncio
+async def test_ollama_ndjson_stream(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    lines = [
+        {"message": {"content": "Hel"}, "done": False},
+        {"message": {"content": "lo"}, "done": False},
+        {"message": {"content": ""}, "done": True},
+    ]
+    body = "\n".join(json.dumps(l) for l in lines).encode()
+    mock_llm_pool.handler = lambda request: httpx.Response(200, content=body)
+
+    tokens = [t async for t in llm_service.chat_completion_stream([{"role": "user", "content": "hi"}])]
+    assert tokens == ["Hel", "lo"]
+
+
+@pytest.mark.asyncio
+async def test_cloudflare_sse_stream(mock_llm_pool, mocker):
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "cloudflare")
+    mocker.patch.object(llm_service, "_last_request_at", 0.0)
+    body = b'data: {"response": "Hi"}\n\ndata: {"response": " there"}\n\ndata: [DONE]\n\n'
+    mock_llm_pool.handler = lambda request: httpx.Response(200, content=body)
+
+    tokens = [t async for t in llm_service.chat_completion_stream([{"role": "user", "content": "hi"}])]
+    assert tokens == ["Hi", " there"]
+    assert llm_service.last_request_at() > 0  # counts as traffic for keep-alive
+
+
+@pytest.mark.asyncio
+async def test_graph_streams_chat_tokens(mock_chat_completion, mocker):
+    """Executor chat tokens surface through LangGraph's custom stream mode."""
+    async def fake_stream(messages, timeout=120, **kwargs):
+        for token in ["How ", "can ", "I help?"]:
+            yield token
+
+    mocker.patch("agentzero.streaming.chat_completion_stream", fake_stream)
+    mock_chat_completion.side_effect = ['{"domain": "chat"}']
+
+    graph = build_agentzero_graph().compile()
+    tokens, final = [], None
+    async for mode, chunk in graph.astream(
+        AgentState(user_input="Hello!"),
+        config={"configurable": {"stream_tokens": True}},
+        stream_mode=["custom", "values"],
+    ):
+        if mode == "custom":
+            tokens.append(chunk["content"])
+        else:
+            final = chunk
+
+    assert tokens == ["How ", "can ", "I help?"]
+    assert final["response"] == "How can I help?"
+
+
+@pytest.mark.asyncio
+async def test_stream_records_ttft_and_ollama_stats(mock_llm_pool, mocker):
+    from agentzero.metrics import MetricsCollector
+    mocker.patch.object(llm_service, "LLM_PROVIDER", "ollama")
+    lines = [
+        {"message": {"content": "Hi"}, "done": False},
+        {"message": {"content": ""}, "done": True, "prompt_eval_count": 12, "eval_count": 1,
+         "prompt_eval_duration": 2_000_000, "eval_duration": 5_000_000, "load_duration": 0,
+         "total_duration": 8_000_000},
+    ]
+    body = "\n".join(json.dumps(l) for l in lines).encode()
+    mock_llm_pool.handler = lambda request: httpx.Response(200, content=body)
+
+    [t async for t in llm_service.chat_completion_stream([{"role": "user", "content": "hi"}], node="executor")]
+    calls = MetricsCollector().get_summary()["llm_calls"]["executor"]
+    assert calls["calls"] == 1
+    assert calls["prompt_tokens"]["avg"] == 12
+    assert calls["prefill_ms"]["avg"] == 2.0
+    assert calls["ttft_ms"]["avg"] >= 0
@@ -39,3 +39,14 @@ async def test_supervisor_error_passthrough(base_state):
     new_state = await supervisor_node(base_state)
     assert new_state.step == "error_handler"
     assert new_state.intent == ""
+
+@pytest.mark.asyncio
+async def test_supervisor_multi_domain(base_state, mock_chat_completion, mocker):
+    mocker.patch("agentzero.supervisor.MULTI_DOMAIN_ENABLED", True)
+    mock_chat_completion.return_value = '{"domains": ["chat", "calendar", "task", "calendar"]}'
+    base_state.user_input = "Add a task to buy milk and schedule a dentist visit Friday at 3"
+    state = await supervisor_node(base_state)
+    assert state.intent == "calendar"
+    assert state.domains == ["calendar", "task"]
+    prompt = mock_chat_completion.call_args.kwargs["messages"][0]["content"]
+    assert '{"domains": [' in prompt and '{"domain": ' not in prompt  # one reply format